@@ -1,4 +1,5 @@
 import streamlit as st
+from modulos import inicializacao, instrumentacao
 
 # --- CONFIGURAÇÃO INICIAL (Deve ser a primeira linha) ---
 st.set_page_config(
@@ -21,14 +22,26 @@ paginas = {
         st.Page('paginas/estatistica.py', title='Matrizes de Correlação', icon="📉"),
         st.Page('paginas/testes.py', title='Teste de Hipóteses', icon="🧪"),
         st.Page('paginas/modelagem.py', title='Modelagem e IA', icon="🧠"),
+        st.Page('paginas/america_sul.py', title='América do Sul', icon="🌎"),
     ],
     
     # 3. O Diferencial (Chatbot)
     "Assistente Virtual": [
         st.Page('paginas/chatbot.py', title='Chatbot Especialista', icon="💬"),
+    ],
+
+    # 4. Diagnóstico de desempenho (fora do menu; acesso direto por /diagnostico)
+    "Diagnóstico": [
+        st.Page('paginas/diagnostico.py', title='Diagnóstico', icon="⏱️", url_path='diagnostico', visibility='hidden'),
     ]
 }
 
+# --- PRÉ-AQUECIMENTO ---
+# Tabelas, cubo e bibliotecas pesadas carregam numa thread enquanto a primeira página já aparece
+inicializacao.preaquecer()
+
 # --- EXECUÇÃO ---
+# Mede cada gráfico (tempo e tamanho do JSON) e o rerun completo da página
+instrumentacao.instalar()
 pag = st.navigation(paginas)
-pag.run()
+instrumentacao.executar_pagina(pag)
@@ -0,0 +1,4 @@
+"""Benchmarks sem interface dos cálculos de cada página.
+
+    python -m benchmarks.executar --escalas 1 10 100
+"""
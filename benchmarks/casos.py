@@ -0,0 +1,176 @@
+"""Casos de benchmark: o cálculo de cada página com filtros representativos.
+
+Cada caso recebe as tabelas (`semanal`, `mensal` e `completos`, já na
+escala pedida) e pode devolver métricas extras (ex.: bytes do gráfico).
+`escala_maxima` limita os casos cujo custo cresce mais que linearmente.
+
+Os casos das páginas que consultam o cubo (dashboard e mapa) chamam as mesmas
+funções da página, passando a elas os cubos da escala do caso (parâmetro
+`cubos`, montados uma vez, na execução de aquecimento).
+"""
+import json
+
+import plotly.io
+
+from modulos import (anomalias, backtest, calendario, comparacoes, correlacao, cubo, geo, graficos,
+                     modelos, previsao, reamostragem)
+
+CASOS = {}
+
+
+def caso(nome, escala_maxima=None):
+    def registrar(func):
+        CASOS[nome] = {'executar': func, 'escala_maxima': escala_maxima}
+        return func
+    return registrar
+
+
+def _cubos(t):
+    """Cubos indexados das tabelas `t` (em cache na página; montados uma vez por escala)."""
+    if 'cubos' not in t:
+        t['cubos'] = {f: cubo.indexar(cubo.construir_cubo(t[f], f)) for f in ('semanal', 'mensal')}
+    return t['cubos']
+
+
+def _estados_da_regiao(t, regiao):
+    mensal = t['mensal']
+    return sorted(mensal.loc[mensal['region'] == regiao, 'state'].astype(str).unique())
+
+
+def _geojson(t):
+    """Geometria dos mapas (em cache na página): o ativo local ou, sem ele, um quadrado por estado."""
+    if 'geojson' not in t:
+        if geo.ARQUIVO_ATIVO.exists():
+            t['geojson'] = geo.decodificar(json.loads(geo.ARQUIVO_ATIVO.read_text(encoding='utf-8')))
+        else:
+            features = []
+            for i, sigla in enumerate(sorted(t['semanal']['state'].astype(str).unique())):
+                x, y = -70 + (i % 6) * 4, -30 + (i // 6) * 4
+                anel = [[x, y], [x + 3, y], [x + 3, y + 3], [x, y + 3], [x, y]]
+                features.append({'type': 'Feature', 'id': sigla, 'properties': {'sigla': sigla},
+                                 'geometry': {'type': 'Polygon', 'coordinates': [anel]}})
+            t['geojson'] = {'type': 'FeatureCollection', 'features': features}
+    return t['geojson']
+
+
+# --- DASHBOARD ---
+
+@caso('dashboard.cubo_mensal')
+def cubo_mensal(t):
+    cubo.indexar(cubo.construir_cubo(t['mensal'], 'mensal'))
+
+
+@caso('dashboard.cubo_semanal')
+def cubo_semanal(t):
+    cubo.indexar(cubo.construir_cubo(t['semanal'], 'semanal'))
+
+
+def _resumos(t, espacial, medida, chaves):
+    """Como `resumos_distribuicao` do dashboard: esboços do cubo -> resumo de cada caixa."""
+    dist = cubo.distribuicao('mensal', espacial, medida, chaves, cubos=_cubos(t))
+    return {k: graficos.resumo_caixa(d['pontos'], d['pesos'], d['min'], d['max'], d['media'], d['desvio'])
+            for k, d in dist.items()}
+
+
+@caso('dashboard.caixas_regioes')
+def caixas_regioes(t):
+    fig = graficos.figura_distribuicao(_resumos(t, 'region', 'temperatura_media', None))
+    return {'bytes': len(plotly.io.to_json(fig))}
+
+
+@caso('dashboard.violinos_estados')
+def violinos_estados(t):
+    resumos = _resumos(t, 'state', 'chuva_media_acumulada', _estados_da_regiao(t, 'NE'))
+    fig = graficos.figura_distribuicao(resumos, formato='violino')
+    return {'bytes': len(plotly.io.to_json(fig))}
+
+
+@caso('dashboard.painel_cliente')
+def painel_cliente(t):
+    regiao_por_estado = dict(zip(t['mensal']['state'].astype(str), t['mensal']['region'].astype(str)))
+    serie = cubo.serie('mensal', 'state', 'temperatura_media', 'mes', cubos=_cubos(t))
+    pacote = graficos.pacote_cliente(serie, 'temperatura_media', regiao_por_estado)
+    html = graficos.painel_cliente(pacote, 'Temperatura Média (C)', {}, {})
+    return {'bytes': len(html)}  # O Plotly.js é um arquivo estático à parte, baixado uma vez
+
+
+# --- MAPA ---
+
+@caso('mapa.estacao_por_ano')
+def mapa_estacao(t):
+    serie = cubo.serie('semanal', 'state', 'temperatura_media', 'estacao', cubos=_cubos(t))
+    serie = serie[serie['periodo'].dt.month == calendario.MES_INICIO['Verão']].sort_values(['ano', 'state'])
+    fig = graficos.choropleth_animado(serie, frame='ano', valor='temperatura_media', geojson=_geojson(t))
+    return {'bytes': len(plotly.io.to_json(fig))}
+
+
+@caso('mapa.semanas')
+def mapa_semanas(t):
+    serie = cubo.serie('semanal', 'state', 'chuva_media_semanal', 'semana', cubos=_cubos(t))
+    serie = serie.sort_values(['periodo', 'state'])
+    serie['periodo_label'] = serie['periodo'].dt.strftime('%Y-%m-%d')
+    fig = graficos.choropleth_animado(serie, frame='periodo_label', valor='chuva_media_semanal',
+                                      geojson=_geojson(t), duracao=150)
+    return {'bytes': len(plotly.io.to_json(fig))}
+
+
+# --- CORRELAÇÃO ---
+
+@caso('estatistica.tensor')
+def tensor(t):
+    correlacao.calcular_tensor(t['semanal'])
+
+
+# --- TESTES DE HIPÓTESE ---
+
+@caso('testes.posthoc_regioes')
+def posthoc_regioes(t):
+    nomes, _, preparado = comparacoes.amostras_por_grupo(t['semanal'], 'temperatura_media', 'region')
+    s = comparacoes.suficientes(preparado, range(len(nomes)))
+    for metodo in comparacoes.METODOS:
+        comparacoes.todos_os_pares(s, metodo)
+
+
+@caso('testes.posthoc_estados')
+def posthoc_estados(t):
+    nomes, _, preparado = comparacoes.amostras_por_grupo(t['semanal'], 'chuva_media_semanal', 'state')
+    s = comparacoes.suficientes(preparado, range(len(nomes)))
+    comparacoes.todos_os_pares(s, 'tukey')
+
+
+@caso('testes.reamostragem')
+def reamostrar(t):
+    nomes, amostras, _ = comparacoes.amostras_por_grupo(t['semanal'], 'umidade_media', 'region')
+    par = [amostras[nomes.index('N')], amostras[nomes.index('S')]]
+    reamostragem.teste_permutacao_blocos(par)
+    reamostragem.bootstrap_efeito(par)
+
+
+# --- MODELAGEM ---
+
+@caso('modelagem.regressao')
+def regressao(t):
+    modelos.regressao(t['completos'], ['umidade_media', 'chuva_media_semanal'], 'temperatura_media')
+
+
+@caso('modelagem.kmeans')
+def kmeans(t):
+    features = ['temperatura_media', 'chuva_media_semanal', 'umidade_media']
+    modelos.kmeans(modelos.medias_por_estado(t['completos'], features), features, 4)
+
+
+@caso('modelagem.anomalias')
+def pontuar(t):
+    anomalias.calcular_pontuacoes(t['completos'])
+
+
+@caso('modelagem.previsao')
+def prever(t):
+    tabela = previsao.pivotar(t['completos'], 'temperatura_media')
+    previsao._ajustar_lote(tabela, previsao.HORIZONTE_PADRAO, previsao.QTD_TESTE)
+
+
+@caso('modelagem.backtest')
+def validar(t):
+    tabela = previsao.pivotar(t['completos'], 'temperatura_media')
+    backtest.calcular_erros('temperatura_media', tabela=tabela)
@@ -0,0 +1,133 @@
+"""Executa os casos de benchmark em várias escalas e compara com a linha de base.
+
+    python -m benchmarks.executar                      # escalas 1, 10 e 100
+    python -m benchmarks.executar --escalas 1 10 --casos testes modelagem.kmeans
+    python -m benchmarks.executar --gravar-base        # grava a linha de base atual
+
+A escala 1 usa as tabelas reais; a escala N usa tabelas sintéticas
+(`modulos.sintetico`) com N estações por estado no mesmo período.
+
+Para cada caso e escala: uma execução de aquecimento, `--repeticoes` medições
+de tempo (mediana e mínimo) e uma execução separada sob `tracemalloc` para o
+pico de memória (só alocações deste processo; os workers do joblib ficam de
+fora). Um caso regride quando a mediana ou o pico passa da linha de base por
+mais de `--tolerancia`; nesse caso o comando termina com código 1.
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.casos import CASOS
+from modulos import dados, sintetico
+
+PASTA_RESULTADOS = Path(__file__).parent / "resultados"
+LINHA_DE_BASE = PASTA_RESULTADOS / "linha_de_base.json"
+TOLERANCIA = 0.25  # Folga sobre a linha de base antes de acusar regressão
+
+
+def _tabela(granularidade, fator):
+    real = dados._ler_tabela(granularidade)
+    if fator == 1:
+        return real
+    modelo = sintetico.ajustar(real, granularidade)
+    bruto = pd.concat(sintetico.gerar(granularidade, estacoes=fator, modelo=modelo), ignore_index=True)
+    return dados._tipar(bruto, granularidade)
+
+
+def tabelas(fator):
+    semanal, mensal = _tabela('semanal', fator), _tabela('mensal', fator)
+    completos = semanal.dropna(subset=dados.TABELAS['semanal']["medidas"]).reset_index(drop=True)
+    return {'semanal': semanal, 'mensal': mensal, 'completos': completos}
+
+
+def medir(executar, t, repeticoes):
+    extra = executar(t) or {}  # Aquecimento (imports, caches de módulo)
+
+    tempos = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        executar(t)
+        tempos.append(time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    executar(t)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'mediana_s': statistics.median(tempos), 'minimo_s': min(tempos),
+            'pico_mb': pico / 2 ** 20, **extra}
+
+
+def comparar(resultados, base, tolerancia):
+    """Lista de (chave, métrica, atual, base) que passaram da tolerância."""
+    regressoes = []
+    for chave, atual in resultados.items():
+        referencia = base.get(chave)
+        if not referencia:
+            continue
+        for metrica in ('mediana_s', 'pico_mb'):
+            if atual[metrica] > referencia[metrica] * (1 + tolerancia):
+                regressoes.append((chave, metrica, atual[metrica], referencia[metrica]))
+    return regressoes
+
+
+def principal(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--casos', nargs='+', help="Prefixos dos casos (ex.: testes, modelagem.kmeans)")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA)
+    parser.add_argument('--gravar-base', action='store_true', help="Grava o resultado como nova linha de base")
+    args = parser.parse_args(argv)
+
+    nomes = [n for n in CASOS if not args.casos or any(n.startswith(p) for p in args.casos)]
+    resultados = {}
+    for fator in args.escalas:
+        t = tabelas(fator)
+        print(f"\n== {fator}x ({len(t['semanal']):,} linhas semanais, {len(t['mensal']):,} mensais) ==")
+        for nome in nomes:
+            maxima = CASOS[nome]['escala_maxima']
+            if maxima is not None and fator > maxima:
+                continue
+            r = medir(CASOS[nome]['executar'], t, args.repeticoes)
+            resultados[f"{nome}@{fator}x"] = r
+            bytes_ = f"  {r['bytes'] / 1024:,.0f} KB" if 'bytes' in r else ""
+            print(f"{nome:<32} {r['mediana_s'] * 1000:>10.1f} ms  (mín {r['minimo_s'] * 1000:.1f})"
+                  f"  pico {r['pico_mb']:>8.1f} MB{bytes_}")
+
+    PASTA_RESULTADOS.mkdir(exist_ok=True)
+    carimbo = time.strftime('%Y%m%d-%H%M%S')
+    (PASTA_RESULTADOS / f"{carimbo}.json").write_text(json.dumps(resultados, indent=2))
+
+    if args.gravar_base:
+        base = json.loads(LINHA_DE_BASE.read_text()) if LINHA_DE_BASE.exists() else {}
+        base.update(resultados)
+        LINHA_DE_BASE.write_text(json.dumps(base, indent=2))
+        print(f"\nLinha de base gravada em {LINHA_DE_BASE}")
+        return 0
+
+    if not LINHA_DE_BASE.exists():
+        print("\nSem linha de base para comparar (rode com --gravar-base).")
+        return 0
+    regressoes = comparar(resultados, json.loads(LINHA_DE_BASE.read_text()), args.tolerancia)
+    for chave, metrica, atual, referencia in regressoes:
+        print(f"REGRESSÃO {chave}: {metrica} {atual:.3f} vs {referencia:.3f} (base)")
+    if not regressoes:
+        print("\nNenhuma regressão acima da tolerância.")
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # Avisos do Streamlit fora de `streamlit run`
+        sys.exit(principal())
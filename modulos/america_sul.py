@@ -0,0 +1,197 @@
+"""Agregação em fluxo das observações da América do Sul (`dados_AS2.csv`).
+
+O arquivo de observações só cresce (linhas novas no final). Em vez de
+reler tudo, guardamos o deslocamento em bytes já consumido e, a cada
+atualização, lemos apenas os bytes novos, em lotes de `LOTE` linhas
+completas direto do arquivo (o deslocamento avança lote a lote).
+
+Cada lote vira agregados PARCIAIS por (país, semana) e (país, mês): contagem,
+soma, soma dos quadrados, mínimo e máximo de cada medida. Parciais se
+combinam por soma (e min/max), então a memória fica limitada ao lote mais o
+número de células país × período, não ao tamanho do arquivo. As médias dos
+rollups (`dados_AS2_semanal.csv` / `dados_AS2_mensal.csv`) saem dos parciais.
+
+Os parciais de cada gravação vão para arquivos novos (`parciais_<g>.<geração>`)
+e só passam a valer quando `controle.json`, que guarda o deslocamento e a
+geração, é trocado. Uma falha no meio deixa o par anterior intacto, e o
+trecho é relido sem ser somado duas vezes.
+
+Atualização manual (também ocorre ao abrir a página):
+    python -m modulos.america_sul
+"""
+import io
+import json
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from modulos import dados
+
+ARQUIVO_FEED = dados.PASTA_DADOS / "dados_AS2.csv"
+PASTA_ESTADO = dados.PASTA_CACHE / "america_sul"
+CONTROLE = PASTA_ESTADO / "controle.json"
+LOTE = 50_000  # Linhas por lote lido do feed
+
+MEDIDAS = ['latitude', 'longitude', 'temperature_celsius', 'wind_kph', 'pressure_in',
+           'precip_mm', 'humidity', 'cloud', 'feels_like_celsius', 'uv_index']
+
+# Granularidade -> (coluna do período, arquivo do rollup)
+ROLLUPS = {
+    'semanal': ('semana', dados.PASTA_DADOS / "dados_AS2_semanal.csv"),
+    'mensal': ('mes', dados.PASTA_DADOS / "dados_AS2_mensal.csv"),
+}
+
+
+def inicio_periodo(instantes, granularidade):
+    """Semana começando no domingo, ou primeiro dia do mês."""
+    dia = instantes.dt.normalize()
+    if granularidade == 'semanal':
+        return dia - pd.to_timedelta((instantes.dt.weekday + 1) % 7, unit='D')
+    return dia - pd.to_timedelta(instantes.dt.day - 1, unit='D')
+
+
+# --- AGREGADOS PARCIAIS ---
+
+def parciais(lote, granularidade):
+    """Contagem, soma, soma dos quadrados, mínimo e máximo por (país, período)."""
+    periodo = inicio_periodo(pd.to_datetime(lote['last_updated']), granularidade)
+    valores = lote[MEDIDAS].astype('float64')
+    chaves = [lote['country'], periodo.rename('periodo')]
+    g = valores.groupby(chaves)
+    partes = [g.size().rename('n').to_frame(),
+              g.sum().add_suffix('__soma'),
+              (valores ** 2).groupby(chaves).sum().add_suffix('__soma2'),
+              g.min().add_suffix('__min'),
+              g.max().add_suffix('__max')]
+    return pd.concat(partes, axis=1)
+
+
+def combinar(a, b):
+    """Junta dois conjuntos de parciais (associativo e comutativo)."""
+    if a is None or a.empty:
+        return b
+    if b is None or b.empty:
+        return a
+    juntos = pd.concat([a, b])
+    g = juntos.groupby(level=[0, 1])
+    regras = {c: ('min' if c.endswith('__min') else 'max' if c.endswith('__max') else 'sum')
+              for c in juntos.columns}
+    return g.agg(regras)
+
+
+def rollup(parc, granularidade):
+    """Parciais -> tabela no formato dos rollups (médias e `total_registros`)."""
+    col_periodo, _ = ROLLUPS[granularidade]
+    tabela = pd.DataFrame({'total_registros': parc['n'].astype('int64')}, index=parc.index)
+    for m in MEDIDAS:
+        tabela[m] = parc[f'{m}__soma'] / parc['n']
+    tabela = tabela.rename_axis(['country', col_periodo]).reset_index()
+    return tabela.sort_values(['country', col_periodo], ignore_index=True)
+
+
+def desvio(parc, medida):
+    """Desvio-padrão amostral de uma medida por célula, a partir dos parciais."""
+    n, s, s2 = parc['n'], parc[f'{medida}__soma'], parc[f'{medida}__soma2']
+    var = (s2 - s ** 2 / n) / (n - 1)
+    return np.sqrt(var.clip(lower=0)).where(n > 1)
+
+
+# --- ESTADO PERSISTIDO ---
+
+def _caminho_parciais(granularidade, geracao):
+    return PASTA_ESTADO / f"parciais_{granularidade}.{geracao}.parquet"
+
+
+def _ler_estado():
+    controle = json.loads(CONTROLE.read_text()) if CONTROLE.exists() else {}
+    estado = {g: None for g in ROLLUPS}
+    if controle:
+        caminhos = {g: _caminho_parciais(g, controle.get('geracao', 0)) for g in ROLLUPS}
+        if not all(c.exists() for c in caminhos.values()):
+            return {}, estado  # Estado incompleto: recomeça do início do arquivo
+        estado = {g: pd.read_parquet(c) for g, c in caminhos.items()}
+    return controle, estado
+
+
+def _gravar_estado(controle, estado):
+    """Parciais numa geração nova e, por último, o controle que aponta para ela."""
+    PASTA_ESTADO.mkdir(parents=True, exist_ok=True)
+    geracao = controle.get('geracao', 0) + 1
+    for g, parc in estado.items():
+        parc.to_parquet(_caminho_parciais(g, geracao))
+    temporario = CONTROLE.with_suffix('.tmp')
+    temporario.write_text(json.dumps({**controle, 'geracao': geracao}))
+    temporario.replace(CONTROLE)
+    controle['geracao'] = geracao
+    for antigo in PASTA_ESTADO.glob('parciais_*.parquet'):
+        if not antigo.name.endswith(f".{geracao}.parquet"):
+            antigo.unlink(missing_ok=True)
+
+
+# --- CONSUMO DO FEED ---
+
+def _lotes_novos(arquivo, offset, tamanho_lote):
+    """Lotes de linhas ainda não consumidas, com o deslocamento ao fim de cada lote.
+
+    Lê direto do arquivo posicionado em `offset`, `tamanho_lote` linhas por
+    vez, e para na última linha completa (uma linha sendo escrita fica para a
+    próxima atualização). A memória fica limitada ao lote.
+    """
+    with open(arquivo, 'rb') as f:
+        nomes = f.readline().decode().strip().split(',')
+        f.seek(offset)
+        while True:
+            linhas = list(islice(f, tamanho_lote))
+            if linhas and not linhas[-1].endswith(b'\n'):
+                linhas.pop()  # Linha incompleta no fim do arquivo
+            if not linhas:
+                return
+            offset += sum(len(linha) for linha in linhas)
+            yield pd.read_csv(io.BytesIO(b''.join(linhas)), header=None, names=nomes), offset
+
+
+def atualizar(arquivo=ARQUIVO_FEED, tamanho_lote=LOTE, gravar_rollups=False):
+    """Consome as observações novas e devolve os parciais atualizados.
+
+    Retorna (parciais por granularidade, linhas novas consumidas). Com
+    `gravar_rollups`, também regrava os CSVs de rollup em `dataframe/`.
+    """
+    controle, estado = _ler_estado()
+    with open(arquivo, 'rb') as f:
+        cabecalho = f.readline()
+    if controle.get('cabecalho') != cabecalho.decode() or controle.get('offset', 0) > arquivo.stat().st_size:
+        # Arquivo novo ou truncado: recomeça (a geração continua, para não sobrescrever a vigente)
+        controle = {'cabecalho': cabecalho.decode(), 'offset': len(cabecalho), 'geracao': controle.get('geracao', 0)}
+        estado = {g: None for g in ROLLUPS}
+
+    linhas = 0
+    for lote, offset in _lotes_novos(arquivo, controle['offset'], tamanho_lote):
+        linhas += len(lote)
+        for g in ROLLUPS:
+            estado[g] = combinar(estado[g], parciais(lote, g))
+        controle['offset'] = offset
+
+    if linhas:
+        try:
+            _gravar_estado(controle, estado)
+            if gravar_rollups:
+                exportar(estado)
+        except OSError:
+            pass  # Sem permissão de escrita: segue só em memória
+    return estado, linhas
+
+
+def exportar(estado):
+    """Regrava os CSVs de rollup no mesmo formato dos arquivos originais."""
+    for g, (col_periodo, caminho) in ROLLUPS.items():
+        tabela = rollup(estado[g], g)
+        tabela[col_periodo] = tabela[col_periodo].dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+        temporario = caminho.with_suffix('.tmp')
+        tabela.to_csv(temporario, index=False)
+        temporario.replace(caminho)
+
+
+if __name__ == "__main__":
+    _, n = atualizar(gravar_rollups=True)
+    print(f"{n} observação(ões) nova(s) consumida(s).")
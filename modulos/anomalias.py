@@ -0,0 +1,75 @@
+"""Pontuação de anomalias pré-calculada para todos os estados.
+
+Um IsolationForest é ajustado por estado, uma única vez, e guardamos a
+pontuação contínua de cada semana (não só o rótulo ±1). A contaminação não
+altera as árvores, apenas o limiar: marcar as `c`% semanas mais anômalas de
+um estado é o mesmo que `fit_predict(contamination=c)`, sem reajustar nada.
+
+Pré-cálculo manual (opcional, também ocorre no primeiro acesso):
+    python -m modulos.anomalias
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modulos import dados, instrumentacao, registro
+
+FEATURES = ['temperatura_media', 'chuva_media_semanal', 'umidade_media', 'vento_medio']
+PARAMETROS = {'random_state': 42}
+
+
+def _pontuar_estado(X):
+    from sklearn.ensemble import IsolationForest  # Import tardio: só quando há ajuste de fato
+
+    iso = IsolationForest(**PARAMETROS).fit(X)
+    # Sinal invertido: quanto MAIOR, mais anômala a semana
+    return -iso.score_samples(X)
+
+
+def calcular_pontuacoes(df):
+    """Ajusta um modelo por estado (em paralelo) e devolve a tabela compacta de pontuações."""
+    from joblib import Parallel, delayed
+
+    # Tabela ordenada por estado: cada grupo é uma fatia contígua (sem groupby nem cópia)
+    grupos = [df.iloc[linhas] for linhas in dados.blocos(df, 'state').values()]
+    pontos = Parallel(n_jobs=-1)(delayed(_pontuar_estado)(g[FEATURES].to_numpy()) for g in grupos)
+    tabela = pd.DataFrame({
+        'state': pd.concat([g['state'] for g in grupos]).to_numpy(),
+        'semana_ref': pd.concat([g['semana_ref'] for g in grupos]).to_numpy(),
+        'pontuacao': np.concatenate(pontos).astype('float32'),
+    })
+    tabela['state'] = tabela['state'].astype('category')
+    return tabela
+
+
+@instrumentacao.em_cache('anomalias.pontuacoes', st.cache_resource, show_spinner=False)
+def pontuacoes():
+    """Pontuação de todas as semanas de todos os estados (persistida no registro)."""
+    df = dados.carregar_completos('semanal')
+    base = df[['state', 'semana_ref'] + FEATURES]
+    return registro.obter_ou_ajustar('IsolationForest_por_estado', PARAMETROS, FEATURES, base,
+                                     lambda: calcular_pontuacoes(base))
+
+
+@st.cache_resource(show_spinner=False)
+def _indice_pontuacoes():
+    return dados.blocos(pontuacoes(), 'state')
+
+
+def marcar(contaminacao, estados=None):
+    """Pontuações com a coluna `anomalia` (-1/1) para a contaminação pedida.
+
+    O limiar é o quantil (1 - contaminação) da pontuação de cada estado.
+    """
+    tabela = pontuacoes()
+    if estados is not None:
+        indice = _indice_pontuacoes()
+        tabela = pd.concat([tabela.iloc[indice[str(e)]] for e in estados if str(e) in indice]
+                           or [tabela.iloc[:0]])
+    limiar = tabela.groupby('state', observed=True)['pontuacao'].transform(
+        lambda s: np.quantile(s.to_numpy(dtype='float64'), 1 - contaminacao))
+    return tabela.assign(anomalia=np.where(tabela['pontuacao'] > limiar, -1, 1))
+
+
+if __name__ == "__main__":
+    pontuacoes()
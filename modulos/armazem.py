@@ -0,0 +1,268 @@
+"""Armazém analítico embutido: as tabelas de `dados` num banco local consultável.
+
+Cada granularidade vira uma tabela ordenada por (região, estado, data), a
+mesma ordem das tabelas de `dados`, num arquivo em `PASTA_CACHE`: DuckDB, se
+instalado, ou SQLite (biblioteca padrão) com índices em (state, data) e
+(region, ano). As páginas pedem só as colunas e linhas de
+que precisam (`consultar`), e o filtro roda dentro do banco em vez de uma
+máscara booleana sobre a tabela inteira seguida de cópia.
+
+Os resultados ficam num cache LRU do processo com chave no texto da consulta
+mais os parâmetros; a tabela é reconstruída (e o cache descartado) quando a
+origem em `dados` muda. A reconstrução grava numa tabela temporária e a troca
+pela vigente numa única transação, então réplicas que compartilham o arquivo
+nunca leem uma tabela pela metade.
+"""
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+from modulos import dados, instrumentacao
+
+try:
+    import duckdb
+except ImportError:  # Sem DuckDB: SQLite com índices
+    duckdb = None
+
+VERSAO = 2  # Incrementar se o formato das tabelas mudar
+MOTOR = 'duckdb' if duckdb is not None else 'sqlite'
+ARQUIVO = dados.PASTA_CACHE / f"armazem.v{VERSAO}.{MOTOR}"
+
+LIMITE_RESULTADOS = 128  # Consultas mantidas no cache
+LIMITE_BYTES = 256 * 1024 ** 2
+LINHAS_POR_LOTE = 50_000  # Inserção em lotes na construção (SQLite)
+
+_resultados = OrderedDict()  # (sql, parâmetros) -> DataFrame
+_bytes = 0
+_prontas = {}  # granularidade -> (instante da origem, tipos das colunas)
+_trava = threading.Lock()
+_construcoes = {}  # granularidade -> trava da reconstrução
+_local = threading.local()
+
+
+# --- CONEXÃO E CONSTRUÇÃO ---
+
+def _conexao():
+    """Uma conexão por thread (as sessões do Streamlit rodam em threads próprias)."""
+    con = getattr(_local, 'con', None)
+    if con is None:
+        dados.PASTA_CACHE.mkdir(parents=True, exist_ok=True)
+        if duckdb is not None:
+            con = duckdb.connect(str(ARQUIVO))
+        else:
+            con = sqlite3.connect(ARQUIVO, check_same_thread=False, timeout=60)
+            con.execute("PRAGMA journal_mode=WAL")
+        _local.con = con
+    return con
+
+
+def _executar(sql, parametros=()):
+    con = _conexao()
+    if duckdb is not None:
+        return con.execute(sql, list(parametros)).df()
+    return pd.read_sql_query(sql, con, params=list(parametros))
+
+
+def _para_banco(df, granularidade):
+    """Datas viram dias desde 1970 (inteiros) e categorias viram texto."""
+    col_data = dados.TABELAS[granularidade]["data"]
+    saida = df.sort_values(['region', 'state', col_data], kind='stable').reset_index(drop=True)
+    saida[col_data] = saida[col_data].to_numpy().astype('datetime64[D]').astype('int64')
+    for col in saida.columns:
+        if isinstance(saida[col].dtype, pd.CategoricalDtype):
+            saida[col] = saida[col].astype(str)
+    return saida
+
+
+def _construir(con, granularidade, df, modificado):
+    """Monta a tabela com nome temporário (único por construção) e troca pela vigente."""
+    col_data = dados.TABELAS[granularidade]["data"]
+    tabela = _para_banco(df, granularidade)
+    nova = f"{granularidade}__{uuid.uuid4().hex}"
+    if duckdb is not None:
+        con.register('origem', tabela)
+        con.execute(f"CREATE TABLE {nova} AS SELECT * FROM origem")
+        con.unregister('origem')
+    else:
+        tabela.to_sql(nova, con, index=False, chunksize=LINHAS_POR_LOTE)
+        con.execute(f"CREATE INDEX idx_{nova}_estado ON {nova} (state, {col_data})")
+        con.execute(f"CREATE INDEX idx_{nova}_regiao ON {nova} (region, ano)")
+        con.execute(f"ANALYZE {nova}")
+        con.commit()
+
+    # Troca atômica; se outra réplica já trocou pela mesma origem, descarta a nossa
+    con.execute("CREATE TABLE IF NOT EXISTS _origem (tabela TEXT PRIMARY KEY, modificado DOUBLE)")
+    con.execute("BEGIN TRANSACTION" if duckdb is not None else "BEGIN IMMEDIATE")
+    try:
+        gravado = con.execute("SELECT modificado FROM _origem WHERE tabela = ?", [granularidade]).fetchone()
+        if gravado is not None and gravado[0] == modificado:
+            con.execute(f"DROP TABLE {nova}")
+        else:
+            con.execute(f"DROP TABLE IF EXISTS {granularidade}")
+            con.execute(f"ALTER TABLE {nova} RENAME TO {granularidade}")
+            con.execute("DELETE FROM _origem WHERE tabela = ?", [granularidade])
+            con.execute("INSERT INTO _origem VALUES (?, ?)", [granularidade, modificado])
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def preparar(granularidade):
+    """Garante a tabela da granularidade no banco, atualizada em relação à origem.
+
+    A reconstrução lê a origem de novo (`dados._ler_tabela`), e não a tabela em
+    cache do processo, que pode ser anterior à alteração; o instante gravado em
+    `_origem` é o medido ANTES dessa leitura, então uma alteração durante a
+    construção provoca outra na próxima chamada.
+    """
+    global _bytes
+    if granularidade not in dados.TABELAS:
+        raise ValueError(f"Granularidade desconhecida: {granularidade}")
+    modificado = dados.modificado_em(granularidade)
+    pronta = _prontas.get(granularidade)
+    if pronta is not None and pronta[0] == modificado:
+        return pronta[1]
+
+    # Trava só desta granularidade: consultas em cache das outras sessões seguem livres
+    with _trava:
+        trava_construcao = _construcoes.setdefault(granularidade, threading.Lock())
+    with trava_construcao:
+        pronta = _prontas.get(granularidade)
+        if pronta is not None and pronta[0] == modificado:
+            return pronta[1]
+        con = _conexao()
+        try:
+            gravado = con.execute("SELECT modificado FROM _origem WHERE tabela = ?", [granularidade]).fetchone()
+        except Exception:  # Banco novo, sem a tabela de controle
+            gravado = None
+        if gravado is None or gravado[0] != modificado:
+            df = dados._ler_tabela(granularidade)
+            with instrumentacao.medir('armazem.construir', detalhe=granularidade, linhas=len(df)):
+                _construir(con, granularidade, df, modificado)
+        else:
+            df = dados.carregar(granularidade)  # Só os tipos das colunas
+        with _trava:
+            # Consultas antigas desta granularidade ficam inválidas
+            for chave in [c for c in _resultados if c[0] == granularidade]:
+                _bytes -= _resultados.pop(chave).memory_usage(index=False).sum()
+            _prontas[granularidade] = (modificado, df.dtypes.to_dict())
+        return _prontas[granularidade][1]
+
+
+# --- CONSULTA ---
+
+def _do_banco(df, granularidade, tipos):
+    col_data = dados.TABELAS[granularidade]["data"]
+    if col_data in df:
+        df[col_data] = df[col_data].to_numpy().astype('int64').astype('datetime64[D]')
+    return df.astype({c: tipos[c] for c in df.columns if c in tipos})
+
+
+def _sql(granularidade, colunas, regioes, estados, anos, completos, distintos, limite):
+    esquema = dados.TABELAS[granularidade]
+    condicoes, parametros = [], []
+    for coluna, valores in (('region', regioes), ('state', estados)):
+        if valores is not None:
+            valores = [str(v) for v in valores]
+            condicoes.append(f"{coluna} IN ({', '.join('?' * len(valores))})" if valores else "1 = 0")
+            parametros += valores
+    if anos is not None:
+        condicoes.append("ano BETWEEN ? AND ?")
+        parametros += [int(anos[0]), int(anos[1])]
+    if completos:
+        condicoes += [f"{m} IS NOT NULL" for m in esquema["medidas"]]
+
+    sql = f"SELECT {'DISTINCT ' if distintos else ''}{', '.join(colunas)} FROM {granularidade}"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    ordem = colunas if distintos else [c for c in ('region', 'state', esquema["data"]) if c in colunas]
+    if ordem:
+        sql += " ORDER BY " + ", ".join(ordem)
+    if limite is not None:
+        sql += " LIMIT ?"
+        parametros.append(int(limite))
+    return sql, tuple(parametros)
+
+
+def _em_cache(granularidade, sql, parametros, converter):
+    """Resultado da consulta pelo cache LRU (chave: texto + parâmetros) ou pelo banco."""
+    global _bytes
+    chave = (granularidade, sql, parametros)
+    inicio = time.perf_counter()
+    with _trava:
+        resultado = _resultados.get(chave)
+        if resultado is not None:
+            _resultados.move_to_end(chave)
+    em_cache = resultado is not None
+    if not em_cache:
+        resultado = converter(_executar(sql, parametros))
+        with _trava:
+            _resultados[chave] = resultado
+            _bytes += resultado.memory_usage(index=False).sum()
+            while len(_resultados) > LIMITE_RESULTADOS or (_bytes > LIMITE_BYTES and len(_resultados) > 1):
+                _, antigo = _resultados.popitem(last=False)
+                _bytes -= antigo.memory_usage(index=False).sum()
+    instrumentacao.registrar('armazem.consultar', (time.perf_counter() - inicio) * 1000, detalhe=granularidade,
+                             linhas=len(resultado), cache='acerto' if em_cache else 'falta')
+    return resultado.copy(deep=False)
+
+
+def colunas(granularidade):
+    """Colunas da tabela da granularidade (sem carregar linhas)."""
+    return list(preparar(granularidade))
+
+
+def consultar(granularidade, colunas=None, regioes=None, estados=None, anos=None, completos=False,
+              distintos=False, limite=None):
+    """Linhas de `granularidade` filtradas no banco, só com as `colunas` pedidas.
+
+    `regioes`/`estados` são listas de siglas (lista vazia = nenhuma linha),
+    `anos` é uma faixa (início, fim) inclusiva, `completos` descarta linhas com
+    lacuna em alguma medida (como `dados.carregar_completos`), `distintos`
+    devolve combinações únicas das colunas e `limite` corta o número de
+    linhas. O resultado tem os mesmos tipos da tabela de `dados` e é uma
+    visão: alterações na página não chegam ao cache.
+    """
+    tipos = preparar(granularidade)
+    colunas = list(tipos) if colunas is None else list(colunas)
+    desconhecidas = [c for c in colunas if c not in tipos]
+    if desconhecidas:
+        raise ValueError(f"Colunas inexistentes em {granularidade}: {desconhecidas}")
+
+    sql, parametros = _sql(granularidade, colunas, regioes, estados, anos, completos, distintos, limite)
+    return _em_cache(granularidade, sql, parametros, lambda df: _do_banco(df, granularidade, tipos))
+
+
+def valores(granularidade, coluna, **filtros):
+    """Valores distintos e ordenados de uma coluna, com os mesmos filtros de `consultar`."""
+    return consultar(granularidade, [coluna], distintos=True, **filtros)[coluna].astype(str).tolist()
+
+
+def faixas(granularidade, colunas):
+    """{coluna: (mínimo, máximo)} calculados no banco, sem trazer as linhas."""
+    tipos = preparar(granularidade)
+    desconhecidas = [c for c in colunas if c not in tipos]
+    if desconhecidas:
+        raise ValueError(f"Colunas inexistentes em {granularidade}: {desconhecidas}")
+    partes = [f"MIN({c}) AS {c}__min, MAX({c}) AS {c}__max" for c in colunas]
+    tabela = _em_cache(granularidade, f"SELECT {', '.join(partes)} FROM {granularidade}", (), lambda df: df)
+    return {c: (float(tabela[f'{c}__min'].iloc[0]), float(tabela[f'{c}__max'].iloc[0])) for c in colunas}
+
+
+def estatisticas():
+    """Motor, consultas e memória do cache de resultados (página de diagnóstico)."""
+    with _trava:
+        return {'motor': MOTOR, 'consultas_em_cache': len(_resultados), 'mb_em_cache': _bytes / 1024 ** 2}
+
+
+if __name__ == "__main__":
+    for g in dados.TABELAS:
+        if dados.origem(g).exists():
+            inicio = time.perf_counter()
+            preparar(g)
+            print(f"{g}: pronta em {time.perf_counter() - inicio:.1f}s ({MOTOR}, {ARQUIVO})")
@@ -0,0 +1,371 @@
+"""Assistente técnico: conversas com o modelo, streaming e cache semântico de respostas.
+
+Dois backends com a mesma interface (`Conversa`: `enviar`, `registrar`, `vetor`):
+
+- Gemini (`gemini-2.5-flash`), quando há `GEMINI_KEY`;
+- local, sem rede: responde com o trecho da documentação mais parecido com a
+  pergunta. Serve para desenvolver e testar a página offline
+  (`CLIMA_ASSISTENTE=local` força o uso mesmo com chave).
+
+As respostas ficam num cache do processo, compartilhado entre sessões, com
+chave (impressão digital de backend + contexto, pergunta normalizada). Uma
+pergunta nova é comparada também por similaridade de embedding com as já
+respondidas (cosseno >= `LIMIAR_SIMILARIDADE`). Entradas expiram após
+`VALIDADE_S` e, acima de `LIMITE_ENTRADAS`, saem as usadas há mais tempo (LRU).
+Perguntas muito curtas ("e o segundo?") dependem da conversa e não usam o cache.
+Perguntas sobre os dados (valores, rankings, comparações) são respondidas
+por `modulos.consultas`, sem passar pelo modelo nem pelo cache.
+
+Cada turno envia o contexto (instrução de sistema, fixa por processo), um
+resumo das trocas antigas e só as últimas trocas completas: o custo por turno
+fica limitado, não cresce com a sessão. Tokens e latência de cada turno ficam
+em `Conversa.metricas` e na instrumentação (`assistente.turno`).
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+from modulos import instrumentacao
+
+MODELO_GEMINI = 'gemini-2.5-flash'
+MODELO_EMBEDDING = 'models/text-embedding-004'
+
+LIMITE_ENTRADAS = 512
+VALIDADE_S = 7 * 24 * 3600
+LIMIAR_SIMILARIDADE = 0.92
+MIN_PALAVRAS = 3  # Abaixo disso a pergunta quase sempre depende do histórico
+
+DIMENSAO_LOCAL = 1024  # Embedding local: trigramas de caracteres com hashing
+ATRASO_LOCAL_S = 0.01  # Intervalo entre palavras no streaming do backend local
+LIMITE_RESUMO = 1500  # Caracteres do resumo das trocas que saíram da janela
+MAX_RODADAS_FERRAMENTAS = 3  # Rodadas de consultas aos dados por pergunta (Gemini)
+
+_respostas = OrderedDict()  # (impressão, pergunta normalizada) -> entrada
+_trava = threading.Lock()
+_contagem = {'exato': 0, 'semantico': 0, 'falta': 0}
+
+
+# --- TEXTO E EMBEDDINGS ---
+
+def normalizar(texto):
+    """Minúsculas, sem acentos, pontuação ou espaços repetidos."""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(re.sub(r'[^\w\s]', ' ', texto).split())
+
+
+def impressao(*partes):
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        h.update(parte.encode())
+    return h.hexdigest()
+
+
+def vetor_local(texto):
+    """Vetor unitário de trigramas de caracteres (hashing), sem dependências externas."""
+    v = np.zeros(DIMENSAO_LOCAL, dtype='float32')
+    for palavra in normalizar(texto).split():
+        palavra = f" {palavra} "
+        for i in range(len(palavra) - 2):
+            v[int(hashlib.md5(palavra[i:i + 3].encode()).hexdigest()[:8], 16) % DIMENSAO_LOCAL] += 1
+    norma = np.linalg.norm(v)
+    return v / norma if norma else v
+
+
+# --- CONVERSA (JANELA + RESUMO) ---
+
+def estimar_tokens(texto):
+    """Aproximação de ~4 caracteres por token (quando o backend não informa o uso)."""
+    return max(1, len(texto) // 4)
+
+
+def _texto(mensagens):
+    return '\n'.join(p for m in mensagens for p in m['parts'])
+
+
+class Conversa:
+    """Histórico limitado: o contexto vai como instrução de sistema, seguido do
+    resumo das trocas antigas e das últimas `JANELA_TURNOS` trocas completas.
+
+    Quando a janela estoura em `LOTE_RESUMO` trocas, as mais antigas são
+    condensadas no resumo de uma vez (uma chamada a cada lote, não a cada turno).
+    Subclasses implementam `_gerar`, `_resumir` e `vetor`.
+    """
+    JANELA_TURNOS = 6
+    LOTE_RESUMO = 4
+
+    def __init__(self, contexto):
+        self.contexto = contexto
+        self.turnos = []  # (pergunta, resposta) dentro da janela
+        self.resumo = ''
+        self.metricas = []  # Uma linha por turno
+
+    def mensagens(self, pergunta):
+        mensagens = []
+        if self.resumo:
+            mensagens += [{'role': 'user', 'parts': [f"Resumo da conversa até aqui:\n{self.resumo}"]},
+                          {'role': 'model', 'parts': ["Certo, considerarei esse resumo."]}]
+        for p, r in self.turnos:
+            mensagens += [{'role': 'user', 'parts': [p]}, {'role': 'model', 'parts': [r]}]
+        return mensagens + [{'role': 'user', 'parts': [pergunta]}]
+
+    def enviar(self, pergunta):
+        """Gera a resposta pedaço a pedaço; ao fim, registra a troca e as métricas do turno."""
+        mensagens = self.mensagens(pergunta)
+        uso, pedacos, primeiro_ms = {}, [], None
+        inicio = time.perf_counter()
+        for pedaco in self._gerar(mensagens, uso):
+            if primeiro_ms is None:
+                primeiro_ms = (time.perf_counter() - inicio) * 1000
+            pedacos.append(pedaco)
+            yield pedaco
+        resposta = ''.join(pedacos)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        self.registrar(pergunta, resposta, origem='modelo', ms=total_ms, primeiro_ms=primeiro_ms,
+                       mensagens=len(mensagens),
+                       tokens_entrada=uso.get('entrada', estimar_tokens(self.contexto + _texto(mensagens))),
+                       tokens_saida=uso.get('saida', estimar_tokens(resposta)),
+                       tokens_cache=uso.get('cache'), consultas=uso.get('consultas'))
+
+    def registrar(self, pergunta, resposta, origem, ms=0.0, **metricas):
+        """Acrescenta a troca à janela (compactando se preciso) e a linha de métricas."""
+        self.turnos.append((pergunta, resposta))
+        resumo_ms = None
+        if len(self.turnos) >= self.JANELA_TURNOS + self.LOTE_RESUMO:
+            antigos, self.turnos = self.turnos[:self.LOTE_RESUMO], self.turnos[self.LOTE_RESUMO:]
+            inicio = time.perf_counter()
+            self.resumo = self._resumir(self.resumo, antigos)
+            resumo_ms = (time.perf_counter() - inicio) * 1000
+        linha = {'turno': len(self.metricas) + 1, 'origem': origem, 'ms': round(ms, 1),
+                 **{k: round(v, 1) if isinstance(v, float) else v for k, v in metricas.items()},
+                 'resumo_ms': resumo_ms and round(resumo_ms, 1), 'janela': len(self.turnos)}
+        self.metricas.append(linha)
+        instrumentacao.registrar('assistente.turno', ms, detalhe=origem,
+                                 tokens_entrada=metricas.get('tokens_entrada'), tokens_saida=metricas.get('tokens_saida'))
+        if resumo_ms is not None:
+            instrumentacao.registrar('assistente.resumo', resumo_ms, detalhe=self.nome)
+
+    def _resumir(self, resumo, turnos):
+        """Resumo extrativo: a pergunta e o começo da resposta de cada troca."""
+        linhas = [resumo] if resumo else []
+        for p, r in turnos:
+            linhas.append(f"- Usuário perguntou: {' '.join(p.split())[:200]} | Resposta: {' '.join(r.split())[:240]}")
+        return '\n'.join(linhas)[-LIMITE_RESUMO:]
+
+
+class ConversaLocal(Conversa):
+    """Modelo de mentira: devolve a seção da documentação mais próxima da pergunta."""
+    nome = 'local'
+    espaco = 'local'
+
+    def __init__(self, contexto):
+        super().__init__(contexto)
+        secoes = re.split(r'\n(?=\d+\. )', contexto)
+        self._secoes = [s.strip() for s in secoes if re.match(r'\d+\. ', s)]
+        self._vetores = np.array([vetor_local(s) for s in self._secoes]) if self._secoes else None
+
+    def vetor(self, texto):
+        return vetor_local(texto)
+
+    def _resposta(self, pergunta):
+        if self._vetores is None:
+            return "Entendido. Atuarei como o especialista técnico do projeto."
+        similaridade = self._vetores @ vetor_local(pergunta)
+        melhor = int(similaridade.argmax())
+        if similaridade[melhor] < 0.15:
+            return ("Eu sou focado na metodologia do projeto. Para explorar os dados brutos, "
+                    "por favor utilize a aba 'Dashboard Interativo' ou 'Mapa'.")
+        return f"Segundo a documentação técnica do projeto:\n\n{self._secoes[melhor]}"
+
+    def _gerar(self, mensagens, uso):
+        for palavra in re.split(r'(?<=\s)', self._resposta(mensagens[-1]['parts'][0])):
+            time.sleep(ATRASO_LOCAL_S)
+            yield palavra
+
+
+_modelos = {}  # Impressão do contexto -> GenerativeModel com a instrução de sistema
+
+
+def _modelo_gemini(contexto):
+    """Um modelo por contexto e processo: a documentação vira instrução de sistema, não uma troca do histórico."""
+    import google.generativeai as genai
+
+    chave = impressao(contexto)
+    with _trava:
+        if chave not in _modelos:
+            from modulos import consultas
+            _modelos[chave] = genai.GenerativeModel(MODELO_GEMINI, system_instruction=contexto,
+                                                    tools=consultas.declaracoes())
+        return _modelos[chave]
+
+
+class ConversaGemini(Conversa):
+    """Gemini com o contexto fixo como prefixo (elegível ao cache implícito de prefixo da API)."""
+    nome = MODELO_GEMINI
+    espaco = MODELO_EMBEDDING
+
+    def __init__(self, contexto, api_key):
+        import google.generativeai as genai
+
+        super().__init__(contexto)
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self._modelo = _modelo_gemini(contexto)
+
+    def vetor(self, texto):
+        try:
+            v = np.asarray(self._genai.embed_content(model=MODELO_EMBEDDING, content=texto,
+                                                     task_type='retrieval_query')['embedding'], dtype='float32')
+        except Exception:  # Sem embedding remoto: a busca semântica simplesmente não acha nada
+            return None
+        return v / np.linalg.norm(v)
+
+    def _gerar(self, mensagens, uso):
+        """Transmite o texto; chamadas de ferramenta rodam a consulta local e voltam ao modelo."""
+        from modulos import consultas
+
+        for _ in range(MAX_RODADAS_FERRAMENTAS + 1):
+            resposta = self._modelo.generate_content(mensagens, stream=True)
+            chamadas = []
+            for parte in resposta:
+                for p in parte.parts:
+                    if p.function_call.name:
+                        chamadas.append(p)
+                    elif p.text:
+                        yield p.text
+            meta = getattr(resposta, 'usage_metadata', None)
+            if meta is not None:
+                uso['entrada'] = uso.get('entrada', 0) + meta.prompt_token_count
+                uso['saida'] = uso.get('saida', 0) + meta.candidates_token_count
+                uso['cache'] = (uso.get('cache') or 0) + (getattr(meta, 'cached_content_token_count', 0) or 0) or None
+            if not chamadas:
+                return
+            uso['consultas'] = uso.get('consultas', 0) + len(chamadas)
+            retornos = [self._genai.protos.Part(function_response=self._genai.protos.FunctionResponse(
+                name=c.function_call.name, response=consultas.executar(c.function_call.name, dict(c.function_call.args))))
+                for c in chamadas]
+            mensagens = [*mensagens, {'role': 'model', 'parts': chamadas}, {'role': 'user', 'parts': retornos}]
+
+    def _resumir(self, resumo, turnos):
+        trocas = '\n'.join(f"Usuário: {p}\nAssistente: {r}" for p, r in turnos)
+        pedido = (f"Resumo anterior:\n{resumo or '(vazio)'}\n\nNovas trocas:\n{trocas}\n\n"
+                  f"Atualize o resumo em tópicos curtos, com no máximo {LIMITE_RESUMO // 5} palavras, "
+                  "mantendo perguntas feitas, conclusões e preferências do usuário.")
+        try:
+            return self._modelo.generate_content(pedido).text.strip()[-LIMITE_RESUMO:]
+        except Exception:  # Sem o modelo, o resumo extrativo ainda limita o histórico
+            return super()._resumir(resumo, turnos)
+
+
+def iniciar(contexto, api_key=None):
+    """Conversa nova: Gemini se houver chave (e `CLIMA_ASSISTENTE` não for 'local'), senão a local."""
+    if api_key and os.environ.get('CLIMA_ASSISTENTE', 'gemini') != 'local':
+        return ConversaGemini(contexto, api_key)
+    return ConversaLocal(contexto)
+
+
+# --- CACHE DE RESPOSTAS ---
+
+def _expirar(agora):
+    for chave in [c for c, e in _respostas.items() if agora - e['criada'] > VALIDADE_S]:
+        del _respostas[chave]
+
+
+def buscar(chave_contexto, pergunta, vetor=None, espaco=None, contar_falta=True):
+    """(resposta, 'exato' | 'semantico') do cache, ou (None, 'falta').
+
+    `contar_falta=False` na busca só exata que precede a semântica: a falta é
+    contada uma vez, na segunda busca.
+    """
+    chave = (chave_contexto, normalizar(pergunta))
+    with _trava:
+        _expirar(time.time())
+        entrada = _respostas.get(chave)
+        tipo = 'exato'
+        if entrada is None and vetor is not None:
+            candidatas = [(c, e) for c, e in _respostas.items()
+                          if c[0] == chave_contexto and e['espaco'] == espaco and e['vetor'] is not None]
+            if candidatas:
+                similaridade = np.array([e['vetor'] for _, e in candidatas]) @ vetor
+                melhor = int(similaridade.argmax())
+                if similaridade[melhor] >= LIMIAR_SIMILARIDADE:
+                    chave, entrada = candidatas[melhor]
+                    tipo = 'semantico'
+        if entrada is None:
+            _contagem['falta'] += contar_falta
+            return None, 'falta'
+        _respostas.move_to_end(chave)
+        entrada['usos'] += 1
+        _contagem[tipo] += 1
+        return entrada['resposta'], tipo
+
+
+def guardar(chave_contexto, pergunta, resposta, vetor=None, espaco=None):
+    with _trava:
+        _respostas[(chave_contexto, normalizar(pergunta))] = {
+            'resposta': resposta, 'vetor': vetor, 'espaco': espaco, 'criada': time.time(), 'usos': 0}
+        while len(_respostas) > LIMITE_ENTRADAS:
+            _respostas.popitem(last=False)
+
+
+def estatisticas():
+    """Entradas no cache e acertos (exatos e semânticos) e faltas desde o início do processo."""
+    with _trava:
+        return {'entradas': len(_respostas), **_contagem}
+
+
+def limpar():
+    with _trava:
+        _respostas.clear()
+
+
+# --- RESPOSTA ---
+
+def responder(conversa, contexto, pergunta):
+    """(texto ou gerador de pedaços, origem). Origem: 'consulta', 'exato', 'semantico' ou 'modelo'.
+
+    Perguntas sobre os dados que o roteador reconhece são respondidas pela
+    consulta local, sem chamar o modelo. Nas demais, em caso de falta no cache,
+    o gerador transmite a resposta do modelo pedaço a pedaço e a guarda no
+    cache ao terminar (exceto se o modelo consultou dados: "temperatura em SP"
+    e "temperatura em SE" são parecidas demais para a busca semântica).
+    """
+    from modulos import consultas
+
+    pedido = consultas.interpretar(pergunta)
+    if pedido is not None:
+        inicio = time.perf_counter()
+        saida = consultas.executar(*pedido)
+        if 'texto' in saida:
+            conversa.registrar(pergunta, saida['texto'], origem='consulta', consultas=1,
+                               ms=(time.perf_counter() - inicio) * 1000)
+            return saida['texto'], 'consulta'
+
+    chave_contexto = impressao(conversa.nome, contexto)
+    usar_cache = len(normalizar(pergunta).split()) >= MIN_PALAVRAS and pedido is None
+    vetor = None
+    if usar_cache:
+        resposta, tipo = buscar(chave_contexto, pergunta, contar_falta=False)
+        if resposta is None:
+            vetor = conversa.vetor(pergunta)
+            resposta, tipo = buscar(chave_contexto, pergunta, vetor, conversa.espaco)
+        if resposta is not None:
+            conversa.registrar(pergunta, resposta, origem=tipo)
+            return resposta, tipo
+
+    def transmitir():
+        pedacos = []
+        for pedaco in conversa.enviar(pergunta):
+            pedacos.append(pedaco)
+            yield pedaco
+        resposta = ''.join(pedacos)
+        if usar_cache and resposta.strip() and not conversa.metricas[-1].get('consultas'):
+            guardar(chave_contexto, pergunta, resposta, vetor, conversa.espaco)
+
+    return transmitir(), 'modelo'
@@ -0,0 +1,119 @@
+"""Backtesting com origem móvel (rolling-origin) para o modelo de previsão.
+
+Para cada origem (corte) o modelo é treinado com tudo o que veio antes e
+avaliado nas `horizonte` semanas seguintes, em todos os estados de uma vez.
+As equações normais (X'X e X'y) são acumuladas de forma incremental entre um
+corte e o próximo, então nenhuma dobra refaz o ajuste do zero. Os blocos de
+cada dobra são processados em paralelo (threads; o NumPy libera o GIL).
+
+A distribuição dos erros (horizonte × origem × estado) é gravada em disco e
+vira intervalos de previsão empíricos sem nenhum novo ajuste.
+"""
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modulos import dados, instrumentacao, previsao
+
+TREINO_MINIMO = 104  # Duas temporadas completas antes da primeira origem
+PASSO = 4  # Semanas entre origens consecutivas
+HORIZONTE = previsao.HORIZONTE_PADRAO
+
+
+def _caminho(variavel):
+    return dados.PASTA_CACHE / f"backtest_{variavel}.npz"
+
+
+def _design(datas):
+    """Mesma matriz do motor de previsão, com a tendência em anos (melhor condicionada)."""
+    X = previsao.matriz_design(datas, int(previsao.ordinal(datas[:1])[0]))
+    X[:, 0] /= 365.25
+    return X
+
+
+def _incremento(X, Y, M, ini, fim):
+    """Contribuição das linhas [ini, fim) para X'X e X'y de cada série."""
+    Xb, Mb = X[ini:fim], M[ini:fim].astype('float64')
+    Yb = np.where(M[ini:fim], Y[ini:fim], 0.0)
+    return (np.einsum('ij,ia,ib->jab', Mb, Xb, Xb, optimize=True),
+            np.einsum('ij,ia->ja', Yb, Xb, optimize=True))
+
+
+def calcular_erros(variavel, horizonte=HORIZONTE, passo=PASSO, treino_minimo=TREINO_MINIMO, tabela=None):
+    """Erros (real - previsto) de todas as origens, horizontes e estados.
+
+    `tabela` (semanas × estados) substitui a série compartilhada, ex.: em benchmarks.
+    """
+    if tabela is None:
+        tabela = previsao.series(variavel)
+    datas = tabela.index
+    Y = tabela.to_numpy(dtype='float64')
+    M = ~np.isnan(Y)
+    X = _design(datas)
+    n = len(datas)
+
+    cortes = np.arange(treino_minimo, n, passo)
+    limites = np.concatenate([[0], cortes])
+
+    # 1. Incrementos das equações normais entre cortes consecutivos, em paralelo
+    with ThreadPoolExecutor() as pool:
+        partes = list(pool.map(lambda b: _incremento(X, Y, M, limites[b], limites[b + 1]),
+                               range(len(cortes))))
+    XtX = np.cumsum([p[0] for p in partes], axis=0)  # (dobras, estados, p, p)
+    Xty = np.cumsum([p[1] for p in partes], axis=0)  # (dobras, estados, p)
+
+    # 2. Coeficientes de todas as dobras e estados numa única chamada
+    coef = np.einsum('fsab,fsb->fsa', np.linalg.pinv(XtX), Xty)
+
+    # 3. Previsões e erros nas janelas após cada corte
+    erros = np.full((horizonte, len(cortes), Y.shape[1]), np.nan)
+
+    def _dobra(f):
+        c = cortes[f]
+        janela = slice(c, min(c + horizonte, n))
+        pred = X[janela] @ coef[f].T
+        erros[:pred.shape[0], f] = Y[janela] - pred
+
+    with ThreadPoolExecutor() as pool:
+        list(pool.map(_dobra, range(len(cortes))))
+
+    return {'erros': erros, 'cortes': datas[cortes].to_numpy(), 'estados': np.array(tabela.columns)}
+
+
+@instrumentacao.em_cache('backtest.erros', st.cache_resource, show_spinner=False)
+def erros_backtest(variavel):
+    """Distribuição de erros persistida em disco (recalculada se a tabela mudar)."""
+    caminho = _caminho(variavel)
+    if caminho.exists() and caminho.stat().st_mtime >= dados.modificado_em('semanal'):
+        try:
+            with np.load(caminho, allow_pickle=False) as arq:
+                return {k: arq[k] for k in arq.files}
+        except Exception:
+            pass
+    resultado = calcular_erros(variavel)
+    try:
+        dados.PASTA_CACHE.mkdir(exist_ok=True)
+        np.savez_compressed(caminho, **resultado)
+    except Exception:
+        pass
+    return resultado
+
+
+def intervalos(variavel, estado, nivel=0.8):
+    """Intervalo de previsão empírico por horizonte (somar à previsão pontual)."""
+    res = erros_backtest(variavel)
+    j = list(res['estados']).index(estado)
+    e = res['erros'][:, :, j]
+    alfa = (1 - nivel) / 2
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # Horizontes sem nenhuma origem
+        return pd.DataFrame({
+            'horizonte': np.arange(1, e.shape[0] + 1),
+            'inferior': np.nanquantile(e, alfa, axis=1),
+            'superior': np.nanquantile(e, 1 - alfa, axis=1),
+            'mae': np.nanmean(np.abs(e), axis=1),
+            'n_origens': (~np.isnan(e)).sum(axis=1),
+        })
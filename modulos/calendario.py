@@ -0,0 +1,46 @@
+"""Calendário sazonal vetorizado (estação, ordem e ano da estação).
+
+Regra única usada por todas as páginas: Dez/Jan/Fev = Verão, Mar/Abr/Mai =
+Outono, Jun/Jul/Ago = Inverno, Set/Out/Nov = Primavera. Dezembro pertence ao
+Verão do ano SEGUINTE (o Verão de 2015 é Dez/14, Jan/15 e Fev/15).
+"""
+import numpy as np
+import pandas as pd
+
+ESTACOES = ["Verão", "Outono", "Inverno", "Primavera"]
+
+# Mês de início de cada estação, na mesma ordem de ESTACOES
+MES_INICIO = {"Verão": 12, "Outono": 3, "Inverno": 6, "Primavera": 9}
+
+# Tabelas de consulta indexadas pelo mês (posição 0 sem uso)
+_ORDEM_DO_MES = np.array([0, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 1], dtype='int8')
+_AVANCO_DO_ANO = np.array([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1], dtype='int16')
+
+
+def ordem_estacao(meses):
+    """Ordem (1 = Verão ... 4 = Primavera) de cada mês."""
+    return _ORDEM_DO_MES[np.asarray(meses, dtype='int64')]
+
+
+def ano_estacao(anos, meses):
+    """Ano a que a estação pertence (Dezembro avança para o ano seguinte)."""
+    return np.asarray(anos, dtype='int16') + _AVANCO_DO_ANO[np.asarray(meses, dtype='int64')]
+
+
+def nome_estacao(meses):
+    """Nome da estação de cada mês, como Categorical ordenado pelo ciclo anual."""
+    return pd.Categorical.from_codes(ordem_estacao(meses) - 1, categories=ESTACOES, ordered=True)
+
+
+def calendario_sazonal(anos, meses):
+    """Colunas `estacao`, `ordem_estacao` e `ano_estacao` de uma só vez."""
+    return pd.DataFrame({
+        'estacao': nome_estacao(meses),
+        'ordem_estacao': ordem_estacao(meses),
+        'ano_estacao': ano_estacao(anos, meses),
+    })
+
+
+def rotulo(estacoes, anos):
+    """Rótulos do tipo "Verão/2015" para a linha do tempo."""
+    return pd.Series(estacoes, dtype=str).to_numpy() + "/" + np.asarray(anos).astype(str)
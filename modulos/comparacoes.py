@@ -0,0 +1,151 @@
+"""Comparações múltiplas (post-hoc) entre todos os pares de grupos.
+
+Tudo parte de estatísticas suficientes por grupo (n, soma, soma dos quadrados,
+soma dos postos), obtidas com `np.bincount` sobre UM vetor de valores já
+ordenado uma única vez. Assim, os postos de qualquer subconjunto de grupos
+saem de uma passada linear (sem reordenar) e os três testes são vetorizados
+sobre os k(k-1)/2 pares: 27 estados = 351 pares numa única operação.
+
+- Tukey HSD (Tukey-Kramer): controla o erro da família por construção.
+- Dunn: postos médios, com correção de empates.
+- Welch par a par: t com variâncias desiguais.
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy import stats
+from scipy.interpolate import PchipInterpolator
+
+METODOS = {'tukey': "Tukey HSD", 'dunn': "Dunn (postos)", 'welch': "Welch par a par"}
+CORRECOES = {'holm': "Holm", 'bh': "Benjamini-Hochberg (FDR)", 'nenhuma': "Sem correção"}
+GL_ASSINTOTICO = 1000  # Acima disso a amplitude studentizada usa gl infinito
+_GRADE_Q = np.linspace(0, 15, 31)
+
+
+# --- ESTATÍSTICAS SUFICIENTES ---
+
+def amostras_por_grupo(df, coluna, chave, anual=False):
+    """Amostra de cada grupo (semanas ou médias anuais) e os valores já ordenados.
+
+    Devolve (nomes, amostras, preparado); grupos com menos de 2 pontos ficam de fora.
+    """
+    if anual:
+        # AGREGAÇÃO: Transforma 300 semanas em 7 anos
+        base = df.groupby([chave, 'ano'], observed=True)[coluna].mean().dropna()
+    else:
+        # BRUTO: Usa as 300 semanas
+        base = df[[chave, coluna]].dropna().set_index(chave)[coluna]
+    amostras = {str(g): d.reset_index(drop=True) for g, d in base.groupby(level=0, observed=True)}
+    amostras = {g: d for g, d in amostras.items() if len(d) > 1}  # Precisa de pelo menos 2 pontos
+    nomes = list(amostras)
+    return nomes, [amostras[g] for g in nomes], preparar([amostras[g] for g in nomes])
+
+
+def preparar(grupos):
+    """Concatena os grupos e ordena UMA vez (valores, código do grupo)."""
+    valores = np.concatenate([np.asarray(g, dtype='float64') for g in grupos])
+    codigos = np.repeat(np.arange(len(grupos)), [len(g) for g in grupos])
+    ordem = np.argsort(valores, kind='stable')
+    return {'valores': valores[ordem], 'codigos': codigos[ordem]}
+
+
+def suficientes(preparado, selecionados):
+    """n, média, variância e soma dos postos dos grupos `selecionados` (índices).
+
+    Os postos (com média nos empates) são recalculados só entre os grupos
+    escolhidos, aproveitando que os valores já estão ordenados.
+    """
+    selecionados = np.asarray(selecionados)
+    mapa = np.full(preparado['codigos'].max() + 1, -1)
+    mapa[selecionados] = np.arange(len(selecionados))
+    codigos = mapa[preparado['codigos']]
+    manter = codigos >= 0
+    v, c = preparado['valores'][manter], codigos[manter]
+
+    # Postos médios por sequência de valores iguais
+    novo = np.r_[True, v[1:] != v[:-1]]
+    inicio = np.flatnonzero(novo)
+    tamanho = np.diff(np.r_[inicio, len(v)])
+    postos = np.repeat(inicio + (tamanho + 1) / 2, tamanho)
+
+    k = len(selecionados)
+    n = np.bincount(c, minlength=k).astype('float64')
+    soma = np.bincount(c, weights=v, minlength=k)
+    soma2 = np.bincount(c, weights=v * v, minlength=k)
+    media = soma / n
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var = (soma2 - n * media ** 2) / (n - 1)
+    return {
+        'n': n, 'media': media, 'var': np.maximum(var, 0),
+        'soma_postos': np.bincount(c, weights=postos, minlength=k),
+        'empates': float((tamanho ** 3 - tamanho).sum()),
+    }
+
+
+# --- TESTES PAR A PAR ---
+
+@lru_cache(maxsize=64)
+def _curva_amplitude(k, gl):
+    """sf da amplitude studentizada numa grade de q (cara de integrar, então fica em cache)."""
+    sf = stats.studentized_range.sf(_GRADE_Q, k, gl)
+    return PchipInterpolator(_GRADE_Q, np.log(np.maximum(sf, 1e-300)))
+
+
+def _sf_amplitude(q, k, gl):
+    if gl >= GL_ASSINTOTICO:
+        return stats.studentized_range.sf(q, k, np.inf)
+    curva = _curva_amplitude(int(k), int(gl))
+    return np.exp(curva(np.clip(q, 0, _GRADE_Q[-1])))
+
+
+def tukey(s, i, j):
+    k = len(s['n'])
+    gl = s['n'].sum() - k
+    mse = ((s['n'] - 1) * s['var']).sum() / gl
+    q = np.abs(s['media'][i] - s['media'][j]) / np.sqrt(mse / 2 * (1 / s['n'][i] + 1 / s['n'][j]))
+    return q, _sf_amplitude(q, k, gl)
+
+
+def dunn(s, i, j):
+    N = s['n'].sum()
+    posto_medio = s['soma_postos'] / s['n']
+    variancia = N * (N + 1) / 12 - s['empates'] / (12 * (N - 1))
+    z = (posto_medio[i] - posto_medio[j]) / np.sqrt(variancia * (1 / s['n'][i] + 1 / s['n'][j]))
+    return z, 2 * stats.norm.sf(np.abs(z))
+
+
+def welch(s, i, j):
+    a, b = s['var'][i] / s['n'][i], s['var'][j] / s['n'][j]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = (s['media'][i] - s['media'][j]) / np.sqrt(a + b)
+        gl = (a + b) ** 2 / (a ** 2 / (s['n'][i] - 1) + b ** 2 / (s['n'][j] - 1))
+    return t, 2 * stats.t.sf(np.abs(t), gl)
+
+
+def corrigir(p, metodo):
+    """p-valores ajustados (Holm ou Benjamini-Hochberg), vetorizado."""
+    p = np.asarray(p, dtype='float64')
+    m = len(p)
+    if metodo == 'nenhuma' or m == 0:
+        return p
+    ordem = np.argsort(p)
+    ordenados = p[ordem]
+    if metodo == 'holm':
+        ajustados = np.maximum.accumulate((m - np.arange(m)) * ordenados)
+    else:
+        ajustados = np.minimum.accumulate((m / np.arange(m, 0, -1) * ordenados[::-1]))[::-1]
+    saida = np.empty(m)
+    saida[ordem] = np.minimum(ajustados, 1)
+    return saida
+
+
+def todos_os_pares(s, metodo='tukey', correcao='holm'):
+    """Matriz k × k de p-valores (ajustados) e a estatística de cada par."""
+    k = len(s['n'])
+    i, j = np.triu_indices(k, 1)
+    estatistica, p = {'tukey': tukey, 'dunn': dunn, 'welch': welch}[metodo](s, i, j)
+    if metodo != 'tukey':  # Tukey já controla o erro da família
+        p = corrigir(p, correcao)
+    matriz = np.full((k, k), np.nan)
+    matriz[i, j] = matriz[j, i] = p
+    return {'p': matriz, 'i': i, 'j': j, 'estatistica': estatistica, 'p_par': p}
@@ -0,0 +1,383 @@
+"""Consultas pré-declaradas sobre o cubo, usadas pelo assistente para perguntas sobre os dados.
+
+O assistente nunca gera código nem SQL: ele só escolhe uma das funções de
+`CONSULTAS` e os argumentos. Cada argumento é validado contra listas fechadas
+(variáveis, estados, regiões, meses, anos) e a resposta sai das células do
+cubo (`cubo.celulas`), em milissegundos, sem varrer as tabelas.
+
+- `interpretar(pergunta)`: roteador por regras, sem modelo (usado por todos os
+  backends como caminho rápido);
+- `declaracoes()`: as mesmas consultas no formato de ferramentas do Gemini,
+  para as perguntas que o roteador não reconhece;
+- `executar(nome, argumentos)`: roda a consulta e devolve dados + texto pronto.
+"""
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from modulos import cubo, instrumentacao
+from modulos.assistente import normalizar
+
+# Variável -> (coluna, rótulo, unidade) em cada fonte do cubo
+VARIAVEIS = {
+    'temperatura': {'mensal': ('temperatura_media', 'Temperatura média', '°C'),
+                    'semanal': ('temperatura_media', 'Temperatura média', '°C')},
+    'chuva': {'mensal': ('chuva_media_acumulada', 'Chuva acumulada no mês', 'mm'),
+              'semanal': ('chuva_media_semanal', 'Chuva média da semana', 'mm')},
+    'umidade': {'mensal': ('umidade_media', 'Umidade média', '%'),
+                'semanal': ('umidade_media', 'Umidade média', '%')},
+    'vento': {'mensal': ('vento_medio_kmh', 'Vento médio', 'km/h'),
+              'semanal': ('vento_medio', 'Vento médio', 'm/s')},
+    'pressao': {'mensal': ('pressao_media_inHg', 'Pressão média', 'inHg'),
+                'semanal': ('pressao_media', 'Pressão média', 'mB')},
+    'radiacao': {'mensal': ('radiacao_media', 'Radiação média', 'kJ/m²'),
+                 'semanal': ('radiacao_media', 'Radiação média', 'kJ/m²')},
+}
+
+# Palavras da pergunta que indicam cada variável (já normalizadas)
+SINONIMOS = {
+    'temperatura': ('temperatura', 'quente', 'frio', 'fria', 'calor', 'graus'),
+    'chuva': ('chuva', 'chove', 'chuvoso', 'chuvosa', 'precipitacao', 'seco', 'seca'),
+    'umidade': ('umidade', 'umido', 'umida'),
+    'vento': ('vento', 'ventoso', 'ventania'),
+    'pressao': ('pressao',),
+    'radiacao': ('radiacao', 'ensolarado', 'insolacao'),
+}
+
+ESTADOS = {
+    'AC': 'Acre', 'AL': 'Alagoas', 'AM': 'Amazonas', 'AP': 'Amapá', 'BA': 'Bahia', 'CE': 'Ceará',
+    'DF': 'Distrito Federal', 'ES': 'Espírito Santo', 'GO': 'Goiás', 'MA': 'Maranhão', 'MG': 'Minas Gerais',
+    'MS': 'Mato Grosso do Sul', 'MT': 'Mato Grosso', 'PA': 'Pará', 'PB': 'Paraíba', 'PE': 'Pernambuco',
+    'PI': 'Piauí', 'PR': 'Paraná', 'RJ': 'Rio de Janeiro', 'RN': 'Rio Grande do Norte', 'RO': 'Rondônia',
+    'RR': 'Roraima', 'RS': 'Rio Grande do Sul', 'SC': 'Santa Catarina', 'SE': 'Sergipe', 'SP': 'São Paulo',
+    'TO': 'Tocantins',
+}
+REGIOES = {'N': 'Norte', 'NE': 'Nordeste', 'CO': 'Centro-Oeste', 'SE': 'Sudeste', 'S': 'Sul'}
+MESES = ['janeiro', 'fevereiro', 'marco', 'abril', 'maio', 'junho', 'julho', 'agosto',
+         'setembro', 'outubro', 'novembro', 'dezembro']
+NOMES_MESES = ['Janeiro', 'Fevereiro', 'Março', 'Abril', 'Maio', 'Junho', 'Julho', 'Agosto',
+               'Setembro', 'Outubro', 'Novembro', 'Dezembro']
+
+MAX_RANKING = 27
+FONTE_TEXTO = "Fonte: cubo de agregados do INMET (dados refinados)."
+
+
+# --- VALIDAÇÃO DOS ARGUMENTOS ---
+
+def _variavel(variavel, fonte='mensal'):
+    chave = normalizar(str(variavel))
+    for nome, palavras in SINONIMOS.items():
+        if chave == nome or chave in palavras:
+            return VARIAVEIS[nome][fonte]
+    raise ValueError(f"Variável desconhecida: {variavel}. Use uma de: {', '.join(VARIAVEIS)}.")
+
+
+def _local(local):
+    """('state' | 'region', sigla) a partir de sigla ou nome; 'SE' sozinho é Sergipe."""
+    texto = str(local).strip()
+    chave = normalizar(texto)
+    if chave.startswith('regiao '):
+        chave = chave[len('regiao '):]
+        for sigla, nome in REGIOES.items():
+            if chave in (sigla.lower(), normalizar(nome)):
+                return 'region', sigla
+    for sigla, nome in REGIOES.items():
+        if chave == normalizar(nome):
+            return 'region', sigla
+    for sigla, nome in ESTADOS.items():
+        if chave in (sigla.lower(), normalizar(nome)):
+            return 'state', sigla
+    if texto.upper() in REGIOES:
+        return 'region', texto.upper()
+    raise ValueError(f"Local desconhecido: {local}. Use a sigla ou o nome de um estado ou região.")
+
+
+def _nome_local(espacial, sigla):
+    return f"{ESTADOS[sigla]} ({sigla})" if espacial == 'state' else f"região {REGIOES[sigla]}"
+
+
+def _mes(mes):
+    if mes is None or mes == '':
+        return None
+    if isinstance(mes, (int, float, np.integer)) or str(mes).isdigit():
+        numero = int(mes)
+    else:
+        chave = normalizar(str(mes))
+        numero = next((i + 1 for i, m in enumerate(MESES) if m.startswith(chave[:3])), 0)
+    if not 1 <= numero <= 12:
+        raise ValueError(f"Mês inválido: {mes}.")
+    return numero
+
+
+def _anos(ano_inicio, ano_fim):
+    if ano_inicio in (None, ''):
+        return None
+    inicio = int(ano_inicio)
+    return inicio, int(ano_fim) if ano_fim not in (None, '') else inicio
+
+
+def _descrever_periodo(anos, mes):
+    partes = []
+    if mes:
+        partes.append(NOMES_MESES[mes - 1])
+    if anos:
+        partes.append(str(anos[0]) if anos[0] == anos[1] else f"{anos[0]}–{anos[1]}")
+    return ' de '.join(partes) if partes else "todo o período"
+
+
+def _bloco(espacial, coluna, chaves, anos, mes, fonte='mensal', nivel='mes'):
+    bloco = cubo.celulas(fonte, espacial, nivel, coluna, chaves, anos)
+    if mes:
+        bloco = bloco[bloco['periodo'].dt.month.to_numpy() == mes]
+    return bloco
+
+
+def _agregar(bloco):
+    n = int(bloco['count'].sum())
+    if n == 0:
+        return None
+    return {'media': float(bloco['sum'].sum() / n), 'min': float(bloco['min'].min()),
+            'max': float(bloco['max'].max()), 'n': n}
+
+
+def _fmt(valor, unidade):
+    return f"{valor:.1f} {unidade}" if unidade != 'inHg' else f"{valor:.2f} {unidade}"
+
+
+# --- CONSULTAS ---
+
+def valor(variavel, local=None, ano_inicio=None, ano_fim=None, mes=None):
+    """Média, mínimo e máximo de uma variável num estado/região (ou no Brasil) e período."""
+    coluna, rotulo, unidade = _variavel(variavel)
+    anos, mes = _anos(ano_inicio, ano_fim), _mes(mes)
+    if local:
+        espacial, sigla = _local(local)
+        bloco, onde = _bloco(espacial, coluna, [sigla], anos, mes), _nome_local(espacial, sigla)
+    else:
+        bloco, onde = _bloco('state', coluna, None, anos, mes), "Brasil (todos os estados)"
+    r = _agregar(bloco)
+    if r is None:
+        raise ValueError(f"Sem dados de {rotulo.lower()} para {onde} em {_descrever_periodo(anos, mes)}.")
+    texto = (f"{rotulo} — {onde}, {_descrever_periodo(anos, mes)}: **{_fmt(r['media'], unidade)}** "
+             f"(mínimo mensal {_fmt(r['min'], unidade)}, máximo {_fmt(r['max'], unidade)}; {r['n']} registros mensais).")
+    return {'resultado': r, 'texto': texto}
+
+
+def ranking(variavel, nivel='estado', ordem='maior', n=5, ano_inicio=None, ano_fim=None, mes=None):
+    """Estados (ou regiões) com maior ou menor média de uma variável no período."""
+    coluna, rotulo, unidade = _variavel(variavel)
+    anos, mes = _anos(ano_inicio, ano_fim), _mes(mes)
+    espacial = 'region' if normalizar(str(nivel)).startswith('regi') else 'state'
+    n = max(1, min(int(n), MAX_RANKING))
+    bloco = _bloco(espacial, coluna, None, anos, mes)
+    if bloco.empty:
+        raise ValueError(f"Sem dados para {_descrever_periodo(anos, mes)}.")
+    g = bloco.groupby('chave', sort=False)[['sum', 'count']].sum()
+    medias = (g['sum'] / g['count']).sort_values(ascending=normalizar(str(ordem)).startswith('men'))
+    medias = medias.head(n)
+    linhas = [f"{i}. {_nome_local(espacial, chave)}: {_fmt(v, unidade)}" for i, (chave, v) in enumerate(medias.items(), 1)]
+    cabecalho = f"{'Menor' if normalizar(str(ordem)).startswith('men') else 'Maior'} {rotulo.lower()} — {_descrever_periodo(anos, mes)}:"
+    return {'resultado': {k: float(v) for k, v in medias.items()}, 'texto': '\n'.join([cabecalho, *linhas])}
+
+
+def comparar(variavel, local_a, local_b, ano_inicio=None, ano_fim=None, mes=None):
+    """Diferença entre as médias de dois estados/regiões no mesmo período."""
+    coluna, rotulo, unidade = _variavel(variavel)
+    anos, mes = _anos(ano_inicio, ano_fim), _mes(mes)
+    resultados = {}
+    for local in (local_a, local_b):
+        espacial, sigla = _local(local)
+        r = _agregar(_bloco(espacial, coluna, [sigla], anos, mes))
+        if r is None:
+            raise ValueError(f"Sem dados para {_nome_local(espacial, sigla)} em {_descrever_periodo(anos, mes)}.")
+        resultados[_nome_local(espacial, sigla)] = r
+    (a, ra), (b, rb) = resultados.items()
+    diferenca = ra['media'] - rb['media']
+    texto = (f"{rotulo}, {_descrever_periodo(anos, mes)}: {a} **{_fmt(ra['media'], unidade)}** × "
+             f"{b} **{_fmt(rb['media'], unidade)}** (diferença de {_fmt(diferenca, unidade)}).")
+    return {'resultado': {k: v['media'] for k, v in resultados.items()} | {'diferenca': diferenca}, 'texto': texto}
+
+
+def extremo(variavel, local, ordem='maior', ano_inicio=None, ano_fim=None):
+    """Mês com a maior (ou menor) média de uma variável num estado/região."""
+    coluna, rotulo, unidade = _variavel(variavel)
+    anos = _anos(ano_inicio, ano_fim)
+    espacial, sigla = _local(local)
+    bloco = _bloco(espacial, coluna, [sigla], anos, None)
+    if bloco.empty:
+        raise ValueError(f"Sem dados para {_nome_local(espacial, sigla)}.")
+    medias = (bloco['sum'] / bloco['count']).to_numpy()
+    i = int(np.nanargmin(medias) if normalizar(str(ordem)).startswith('men') else np.nanargmax(medias))
+    periodo = bloco['periodo'].iloc[i]
+    texto = (f"{'Menor' if normalizar(str(ordem)).startswith('men') else 'Maior'} {rotulo.lower()} em "
+             f"{_nome_local(espacial, sigla)} ({_descrever_periodo(anos, None)}): **{_fmt(medias[i], unidade)}** "
+             f"em {NOMES_MESES[periodo.month - 1]} de {periodo.year}.")
+    return {'resultado': {'periodo': periodo.strftime('%Y-%m'), 'valor': float(medias[i])}, 'texto': texto}
+
+
+def semana(variavel, local, data):
+    """Valor da semana que contém a data (tabela semanal) num estado/região."""
+    coluna, rotulo, unidade = _variavel(variavel, 'semanal')
+    espacial, sigla = _local(local)
+    dia = pd.Timestamp(data)
+    bloco = cubo.celulas('semanal', espacial, 'semana', coluna, [sigla], (dia.year - 1, dia.year))
+    inicio = bloco['periodo'].to_numpy()
+    achou = (inicio <= dia.to_datetime64()) & (dia.to_datetime64() < inicio + np.timedelta64(7, 'D'))
+    r = _agregar(bloco[achou])
+    if r is None:
+        raise ValueError(f"Sem registro semanal para {_nome_local(espacial, sigla)} em {dia:%d/%m/%Y}.")
+    semana_ref = bloco['periodo'][achou].iloc[0]
+    texto = (f"{rotulo} — {_nome_local(espacial, sigla)}, semana de {semana_ref:%d/%m/%Y} "
+             f"(contém {dia:%d/%m/%Y}): **{_fmt(r['media'], unidade)}**. Os dados são semanais, não diários.")
+    return {'resultado': r | {'semana': semana_ref.strftime('%Y-%m-%d')}, 'texto': texto}
+
+
+# --- CATÁLOGO ---
+
+_VARIAVEL = {'type': 'STRING', 'enum': list(VARIAVEIS), 'description': "Variável climática"}
+_LOCAL = {'type': 'STRING', 'description': "Sigla ou nome do estado (ex.: SP, Bahia) ou nome da região (ex.: Sudeste)"}
+_ANO_INICIO = {'type': 'INTEGER', 'description': "Primeiro ano (2015 a 2021); omita para todo o período"}
+_ANO_FIM = {'type': 'INTEGER', 'description': "Último ano; omita para usar só o ano inicial"}
+_MES = {'type': 'INTEGER', 'description': "Mês (1 a 12); omita para o ano inteiro"}
+_ORDEM = {'type': 'STRING', 'enum': ['maior', 'menor'], 'description': "Maiores ou menores valores"}
+
+CONSULTAS = {
+    'valor': {'funcao': valor, 'obrigatorios': ['variavel'],
+              'parametros': {'variavel': _VARIAVEL, 'local': _LOCAL, 'ano_inicio': _ANO_INICIO,
+                             'ano_fim': _ANO_FIM, 'mes': _MES}},
+    'ranking': {'funcao': ranking, 'obrigatorios': ['variavel'],
+                'parametros': {'variavel': _VARIAVEL,
+                               'nivel': {'type': 'STRING', 'enum': ['estado', 'regiao'], 'description': "Comparar estados ou regiões"},
+                               'ordem': _ORDEM, 'n': {'type': 'INTEGER', 'description': "Quantos itens (até 27)"},
+                               'ano_inicio': _ANO_INICIO, 'ano_fim': _ANO_FIM, 'mes': _MES}},
+    'comparar': {'funcao': comparar, 'obrigatorios': ['variavel', 'local_a', 'local_b'],
+                 'parametros': {'variavel': _VARIAVEL, 'local_a': _LOCAL, 'local_b': _LOCAL,
+                                'ano_inicio': _ANO_INICIO, 'ano_fim': _ANO_FIM, 'mes': _MES}},
+    'extremo': {'funcao': extremo, 'obrigatorios': ['variavel', 'local'],
+                'parametros': {'variavel': _VARIAVEL, 'local': _LOCAL, 'ordem': _ORDEM,
+                               'ano_inicio': _ANO_INICIO, 'ano_fim': _ANO_FIM}},
+    'semana': {'funcao': semana, 'obrigatorios': ['variavel', 'local', 'data'],
+               'parametros': {'variavel': _VARIAVEL, 'local': _LOCAL,
+                              'data': {'type': 'STRING', 'description': "Data no formato AAAA-MM-DD"}}},
+}
+
+
+def declaracoes():
+    """Ferramentas no formato `function_declarations` do Gemini."""
+    return [{'function_declarations': [
+        {'name': nome, 'description': c['funcao'].__doc__.splitlines()[0],
+         'parameters': {'type': 'OBJECT', 'properties': c['parametros'], 'required': c['obrigatorios']}}
+        for nome, c in CONSULTAS.items()]}]
+
+
+def executar(nome, argumentos):
+    """Roda uma consulta do catálogo; argumentos fora da declaração são ignorados.
+
+    Devolve {'consulta', 'argumentos', 'resultado', 'texto'} ou, se a consulta
+    ou os argumentos forem inválidos, {'consulta', 'erro'}.
+    """
+    if nome not in CONSULTAS:
+        return {'consulta': nome, 'erro': f"Consulta desconhecida. Disponíveis: {', '.join(CONSULTAS)}."}
+    declarados = CONSULTAS[nome]['parametros']
+    inicio = time.perf_counter()
+    try:
+        argumentos = {k: (int(v) if declarados[k]['type'] == 'INTEGER' and v is not None else v)
+                      for k, v in argumentos.items() if k in declarados}
+        saida = CONSULTAS[nome]['funcao'](**argumentos)
+    except (ValueError, TypeError, KeyError) as erro:
+        return {'consulta': nome, 'erro': str(erro)}
+    finally:
+        instrumentacao.registrar('consultas.executar', (time.perf_counter() - inicio) * 1000, detalhe=nome)
+    return {'consulta': nome, 'argumentos': argumentos, **saida, 'texto': f"{saida['texto']}\n\n_{FONTE_TEXTO}_"}
+
+
+# --- ROTEADOR POR REGRAS ---
+
+_DATA = re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b|\b(\d{1,2}) de (\w+) de (\d{4})\b')
+_ANO = re.compile(r'\b(20[0-9]{2})\b')
+_TOP = re.compile(r'\b(?:top|os|as)\s+(\d{1,2})\b|\b(\d{1,2})\s+(?:estados|regioes)\b')
+# Forma explícita de pergunta sobre os dados: um destes termos + local ou período
+_INTERROGATIVOS = {'qual', 'quais', 'quanto', 'quanta', 'quantos', 'quantas', 'quando', 'onde',
+                   'compare', 'compara', 'comparar', 'mostre', 'liste', 'ranking', 'top'}
+_ABRANGENCIA = {'estado', 'estados', 'regiao', 'regioes', 'brasil', 'pais'}
+# Perguntas sobre o método ficam com o modelo, mesmo citando variável e período
+_METODOLOGIA = re.compile(r'\b(?:correlac\w*|regress\w*|modelo\w*|teste\w*|hipotese\w*|p valor|'
+                          r'significan\w*|cluster\w*|kmeans|anomalia\w*|isolation|metodo\w*|'
+                          r'por que|porque|explique|explica)\b')
+_MAIOR = ('mais quente', 'mais chuvos', 'mais umid', 'mais vent', 'mais ensolarad', 'maior', 'maiores', 'ranking')
+_MENOR = ('mais fri', 'mais sec', 'menos', 'menor', 'menores')
+
+
+def _achar_locais(pergunta, texto):
+    """Locais citados, na ordem em que aparecem (nomes antes de siglas, evitando 'Rio Grande do Sul' → Sul)."""
+    achados = []
+    nomes = [(normalizar(n), ('state', s)) for s, n in ESTADOS.items()]
+    nomes += [(normalizar(n), ('region', s)) for s, n in REGIOES.items()]
+    for nome, local in sorted(nomes, key=lambda par: -len(par[0])):
+        for m in re.finditer(rf'\b{re.escape(nome)}\b', texto):
+            achados.append((m.start(), local))
+            texto = texto[:m.start()] + '#' * len(nome) + texto[m.end():]
+    # Siglas só em maiúsculas na pergunta original ("SE" é Sergipe; "se" é conjunção)
+    for m in re.finditer(r'\b([A-Z]{2})\b', pergunta):
+        if m.group(1) in ESTADOS:
+            achados.append((10_000 + m.start(), ('state', m.group(1))))
+    vistos = []
+    for _, local in sorted(achados):
+        if local not in vistos:
+            vistos.append(local)
+    return vistos
+
+
+def interpretar(pergunta):
+    """(consulta, argumentos) para perguntas sobre os dados, ou None (fica com o modelo).
+
+    Só responde perguntas de forma explícita: um termo interrogativo ("qual",
+    "quais", "compare"...) mais um local, uma abrangência ("estados") ou um
+    período, e nenhum termo de metodologia ("correlação", "regressão",
+    "por que"...).
+    """
+    texto = normalizar(pergunta)
+    if _METODOLOGIA.search(texto):
+        return None
+    palavras = {p.removesuffix('s') for p in texto.split()} | set(texto.split())  # "quentes" -> "quente"
+    variavel = next((v for v, sinonimos in SINONIMOS.items() if palavras & set(sinonimos)), None)
+    if variavel is None or not palavras & _INTERROGATIVOS:
+        return None
+
+    locais = _achar_locais(pergunta, texto)
+    anos = [int(a) for a in _ANO.findall(texto)]
+    data = _DATA.search(pergunta.lower())
+    mes = next((i + 1 for i, m in enumerate(MESES) if re.search(rf'\b{m}\b', texto)), None)
+    quer_maior = any(t in texto for t in _MAIOR)
+    quer_menor = any(t in texto for t in _MENOR)
+    if not (locais or anos or mes or data or palavras & _ABRANGENCIA):
+        return None  # Ex.: "Qual variável mais influencia a chuva?" não cita local nem período
+
+    periodo = {}
+    if anos:
+        periodo = {'ano_inicio': min(anos), 'ano_fim': max(anos)}
+    local = lambda i: locais[i][1] if locais[i][0] == 'state' else f"região {locais[i][1]}"
+
+    if data and locais:
+        if data.group(1):
+            dia, numero_mes, ano = int(data.group(1)), int(data.group(2)), int(data.group(3))
+        else:
+            dia, ano = int(data.group(4)), int(data.group(6))
+            numero_mes = _mes(data.group(5)) if normalizar(data.group(5))[:3] in [m[:3] for m in MESES] else None
+        if numero_mes:
+            return 'semana', {'variavel': variavel, 'local': local(0), 'data': f"{ano:04d}-{numero_mes:02d}-{dia:02d}"}
+    if len(locais) >= 2:
+        return 'comparar', {'variavel': variavel, 'local_a': local(0), 'local_b': local(1), **periodo, 'mes': mes}
+    ordem = 'menor' if quer_menor and not quer_maior else 'maior'
+    if (quer_maior or quer_menor) and locais and re.search(r'\bmes\b|\bmeses\b|\bquando\b', texto):
+        return 'extremo', {'variavel': variavel, 'local': local(0), 'ordem': ordem, **periodo}
+    if (quer_maior or quer_menor) and not locais:
+        top = _TOP.search(texto)
+        n = int(top.group(1) or top.group(2)) if top else 5
+        nivel = 'regiao' if re.search(r'\bregi(ao|oes)\b', texto) else 'estado'
+        return 'ranking', {'variavel': variavel, 'nivel': nivel, 'ordem': ordem, 'n': n, **periodo, 'mes': mes}
+    if data and not locais:
+        return None  # "Qual a temperatura dia 15?": falta o local; o modelo pede o complemento
+    return 'valor', {'variavel': variavel, 'local': local(0) if locais else None, **periodo, 'mes': mes}
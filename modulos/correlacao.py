@@ -0,0 +1,184 @@
+"""Tensor de correlações pré-calculado (estado × ano × variável × variável).
+
+Pearson é uma função de somas (n, Σx, Σy, Σx², Σy², Σxy), e somas são
+aditivas: calculamos os momentos de cada bloco (estado, ano) numa única
+passada vetorizada e somamos para obter estado, Brasil e a evolução ano a
+ano. Spearman é o Pearson dos postos, então o mesmo motor roda sobre os
+postos calculados dentro de cada escopo (estado, estado-ano, Brasil,
+Brasil-ano). A página só fatia o tensor.
+
+Os pares usam as observações completas de cada par (como `DataFrame.corr`).
+No Spearman, os postos de cada coluna consideram todas as suas observações
+válidas, o que só difere do pandas nas poucas semanas com lacunas.
+
+Correlações defasadas e móveis usam a matriz semanas × estados (alinhada por
+data), calculadas para todos os estados de uma vez.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modulos import dados, instrumentacao
+
+BRASIL = "Brasil (Todos)"
+JANELA_MOVEL = 52  # Semanas na janela da correlação móvel
+MAX_DEFASAGEM = 12  # Semanas de defasagem máxima
+
+
+# --- MOMENTOS ---
+
+def _momentos(X, codigos, n_grupos):
+    """Somas por grupo de todos os pares de colunas de X, só onde ambos existem.
+
+    Devolve um array (6, grupos, p, p): n, Σa, Σb, Σa², Σb², Σab. Com
+    Z = [máscara, X, X²] (zeros nas lacunas), Zᵀ·Z de cada grupo traz os seis
+    momentos como blocos p × p; a memória extra é Z, nunca um produto por linha.
+    """
+    M = ~np.isnan(X)
+    X0 = np.where(M, X, 0.0)
+    Z = np.hstack([M.astype('float64'), X0, X0 * X0])
+    if np.any(codigos[1:] < codigos[:-1]):  # As tabelas já vêm ordenadas por estado e data
+        ordem = np.argsort(codigos, kind='stable')
+        Z, codigos = Z[ordem], codigos[ordem]
+    limites = np.searchsorted(codigos, np.arange(n_grupos + 1))
+
+    p = X.shape[1]
+    m, x, q = slice(0, p), slice(p, 2 * p), slice(2 * p, 3 * p)
+    somas = np.zeros((6, n_grupos, p, p))
+    for g in np.flatnonzero(np.diff(limites)):
+        Zg = Z[limites[g]:limites[g + 1]]
+        G = Zg.T @ Zg
+        somas[:, g] = G[m, m], G[x, m], G[m, x], G[q, m], G[m, q], G[x, x]
+    return somas
+
+
+def _pearson(m):
+    """Correlação a partir dos momentos (funciona com qualquer forma à esquerda)."""
+    n, sa, sb, saa, sbb, sab = m
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sab - sa * sb / n
+        r = cov / np.sqrt((saa - sa ** 2 / n) * (sbb - sb ** 2 / n))
+    return np.where(n > 1, np.clip(r, -1, 1), np.nan)
+
+
+def _postos(df, colunas, por):
+    return (df.groupby(por, observed=True)[colunas].rank() if por else df[colunas].rank()).to_numpy('float64')
+
+
+# --- TENSOR ---
+
+def calcular_tensor(df):
+    """Pearson e Spearman de todos os estados (+ Brasil), no total e por ano."""
+    variaveis = [v for v in dados.TABELAS['semanal']['medidas'] if v in df.columns]
+
+    estado_cod = df['state'].cat.remove_unused_categories()
+    estados = list(estado_cod.cat.categories.astype(str))
+    anos = np.sort(df['ano'].unique())
+    e = estado_cod.cat.codes.to_numpy().astype('int64')
+    a = np.searchsorted(anos, df['ano'].to_numpy())
+    E, A = len(estados), len(anos)
+    bloco = e * A + a  # Código de (estado, ano)
+
+    def _escopos(m_bloco, m_estado, m_brasil, m_brasil_ano):
+        total = np.concatenate([m_estado, m_brasil[:, None]], axis=1)
+        por_ano = np.concatenate([m_bloco.reshape(6, E, A, *m_bloco.shape[-2:]),
+                                  m_brasil_ano[:, None]], axis=1)
+        return _pearson(total), _pearson(por_ano)
+
+    X = df[variaveis].to_numpy('float64')
+    m = _momentos(X, bloco, E * A)  # Uma passada; o resto são somas
+    m_bloco = m.reshape(6, E, A, *m.shape[-2:])
+    pearson, pearson_ano = _escopos(m, m_bloco.sum(axis=2), m.sum(axis=1),
+                                    m_bloco.sum(axis=1))
+
+    # Spearman: mesmos momentos, sobre os postos de cada escopo
+    r_estado = _momentos(_postos(df, variaveis, 'state'), e, E)
+    r_bloco = _momentos(_postos(df, variaveis, ['state', 'ano']), bloco, E * A)
+    r_brasil = _momentos(_postos(df, variaveis, None), np.zeros(len(df), dtype=int), 1)[:, 0]
+    r_brasil_ano = _momentos(_postos(df, variaveis, 'ano'), a, A)
+    spearman, spearman_ano = _escopos(r_bloco, r_estado, r_brasil, r_brasil_ano)
+
+    return {
+        'estados': estados + [BRASIL], 'anos': anos, 'variaveis': variaveis,
+        'pearson': pearson, 'spearman': spearman,
+        'pearson_ano': pearson_ano, 'spearman_ano': spearman_ano,
+    }
+
+
+@instrumentacao.em_cache('correlacao.tensor', st.cache_resource, show_spinner=False)
+def tensor():
+    """Tensor da tabela semanal compartilhada (calculado uma vez por processo)."""
+    return calcular_tensor(dados.carregar_semanal())
+
+
+def _indice(t, estado):
+    return t['estados'].index(estado)
+
+
+def matriz(estado, metodo='pearson'):
+    """Matriz variável × variável de um estado (ou do Brasil): apenas uma fatia."""
+    t = tensor()
+    return pd.DataFrame(t[metodo][_indice(t, estado)], index=t['variaveis'], columns=t['variaveis'])
+
+
+def evolucao_anual(estado, var_a, var_b):
+    """Correlação entre duas variáveis em cada ano (Pearson e Spearman)."""
+    t = tensor()
+    i, a, b = _indice(t, estado), t['variaveis'].index(var_a), t['variaveis'].index(var_b)
+    return pd.DataFrame({
+        'ano': t['anos'],
+        'Pearson': t['pearson_ano'][i, :, a, b],
+        'Spearman': t['spearman_ano'][i, :, a, b],
+    })
+
+
+# --- DEFASAGEM E JANELA MÓVEL ---
+
+@instrumentacao.em_cache('correlacao.semanas', st.cache_resource, show_spinner=False)
+def _semanas(variavel):
+    """Matriz semanas × estados (alinhada por data, NaN nas lacunas)."""
+    df = dados.carregar_semanal()
+    tabela = df.pivot_table(index='semana_ref', columns='state', values=variavel,
+                            aggfunc='mean', observed=True)
+    tabela.columns = tabela.columns.astype(str)
+    return tabela.sort_index()
+
+
+def _par(var_a, var_b):
+    ta, tb = _semanas(var_a), _semanas(var_b)
+    return ta.to_numpy('float64'), tb.reindex(index=ta.index, columns=ta.columns).to_numpy('float64'), ta
+
+
+def _coluna(estados, estado):
+    return slice(None) if estado == BRASIL else [estados.index(estado)]
+
+
+def _momentos_par(x, y, eixo):
+    m = ~(np.isnan(x) | np.isnan(y))
+    x0, y0 = np.where(m, x, 0.0), np.where(m, y, 0.0)
+    return np.stack([m.sum(axis=eixo), x0.sum(axis=eixo), y0.sum(axis=eixo),
+                     (x0 * x0).sum(axis=eixo), (y0 * y0).sum(axis=eixo), (x0 * y0).sum(axis=eixo)])
+
+
+def defasada(estado, var_a, var_b, max_defasagem=MAX_DEFASAGEM):
+    """Correlação de Pearson entre `var_a` na semana t e `var_b` na semana t + k."""
+    x, y, tabela = _par(var_a, var_b)
+    col = _coluna(list(tabela.columns), estado)
+    x, y = x[:, col], y[:, col]
+    n = len(x)
+    valores = []
+    for k in range(-max_defasagem, max_defasagem + 1):
+        xa, yb = (x[:n - k], y[k:]) if k >= 0 else (x[-k:], y[:n + k])
+        valores.append(float(_pearson(_momentos_par(xa, yb, None))))
+    return pd.DataFrame({'defasagem': np.arange(-max_defasagem, max_defasagem + 1), 'correlacao': valores})
+
+
+def movel(estado, var_a, var_b, janela=JANELA_MOVEL):
+    """Correlação de Pearson numa janela móvel de `janela` semanas (somas acumuladas)."""
+    x, y, tabela = _par(var_a, var_b)
+    col = _coluna(list(tabela.columns), estado)
+    x, y = x[:, col], y[:, col]
+    por_semana = _momentos_par(x, y, 1)  # Soma entre estados na mesma semana
+    acumulado = np.cumsum(np.concatenate([np.zeros((6, 1)), por_semana], axis=1), axis=1)
+    janela_m = acumulado[:, janela:] - acumulado[:, :-janela]
+    return pd.DataFrame({'semana_ref': tabela.index[janela - 1:], 'correlacao': _pearson(janela_m)})
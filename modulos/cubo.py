@@ -0,0 +1,254 @@
+"""Cubo de agregados pré-calculados (espaço × período × variável).
+
+Para cada tabela de origem (semanal, mensal) o cubo guarda, por região/estado
+e por semana/mês/trimestre/estação/ano, as estatísticas suficientes de cada
+variável: contagem, soma, soma dos quadrados, mínimo, máximo e um esboço de
+quantis. Todas elas são combináveis, então qualquer recorte de anos ou de
+chaves vira uma soma de células em vez de um groupby sobre a tabela bruta.
+
+Construção manual (opcional, o cubo também é montado sob demanda):
+    python -m modulos.cubo
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modulos import calendario, dados, instrumentacao
+
+NIVEIS_ESPACIAIS = ('region', 'state')
+NIVEIS_TEMPO = ('semana', 'mes', 'trimestre', 'estacao', 'ano')
+
+# Pontos do esboço de quantis por célula. Células com até K observações
+# guardam os próprios valores ordenados (exato); acima disso guardam os
+# quantis nas probabilidades (i + 0.5) / K, que se combinam por peso.
+K_ESBOCO = 33
+
+
+def _caminho(fonte):
+    return dados.PASTA_CACHE / f"cubo_{fonte}.parquet"
+
+
+# --- CALENDÁRIO DOS NÍVEIS DE TEMPO ---
+
+def _periodos(datas, nivel):
+    """Data de início do período de cada linha e o ano a que ele pertence."""
+    d = datas.values.astype('datetime64[D]')
+    mes_inicio = d.astype('datetime64[M]')
+    ano = mes_inicio.astype('datetime64[Y]').astype(int) + 1970
+    mes = (mes_inicio - mes_inicio.astype('datetime64[Y]')).astype(int) + 1
+
+    if nivel == 'semana':
+        inicio = d
+    elif nivel == 'mes':
+        inicio = mes_inicio
+    elif nivel == 'trimestre':
+        inicio = mes_inicio - ((mes - 1) % 3).astype('timedelta64[M]')
+    elif nivel == 'estacao':
+        # Dez/Jan/Fev formam o Verão que começa em dezembro e pertence ao ano seguinte
+        inicio = mes_inicio - (mes % 3).astype('timedelta64[M]')
+        ano = calendario.ano_estacao(ano, mes)
+    elif nivel == 'ano':
+        inicio = mes_inicio.astype('datetime64[Y]')
+    else:
+        raise ValueError(f"Nível de tempo desconhecido: {nivel}")
+    return inicio.astype('datetime64[ns]'), ano
+
+
+# --- CONSTRUÇÃO ---
+
+def _esbocos(codigos, valores, n_grupos):
+    """Esboço de quantis de cada grupo, calculado de forma vetorizada."""
+    ordem = np.lexsort((valores, codigos))
+    v, c = valores[ordem], codigos[ordem]
+    contagem = np.bincount(c, minlength=n_grupos)
+    inicio = np.cumsum(contagem) - contagem
+    tam = np.minimum(contagem, K_ESBOCO)
+
+    grupo = np.repeat(np.arange(n_grupos), tam)
+    i = np.arange(tam.sum()) - np.repeat(np.cumsum(tam) - tam, tam)
+    n = contagem[grupo]
+    pos = np.where(n <= K_ESBOCO, i, (i + 0.5) / K_ESBOCO * n - 0.5)
+    pos = np.clip(pos, 0, n - 1)
+    baixo = np.floor(pos).astype(int)
+    alto = np.minimum(baixo + 1, n - 1)
+    frac = pos - baixo
+    base = inicio[grupo]
+    pontos = v[base + baixo] * (1 - frac) + v[base + alto] * frac
+    return np.split(pontos.astype('float32'), np.cumsum(tam)[:-1])
+
+
+def construir_cubo(df, fonte):
+    """Materializa o cubo (formato longo) a partir de uma tabela de `dados`."""
+    esquema = dados.TABELAS[fonte]
+    datas = df[esquema["data"]]
+    partes = []
+
+    for nivel in NIVEIS_TEMPO:
+        if nivel == 'semana' and fonte != 'semanal':
+            continue
+        inicio, ano = _periodos(datas, nivel)
+
+        for espacial in NIVEIS_ESPACIAIS:
+            grupos = pd.DataFrame({'chave': df[espacial].astype(str).to_numpy(),
+                                   'periodo': inicio, 'ano': ano})
+            agrupado = grupos.groupby(['chave', 'periodo'], sort=True)
+            codigos = agrupado.ngroup().to_numpy()
+            celulas = agrupado['ano'].first().reset_index()
+            n = len(celulas)
+
+            for medida in esquema["medidas"]:
+                v = df[medida].to_numpy(dtype='float64')
+                ok = ~np.isnan(v)
+                cod, val = codigos[ok], v[ok]
+
+                bloco = celulas.copy()
+                bloco['count'] = np.bincount(cod, minlength=n)
+                bloco['sum'] = np.bincount(cod, weights=val, minlength=n)
+                bloco['sumsq'] = np.bincount(cod, weights=val * val, minlength=n)
+                extremos = pd.Series(val).groupby(cod).agg(['min', 'max']).reindex(range(n))
+                bloco['min'] = extremos['min'].to_numpy()
+                bloco['max'] = extremos['max'].to_numpy()
+                bloco['esboco'] = _esbocos(cod, val, n)
+                bloco = bloco[bloco['count'] > 0]
+
+                bloco.insert(0, 'medida', medida)
+                bloco.insert(0, 'nivel', nivel)
+                bloco.insert(0, 'espacial', espacial)
+                partes.append(bloco)
+
+    cubo = pd.concat(partes, ignore_index=True)
+    for col in ('espacial', 'nivel', 'medida', 'chave'):
+        cubo[col] = cubo[col].astype('category')
+    cubo['ano'] = cubo['ano'].astype('int16')
+    cubo['count'] = cubo['count'].astype('int32')
+    return cubo
+
+
+def construir(fontes=('semanal', 'mensal')):
+    """Etapa de build: grava o cubo de cada fonte ao lado dos CSVs."""
+    for fonte in fontes:
+        cubo = construir_cubo(dados.carregar(fonte), fonte)
+        dados.PASTA_CACHE.mkdir(exist_ok=True)
+        cubo.to_parquet(_caminho(fonte), index=False)
+
+
+# --- CARREGAMENTO ---
+
+def _ler_cubo(fonte):
+    caminho = _caminho(fonte)
+    cubo = None
+    if caminho.exists() and caminho.stat().st_mtime >= dados.modificado_em(fonte):
+        try:
+            cubo = pd.read_parquet(caminho)
+        except Exception:
+            cubo = None
+    if cubo is None:
+        cubo = construir_cubo(dados.carregar(fonte), fonte)
+        try:
+            dados.PASTA_CACHE.mkdir(exist_ok=True)
+            cubo.to_parquet(caminho, index=False)
+        except Exception:
+            pass
+    return cubo
+
+
+def indexar(cubo):
+    """Cubo indexado por (espacial, nivel, medida) para consultas por fatia."""
+    fatias = {}
+    for chave, bloco in cubo.groupby(['espacial', 'nivel', 'medida'], observed=True):
+        bloco = bloco.drop(columns=['espacial', 'nivel', 'medida'])
+        bloco['chave'] = bloco['chave'].astype(str)
+        fatias[chave] = bloco.sort_values(['chave', 'periodo']).reset_index(drop=True)
+    return fatias
+
+
+@instrumentacao.em_cache('cubo.carregar', st.cache_resource, show_spinner=False)
+def _cubo(fonte):
+    return indexar(_ler_cubo(fonte))
+
+
+# --- API DE CONSULTA ---
+
+def celulas(fonte, espacial, nivel, medida, chaves=None, anos=None, cubos=None):
+    """Células do cubo filtradas por chaves (regiões/estados) e faixa de anos.
+
+    `cubos` ({fonte: cubo indexado}) troca o cubo em cache do processo por
+    outro, ex.: o de tabelas sintéticas nos benchmarks.
+    """
+    bloco = (_cubo(fonte) if cubos is None else cubos[fonte])[(espacial, nivel, medida)]
+    mascara = np.ones(len(bloco), dtype=bool)
+    if chaves is not None:
+        mascara &= bloco['chave'].isin([str(c) for c in chaves]).to_numpy()
+    if anos is not None:
+        mascara &= ((bloco['ano'] >= anos[0]) & (bloco['ano'] <= anos[1])).to_numpy()
+    return bloco[mascara]
+
+
+def _quantil(esbocos, contagens, q):
+    """Quantil aproximado a partir de esboços combinados por peso."""
+    pontos = np.concatenate(esbocos).astype('float64')
+    if len(pontos) == 0:
+        return np.nan
+    pesos = np.concatenate([np.full(len(e), c / len(e)) for e, c in zip(esbocos, contagens)])
+    ordem = np.argsort(pontos, kind='stable')
+    pontos, pesos = pontos[ordem], pesos[ordem]
+    acumulado = np.cumsum(pesos) - 0.5 * pesos
+    return float(np.interp(q * pesos.sum(), acumulado, pontos))
+
+
+@instrumentacao.cronometrar('cubo.resumo')
+def resumo(fonte, espacial, medida, chaves=None, anos=None, nivel='mes', cubos=None):
+    """Equivalente a groupby(espacial)[medida].agg(count, mean, std, min, max, median).
+
+    Contagem, média, desvio, mínimo e máximo são exatos em qualquer nível; a
+    mediana é exata enquanto as células do nível tiverem até K_ESBOCO valores.
+    """
+    bloco = celulas(fonte, espacial, nivel, medida, chaves, anos, cubos)
+    g = bloco.groupby('chave', sort=True)
+    tabela = g.agg(count=('count', 'sum'), soma=('sum', 'sum'), soma2=('sumsq', 'sum'),
+                   min=('min', 'min'), max=('max', 'max'))
+    n = tabela['count']
+    tabela['mean'] = tabela['soma'] / n
+    var = (tabela['soma2'] - tabela['soma'] ** 2 / n) / (n - 1)
+    tabela['std'] = np.sqrt(var.clip(lower=0)).where(n > 1)
+    tabela['median'] = [_quantil(list(b['esboco']), b['count'].to_numpy(), 0.5) for _, b in g]
+    tabela = tabela[['count', 'mean', 'std', 'min', 'max', 'median']]
+    return tabela.rename_axis(espacial).reset_index()
+
+
+@instrumentacao.cronometrar('cubo.distribuicao')
+def distribuicao(fonte, espacial, medida, chaves=None, anos=None, nivel='mes', cubos=None):
+    """Pontos dos esboços (com peso) e momentos exatos por chave, base dos box plots.
+
+    Com células de até K_ESBOCO valores os pontos são os próprios dados; acima
+    disso, uma amostra de quantis cujo tamanho não depende do número de linhas.
+    """
+    bloco = celulas(fonte, espacial, nivel, medida, chaves, anos, cubos)
+    saida = {}
+    for chave, b in bloco.groupby('chave', sort=True):
+        esbocos, contagens = list(b['esboco']), b['count'].to_numpy()
+        n, soma = contagens.sum(), b['sum'].sum()
+        var = (b['sumsq'].sum() - soma ** 2 / n) / (n - 1) if n > 1 else np.nan
+        saida[chave] = {
+            'pontos': np.concatenate(esbocos).astype('float64'),
+            'pesos': np.concatenate([np.full(len(e), c / len(e)) for e, c in zip(esbocos, contagens)]),
+            'n': int(n), 'media': soma / n, 'desvio': np.sqrt(max(var, 0)),
+            'min': float(b['min'].min()), 'max': float(b['max'].max()),
+        }
+    return saida
+
+
+@instrumentacao.cronometrar('cubo.serie')
+def serie(fonte, espacial, medida, nivel, chaves=None, anos=None, cubos=None):
+    """Média de `medida` por período e chave, no formato longo usado pelo Plotly."""
+    bloco = celulas(fonte, espacial, nivel, medida, chaves, anos, cubos)
+    return pd.DataFrame({
+        'periodo': bloco['periodo'].to_numpy(),
+        espacial: bloco['chave'].to_numpy(),
+        'ano': bloco['ano'].to_numpy(),
+        medida: (bloco['sum'] / bloco['count']).to_numpy(),
+    })
+
+
+if __name__ == "__main__":
+    construir()
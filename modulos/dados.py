@@ -0,0 +1,203 @@
+"""Camada de dados compartilhada por todas as páginas.
+
+Cada granularidade (semanal, mensal, trimestral) é lida do CSV uma única vez
+por processo, convertida para tipos compactos e gravada em Parquet ao lado do
+CSV. As páginas recebem apenas visões somente-leitura da mesma tabela.
+
+A tabela fica ordenada por (região, estado, data), com uma tabela de
+deslocamentos: as linhas de um estado ou de uma região são um intervalo
+contíguo, e `fatia` as entrega sem varredura nem cópia.
+
+A variável de ambiente `CLIMA_PASTA_TABELAS` troca a pasta das tabelas (e do
+cache derivado delas); no lugar de cada CSV pode haver uma pasta de partes
+Parquet com o mesmo nome, como as geradas por `modulos.sintetico`.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modulos import calendario, instrumentacao
+
+# Copy-on-Write garante que as visões entregues às páginas nunca alterem a
+# tabela compartilhada (no pandas 3 ele já é o comportamento padrão).
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# --- LOCALIZAÇÃO DOS ARQUIVOS ---
+PASTA_DADOS = Path(__file__).resolve().parent.parent / "dataframe"
+PASTA_TABELAS = Path(os.environ.get("CLIMA_PASTA_TABELAS", PASTA_DADOS))
+PASTA_CACHE = PASTA_TABELAS / "cache"
+
+# Incrementar sempre que _tipar mudar, para invalidar os Parquets antigos
+VERSAO_ESQUEMA = 3
+
+# --- ESQUEMA DE CADA GRANULARIDADE ---
+TABELAS = {
+    "semanal": {
+        "arquivo": "clima_brasil_semanal_refinado_2015.csv",
+        "data": "semana_ref",
+        "medidas": ['chuva_media_semanal', 'temperatura_media', 'umidade_media',
+                    'vento_medio', 'pressao_media', 'radiacao_media'],
+    },
+    "mensal": {
+        "arquivo": "clima_brasil_mensal_refinado_2015.csv",
+        "data": "periodo_ref",
+        "medidas": ['chuva_media_acumulada', 'temperatura_media', 'umidade_media',
+                    'vento_medio_kmh', 'pressao_media_inHg', 'radiacao_media'],
+    },
+    "trimestral": {
+        "arquivo": "clima_brasil_trimestral_refinado_2015.csv",
+        "data": "periodo_ref",
+        "medidas": ['chuva_media_acumulada', 'temperatura_media', 'umidade_media',
+                    'vento_medio_kmh', 'pressao_media_inHg', 'radiacao_media'],
+    },
+}
+
+
+def _tipar(df, granularidade):
+    """Converte a tabela lida do CSV para tipos compactos."""
+    esquema = TABELAS[granularidade]
+    col_data = esquema["data"]
+
+    df[col_data] = pd.to_datetime(df[col_data])
+    df['region'] = df['region'].astype('category')
+    df['state'] = df['state'].astype('category')
+    df[esquema["medidas"]] = df[esquema["medidas"]].astype('float32')
+
+    # Colunas de calendário usadas por praticamente todas as páginas
+    df['ano'] = df[col_data].dt.year.astype('int16')
+    df['mes'] = df[col_data].dt.month.astype('int8')
+
+    # Calendário sazonal calculado uma única vez, por consulta vetorizada
+    sazonal = calendario.calendario_sazonal(df['ano'], df['mes'])
+    for col in sazonal.columns:
+        df[col] = sazonal[col].array
+
+    # Estados e regiões em blocos contíguos (base de `fatia`)
+    return df.sort_values(['region', 'state', col_data], kind='stable').reset_index(drop=True)
+
+
+def origem(granularidade):
+    """CSV da granularidade ou, se ele não existir, a pasta de partes Parquet de mesmo nome."""
+    csv = PASTA_TABELAS / TABELAS[granularidade]["arquivo"]
+    partes = csv.with_suffix('')
+    return partes if not csv.exists() and partes.is_dir() else csv
+
+
+def modificado_em(granularidade):
+    """Instante da última alteração da origem (a parte mais recente, se particionada)."""
+    caminho = origem(granularidade)
+    if caminho.is_dir():
+        return max((p.stat().st_mtime for p in caminho.glob('*.parquet')), default=0)
+    return caminho.stat().st_mtime
+
+
+def _ler_tabela(granularidade):
+    """Lê o Parquet em cache ou, se estiver ausente/desatualizado, a origem (CSV ou partes)."""
+    fonte = origem(granularidade)
+    parquet = PASTA_CACHE / f"{fonte.stem}.v{VERSAO_ESQUEMA}.parquet"
+
+    if parquet.exists() and parquet.stat().st_mtime >= modificado_em(granularidade):
+        try:
+            return pd.read_parquet(parquet)
+        except Exception:
+            pass  # Parquet corrompido ou sem engine: cai para a origem
+
+    bruto = pd.read_parquet(fonte) if fonte.is_dir() else pd.read_csv(fonte)
+    df = _tipar(bruto, granularidade)
+    try:
+        PASTA_CACHE.mkdir(exist_ok=True)
+        df.to_parquet(parquet, index=False)
+    except Exception:
+        pass  # Sem permissão de escrita ou sem pyarrow: segue só em memória
+    return df
+
+
+@instrumentacao.em_cache('dados.tabela', st.cache_resource, show_spinner=False)
+def _tabela_compartilhada(granularidade):
+    """Uma única cópia por processo, compartilhada entre sessões e páginas."""
+    return _ler_tabela(granularidade)
+
+
+def carregar(granularidade="semanal"):
+    """Retorna uma visão somente-leitura da tabela da granularidade pedida.
+
+    A visão não copia os dados: com Copy-on-Write, qualquer coluna criada ou
+    alterada pela página fica apenas na visão, nunca na tabela compartilhada.
+    """
+    if granularidade not in TABELAS:
+        raise ValueError(f"Granularidade desconhecida: {granularidade}")
+    return _tabela_compartilhada(granularidade).copy(deep=False)
+
+
+@instrumentacao.em_cache('dados.tabela_completa', st.cache_resource, show_spinner=False)
+def _tabela_completa(granularidade):
+    medidas = TABELAS[granularidade]["medidas"]
+    return _tabela_compartilhada(granularidade).dropna(subset=medidas).reset_index(drop=True)
+
+
+def carregar_completos(granularidade="semanal"):
+    """Como `carregar`, mas só com as linhas sem lacunas em nenhuma medida (base dos modelos)."""
+    if granularidade not in TABELAS:
+        raise ValueError(f"Granularidade desconhecida: {granularidade}")
+    return _tabela_completa(granularidade).copy(deep=False)
+
+
+# --- FATIAS POR ESTADO/REGIÃO ---
+
+def blocos(df, coluna):
+    """{valor: slice} das linhas de cada valor de `coluna`, que precisam ser contíguas.
+
+    Uma passada pelos códigos da categoria; em tabelas ordenadas por essa
+    coluna (ou por uma que a contém, como região → estado), cada valor é um
+    único intervalo.
+    """
+    codigos = df[coluna].cat.codes.to_numpy()
+    quebras = np.flatnonzero(codigos[1:] != codigos[:-1]) + 1
+    inicios, fins = np.r_[0, quebras], np.r_[quebras, len(codigos)]
+    if len(codigos) == 0:
+        return {}
+    nomes = df[coluna].cat.categories.astype(str)[codigos[inicios]]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError(f"Linhas de '{coluna}' não estão contíguas: ordene a tabela antes")
+    return {nome: slice(int(a), int(b)) for nome, a, b in zip(nomes, inicios, fins)}
+
+
+@instrumentacao.em_cache('dados.indice', st.cache_resource, show_spinner=False)
+def _indice(granularidade, completos):
+    tabela = (_tabela_completa if completos else _tabela_compartilhada)(granularidade)
+    return {'state': blocos(tabela, 'state'), 'region': blocos(tabela, 'region')}
+
+
+def estados(granularidade="semanal"):
+    """Siglas dos estados presentes, em ordem alfabética (sem varrer a tabela)."""
+    return sorted(_indice(granularidade, False)['state'])
+
+
+def fatia(granularidade="semanal", estado=None, regiao=None, completos=False):
+    """Linhas de um estado (ou de uma região) como fatia contígua da tabela compartilhada.
+
+    Custo O(1): a posição vem da tabela de deslocamentos e a fatia compartilha
+    a memória da tabela (Copy-on-Write protege a original de alterações).
+    Estado ou região ausente devolve uma tabela vazia com as mesmas colunas.
+    """
+    if granularidade not in TABELAS:
+        raise ValueError(f"Granularidade desconhecida: {granularidade}")
+    nivel, chave = ('state', estado) if estado is not None else ('region', regiao)
+    tabela = (_tabela_completa if completos else _tabela_compartilhada)(granularidade)
+    return tabela.iloc[_indice(granularidade, completos)[nivel].get(str(chave), slice(0, 0))]
+
+
+def carregar_semanal():
+    return carregar("semanal")
+
+
+def carregar_mensal():
+    return carregar("mensal")
+
+
+def carregar_trimestral():
+    return carregar("trimestral")
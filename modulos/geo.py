@@ -0,0 +1,164 @@
+"""Geometria dos estados brasileiros, offline, simplificada e quantizada.
+
+O ativo `dataframe/brasil_estados.topo.json` guarda os polígonos já
+simplificados (Douglas-Peucker) em três níveis de tolerância e codificados como
+no TopoJSON: coordenadas quantizadas numa grade inteira e gravadas como
+diferenças entre pontos consecutivos. Ele é lido uma vez por processo e
+decodificado para o GeoJSON que o Plotly espera.
+
+Geração/atualização do ativo (única etapa que precisa de rede):
+    python -m modulos.geo
+"""
+import json
+
+import numpy as np
+import requests
+import streamlit as st
+
+from modulos import dados, instrumentacao
+
+URL_ORIGEM = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+ARQUIVO_ATIVO = dados.PASTA_DADOS / "brasil_estados.topo.json"
+
+# Tolerâncias de simplificação (graus). 'medio' é o padrão dos mapas animados.
+NIVEIS = {"alto": 0.005, "medio": 0.02, "baixo": 0.06}
+
+# Resolução da grade de quantização em cada eixo
+QUANTIZACAO = 100_000
+
+
+# --- SIMPLIFICAÇÃO E CODIFICAÇÃO ---
+
+def _douglas_peucker(pontos, tolerancia):
+    """Índices mantidos de uma linha pelo algoritmo de Douglas-Peucker."""
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, len(pontos) - 1)]
+    while pilha:
+        ini, fim = pilha.pop()
+        if fim - ini < 2:
+            continue
+        a, b = pontos[ini], pontos[fim]
+        meio = pontos[ini + 1:fim]
+        ab = b - a
+        norma = np.hypot(*ab)
+        if norma == 0:
+            dist = np.hypot(*(meio - a).T)
+        else:
+            dist = np.abs(ab[0] * (meio[:, 1] - a[1]) - ab[1] * (meio[:, 0] - a[0])) / norma
+        k = int(np.argmax(dist))
+        if dist[k] > tolerancia:
+            idx = ini + 1 + k
+            manter[idx] = True
+            pilha.append((ini, idx))
+            pilha.append((idx, fim))
+    return manter
+
+
+def _simplificar_anel(anel, tolerancia):
+    pontos = np.asarray(anel, dtype='float64')
+    simplificado = pontos[_douglas_peucker(pontos, tolerancia)]
+    return simplificado if len(simplificado) >= 4 else None
+
+
+def _poligonos(geometria):
+    if geometria["type"] == "Polygon":
+        return [geometria["coordinates"]]
+    return geometria["coordinates"]
+
+
+def _codificar(anel, transform):
+    """Quantiza o anel e grava como lista plana [x0, y0, dx1, dy1, ...]."""
+    escala, origem = transform["scale"], transform["translate"]
+    q = np.round((anel - origem) / escala).astype('int64')
+    delta = np.vstack([q[:1], np.diff(q, axis=0)])
+    return delta.ravel().tolist()
+
+
+def construir_ativo(geojson):
+    """Gera o ativo compacto a partir do GeoJSON de alta resolução."""
+    todos = np.concatenate([np.asarray(anel, dtype='float64')
+                            for f in geojson["features"]
+                            for poligono in _poligonos(f["geometry"])
+                            for anel in poligono])
+    minimo, maximo = todos.min(axis=0), todos.max(axis=0)
+    transform = {"scale": ((maximo - minimo) / (QUANTIZACAO - 1)).tolist(),
+                 "translate": minimo.tolist()}
+
+    estados = []
+    for f in geojson["features"]:
+        props = f["properties"]
+        niveis = {}
+        for nivel, tolerancia in NIVEIS.items():
+            poligonos = []
+            # Do maior para o menor, para nunca descartar o território principal
+            for poligono in sorted(_poligonos(f["geometry"]), key=lambda p: -len(p[0])):
+                aneis = [_simplificar_anel(anel, tolerancia) for anel in poligono]
+                if aneis[0] is None:
+                    if poligonos:
+                        continue  # Ilha menor que a tolerância
+                    aneis[0] = np.asarray(poligono[0], dtype='float64')
+                poligonos.append([_codificar(a, transform) for a in aneis if a is not None])
+            niveis[nivel] = poligonos
+        estados.append({"sigla": props["sigla"], "nome": props.get("name", props["sigla"]),
+                        "niveis": niveis})
+
+    return {"transform": transform, "niveis": list(NIVEIS), "estados": estados}
+
+
+def atualizar_ativo(url=URL_ORIGEM):
+    """Baixa a geometria original, gera o ativo e grava ao lado dos CSVs."""
+    resposta = requests.get(url, timeout=30)
+    resposta.raise_for_status()
+    ativo = construir_ativo(resposta.json())
+    ARQUIVO_ATIVO.write_text(json.dumps(ativo, separators=(",", ":")), encoding="utf-8")
+    return ativo
+
+
+# --- DECODIFICAÇÃO ---
+
+def _decodificar(plano, transform):
+    q = np.cumsum(np.asarray(plano, dtype='int64').reshape(-1, 2), axis=0)
+    coords = np.round(q * transform["scale"] + transform["translate"], 5)
+    return coords.tolist()
+
+
+def decodificar(ativo, nivel="medio"):
+    """Converte o ativo em um FeatureCollection GeoJSON (properties.sigla)."""
+    transform = ativo["transform"]
+    features = []
+    for estado in ativo["estados"]:
+        poligonos = [[_decodificar(anel, transform) for anel in poligono]
+                     for poligono in estado["niveis"][nivel]]
+        features.append({
+            "type": "Feature",
+            "id": estado["sigla"],
+            "properties": {"sigla": estado["sigla"], "name": estado["nome"]},
+            "geometry": {"type": "MultiPolygon", "coordinates": poligonos},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+@st.cache_resource(show_spinner=False)
+def _ativo():
+    if not ARQUIVO_ATIVO.exists():
+        # Sem o ativo versionado: gera uma vez (precisa de rede) e segue offline depois
+        return atualizar_ativo()
+    return json.loads(ARQUIVO_ATIVO.read_text(encoding="utf-8"))
+
+
+@instrumentacao.em_cache('geo.geojson', st.cache_resource, show_spinner=False)
+def carregar_geojson(nivel="medio"):
+    """GeoJSON dos estados no nível de simplificação pedido.
+
+    O dicionário é compartilhado entre sessões: trate-o como somente-leitura.
+    Falhas (ativo ausente e download indisponível) sobem para a página e não
+    ficam no cache: a próxima chamada tenta de novo.
+    """
+    if nivel not in NIVEIS:
+        raise ValueError(f"Nível de simplificação desconhecido: {nivel}")
+    return decodificar(_ativo(), nivel)
+
+
+if __name__ == "__main__":
+    atualizar_ativo()
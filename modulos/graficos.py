@@ -0,0 +1,246 @@
+"""Construtores de figuras Plotly com payload enxuto, compartilhados pelas páginas."""
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Enquadramento padrão do Brasil nos mapas
+CENTRO_BRASIL = {"lat": -15.0, "lon": -54.0}
+
+# Box plots/violinos montados no servidor: só o resumo de cada grupo vai ao navegador
+MAX_OUTLIERS = 100  # Por grupo; acima disso ficam os mais distantes da mediana
+N_GRADE_KDE = 128  # Pontos da curva de densidade
+N_CAIXAS_KDE = 512  # Caixas da pré-agregação (binning) antes do kernel
+
+# Painel filtrado no navegador (HTML + Plotly.js da própria instalação do plotly.py)
+MODELO_PAINEL = Path(__file__).with_name("painel_cliente.html")
+PASTA_ESTATICA = Path(__file__).resolve().parent.parent / "static"  # Servida pelo Streamlit em app/static/
+
+
+def choropleth_animado(tabela, frame, valor, geojson, escala="Viridis", faixa=None,
+                       titulo_cor=None, titulo=None, duracao=800, altura=600):
+    """Mapa coroplético animado em modo "delta de frames".
+
+    A geometria vai uma única vez no traço base; cada frame carrega apenas o
+    vetor de valores por estado (um float por UF). `tabela` deve estar no
+    formato longo [frame, state, valor], já na ordem cronológica dos frames.
+    """
+    tabela = tabela.assign(state=tabela['state'].astype(str))
+    rotulos = list(dict.fromkeys(tabela[frame].astype(str)))
+    estados = sorted(tabela['state'].unique())
+    matriz = (tabela.assign(**{frame: tabela[frame].astype(str)})
+              .pivot(index=frame, columns='state', values=valor)
+              .reindex(index=rotulos, columns=estados))
+    valores = np.round(matriz.to_numpy(dtype='float64'), 3)
+
+    def _z(linha):
+        return [None if np.isnan(v) else float(v) for v in linha]
+
+    fig = go.Figure(
+        data=[go.Choroplethmapbox(
+            geojson=geojson,
+            locations=estados,
+            featureidkey="properties.sigla",
+            z=_z(valores[0]),
+            coloraxis="coloraxis",
+            marker_opacity=0.9,
+            marker_line_width=0.5,
+            hovertemplate="%{location}: %{z:.2f}<extra></extra>",
+        )],
+        frames=[go.Frame(name=r, data=[go.Choroplethmapbox(z=_z(linha))], traces=[0])
+                for r, linha in zip(rotulos, valores)],
+    )
+
+    animar = dict(frame=dict(duration=duracao, redraw=True), transition=dict(duration=0))
+    fig.update_layout(
+        height=altura,
+        title=titulo,
+        mapbox=dict(style="carto-positron", zoom=3.0, center=CENTRO_BRASIL),
+        coloraxis=dict(
+            colorscale=escala,
+            cmin=faixa[0] if faixa else None,
+            cmax=faixa[1] if faixa else None,
+            colorbar=dict(title=titulo_cor),
+        ),
+        updatemenus=[dict(
+            type="buttons", direction="left", x=0.1, y=0, xanchor="right", yanchor="top",
+            pad=dict(r=10, t=70), showactive=False,
+            buttons=[
+                dict(label="▶", method="animate", args=[None, dict(animar, fromcurrent=True)]),
+                dict(label="◼", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+            ],
+        )],
+        sliders=[dict(
+            active=0, x=0.1, y=0, len=0.9, xanchor="left", yanchor="top", pad=dict(b=10, t=50),
+            currentvalue=dict(prefix=f"{frame}=" if frame else ""),
+            steps=[dict(label=r, method="animate", args=[[r], dict(animar, mode="immediate")])
+                   for r in rotulos],
+        )],
+    )
+    return fig
+
+
+# --- PAINEL COM FILTROS NO NAVEGADOR ---
+
+def pacote_cliente(serie, medida, regiao_por_estado):
+    """Matriz estado × mês de uma medida, no formato compacto enviado ao navegador.
+
+    `serie` vem de `cubo.serie(..., 'state', medida, 'mes')` (média por estado e
+    mês); `regiao_por_estado` mapeia cada sigla para a sua região.
+    """
+    matriz = serie.pivot(index='state', columns='periodo', values=medida).sort_index()
+    valores = np.round(matriz.to_numpy(dtype='float64'), 2)
+    return {
+        'estados': list(matriz.index),
+        'regioes': [regiao_por_estado[e] for e in matriz.index],
+        'periodos': [p.strftime('%Y-%m-%d') for p in matriz.columns],
+        'valores': [[None if np.isnan(v) else float(v) for v in linha] for linha in valores],
+    }
+
+
+@lru_cache(maxsize=1)
+def _url_plotly_js():
+    """Endereço do Plotly.js servido como arquivo estático do app.
+
+    Na primeira chamada do processo grava em `static/` a cópia que vem com o
+    plotly.py (o nome leva a versão). O Streamlit serve a pasta em
+    `app/static/` (`enableStaticServing` em `.streamlit/config.toml`), e o
+    navegador baixa o arquivo uma vez e o mantém em cache.
+    """
+    import plotly
+    from plotly.offline import get_plotlyjs
+    nome = f"plotly-{plotly.__version__}.min.js"
+    arquivo = PASTA_ESTATICA / nome
+    if not arquivo.exists():
+        PASTA_ESTATICA.mkdir(exist_ok=True)
+        temporario = arquivo.with_suffix(f'.{os.getpid()}.tmp')
+        temporario.write_text(get_plotlyjs(), encoding='utf-8')
+        temporario.replace(arquivo)
+    return f"app/static/{nome}"  # Relativo à página: respeita o server.baseUrlPath
+
+
+def painel_cliente(pacote, rotulo, cores_regioes, cores_estados, config=None):
+    """HTML autocontido: filtros de região, estado e ano aplicados em JavaScript.
+
+    Os dados chegam uma única vez; cada interação só redesenha os gráficos no
+    navegador, sem rerun no servidor. O Plotly.js vem do próprio servidor do
+    app, não do CDN (implantações offline ou com firewall), e fica fora do
+    HTML: cada render leva só os dados.
+    """
+    dados = dict(pacote, rotulo=rotulo, config=config or {},
+                 cores_regioes={str(k): v for k, v in cores_regioes.items()},
+                 cores_estados={str(k): v for k, v in cores_estados.items()})
+    html = MODELO_PAINEL.read_text(encoding='utf-8')
+    html = html.replace('__DADOS__', json.dumps(dados, separators=(',', ':'), ensure_ascii=False))
+    return html.replace('__PLOTLY_URL__', _url_plotly_js())
+
+
+# --- BOX PLOT E VIOLINO COM ESTATÍSTICAS PRÉ-CALCULADAS ---
+
+def _quantis(pontos, pesos, qs):
+    """Quantis ponderados (mesma interpolação dos esboços do cubo)."""
+    ordem = np.argsort(pontos, kind='stable')
+    pontos, pesos = pontos[ordem], pesos[ordem]
+    acumulado = np.cumsum(pesos) - 0.5 * pesos
+    return np.interp(np.asarray(qs) * pesos.sum(), acumulado, pontos)
+
+
+def _densidade(pontos, pesos, desvio, iqr):
+    """KDE gaussiana com banda de Silverman, sobre um histograma fino (custo fixo)."""
+    n = pesos.sum()
+    escala = min(desvio, iqr / 1.34) if iqr > 0 else desvio
+    banda = 0.9 * escala * n ** -0.2 if escala > 0 else 1.0
+    lo, hi = pontos.min() - 3 * banda, pontos.max() + 3 * banda
+    contagem, bordas = np.histogram(pontos, bins=N_CAIXAS_KDE, range=(lo, hi), weights=pesos)
+    centros = (bordas[:-1] + bordas[1:]) / 2
+    grade = np.linspace(pontos.min(), pontos.max(), N_GRADE_KDE)
+    nucleo = np.exp(-0.5 * ((grade[:, None] - centros[None, :]) / banda) ** 2)
+    return grade, nucleo @ contagem / (n * banda * np.sqrt(2 * np.pi))
+
+
+def resumo_caixa(pontos, pesos=None, minimo=None, maximo=None, media=None, desvio=None, kde=True):
+    """Quartis, cercas (1,5·IQR, como o Plotly), média, desvio, outliers e densidade.
+
+    Aceita a amostra bruta ou os pontos ponderados de `cubo.distribuicao`; nesse
+    caso `minimo`/`maximo`/`media`/`desvio` exatos do cubo têm precedência.
+    """
+    pontos = np.asarray(pontos, dtype='float64')
+    pesos = np.ones_like(pontos) if pesos is None else np.asarray(pesos, dtype='float64')
+    ok = ~np.isnan(pontos)
+    pontos, pesos = pontos[ok], pesos[ok]
+    if minimo is not None:
+        pontos, pesos = np.r_[pontos, minimo, maximo], np.r_[pesos, 0, 0]  # Extremos exatos, sem peso
+
+    q1, mediana, q3 = _quantis(pontos, pesos, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    dentro = (pontos >= q1 - 1.5 * iqr) & (pontos <= q3 + 1.5 * iqr)
+    fora = np.unique(pontos[~dentro])
+    if len(fora) > MAX_OUTLIERS:
+        fora = fora[np.argsort(-np.abs(fora - mediana))[:MAX_OUTLIERS]]
+    if media is None:
+        media = np.average(pontos, weights=pesos)
+        n = pesos.sum()
+        desvio = np.sqrt((pesos * (pontos - media) ** 2).sum() / (n - 1)) if n > 1 else 0.0
+
+    resumo = {'q1': q1, 'median': mediana, 'q3': q3, 'lowerfence': pontos[dentro].min(),
+              'upperfence': pontos[dentro].max(), 'mean': media, 'sd': desvio,
+              'outliers': np.sort(fora), 'n': pesos.sum()}
+    if kde and len(pontos) > 1 and pontos.max() > pontos.min():
+        resumo['grade'], resumo['densidade'] = _densidade(pontos[pesos > 0], pesos[pesos > 0], desvio, iqr)
+    return resumo
+
+
+def _caixa(r, posicao, nome, cor, largura=None, horizontal=False):
+    estat = {k: [float(r[k])] for k in ('q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean', 'sd')}
+    eixo = {'y': [posicao], 'orientation': 'h', 'hoverinfo': 'x'} if horizontal else {'x': [posicao], 'hoverinfo': 'y'}
+    return go.Box(name=nome, marker_color=cor, width=largura, showlegend=False, boxmean='sd', **eixo, **estat)
+
+
+def _outliers(r, posicao, nome, cor, horizontal=False):
+    valores = r['outliers'].round(4)
+    posicoes = [posicao] * len(valores)
+    x, y = (valores, posicoes) if horizontal else (posicoes, valores)
+    return go.Scatter(x=x, y=y, mode='markers', marker=dict(color=cor, size=4), name=nome, showlegend=False,
+                      hovertemplate=f"%{{{'x' if horizontal else 'y'}:.2f}}<extra></extra>")
+
+
+def tracos_caixa(resumos, cores=None, horizontal=False):
+    """Traços de box plot (um por grupo + outliers) a partir de `resumo_caixa`."""
+    cores = cores or {}
+    tracos = []
+    for nome, r in resumos.items():
+        tracos.append(_caixa(r, nome, nome, cores.get(nome), horizontal=horizontal))
+        if len(r['outliers']):
+            tracos.append(_outliers(r, nome, nome, cores.get(nome), horizontal))
+    return tracos
+
+
+def figura_distribuicao(resumos, cores=None, formato='box'):
+    """Box plots (ou violinos) de vários grupos a partir de `resumo_caixa`.
+
+    O payload cresce com o número de grupos (e de outliers, limitado), não com
+    o número de observações.
+    """
+    if formato != 'violino':
+        return go.Figure(tracos_caixa(resumos, cores))
+
+    cores = cores or {}
+    fig = go.Figure()
+    nomes = list(resumos)
+    for i, nome in enumerate(nomes):
+        r, cor = resumos[nome], cores.get(nome)
+        if 'densidade' in r:
+            meia = 0.45 * r['densidade'] / r['densidade'].max()
+            fig.add_trace(go.Scatter(
+                x=np.r_[i - meia, (i + meia)[::-1]].round(4), y=np.r_[r['grade'], r['grade'][::-1]].round(4),
+                fill='toself', mode='lines', line=dict(color=cor, width=1), name=nome,
+                showlegend=False, hoverinfo='skip'))
+        fig.add_trace(_caixa(r, i, nome, cor, largura=0.08))
+        if len(r['outliers']):
+            fig.add_trace(_outliers(r, i, nome, cor))
+    fig.update_xaxes(tickmode='array', tickvals=list(range(len(nomes))), ticktext=nomes)
+    return fig
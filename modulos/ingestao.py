@@ -0,0 +1,404 @@
+"""Ingestão incremental dos arquivos horários do INMET.
+
+Gera as tabelas refinadas (semanal, mensal e trimestral) a partir dos CSVs
+brutos por estação (um arquivo por estação e ano, como no pacote anual do
+INMET), colocados em `dataframe/inmet/`.
+
+Fluxo:
+1. Cada arquivo é lido em lotes (`LOTE` linhas), limpo (-9999 e valores fora
+   da faixa física viram NaN) e reduzido a parciais DIÁRIOS por estação
+   (soma e contagem de cada medida). Parciais são combináveis: somar os de
+   dois lotes é o mesmo que processar os dois juntos.
+2. A marca d'água (último instante ingerido por estação) sai do próprio
+   diário: cada linha guarda o `ultimo` instante somado a ela, e cada arquivo
+   `diario_<ano>.parquet` é trocado de forma atômica. Numa nova execução, só
+   linhas posteriores à marca entram, então uma falha no meio nunca soma o
+   mesmo trecho duas vezes. Linhas ANTERIORES à marca que mudaram no arquivo
+   (reenvio ou correção do INMET) não entram: são contadas e avisadas, e só
+   `--completo` as incorpora.
+3. Apenas os períodos (estado × semana/mês/trimestre) tocados por dias novos
+   são recalculados e substituídos nas tabelas refinadas. Uma linha que já
+   existe só é substituída se o diário cobre o período inteiro. Os dias pendentes
+   ficam em `controle.json` até o recálculo terminar, junto com a assinatura
+   dos arquivos já lidos (que nem são abertos de novo se não mudarem).
+
+Convenções das tabelas refinadas: a chuva é o acumulado do período em cada
+estação; as demais medidas são a média horária do período em cada estação.
+O valor do estado é a média entre as suas estações. A radiação considera só
+as horas com radiação positiva (dia). Os dias seguem a hora de Brasília.
+
+Uso:
+    python -m modulos.ingestao            # incremental
+    python -m modulos.ingestao --completo # descarta o estado e reprocessa tudo
+"""
+import argparse
+import json
+import shutil
+import unicodedata
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from modulos import dados
+
+PASTA_BRUTOS = dados.PASTA_DADOS / "inmet"
+PASTA_INGESTAO = dados.PASTA_CACHE / "ingestao"
+CONTROLE = PASTA_INGESTAO / "controle.json"
+LOTE = 100_000  # Linhas por lote na leitura dos arquivos brutos
+FUSO_BRASILIA = pd.Timedelta(hours=-3)
+
+# Prefixo (sem acentos, maiúsculo) da coluna do INMET -> nome interno
+COLUNAS_INMET = {
+    'DATA': 'data',
+    'HORA': 'hora',
+    'PRECIPITACAO TOTAL': 'chuva',
+    'PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO': 'pressao',
+    'RADIACAO GLOBAL': 'radiacao',
+    'TEMPERATURA DO AR - BULBO SECO': 'temperatura',
+    'UMIDADE RELATIVA DO AR, HORARIA': 'umidade',
+    'VENTO, VELOCIDADE HORARIA': 'vento',
+}
+MEDIDAS = ['chuva', 'pressao', 'radiacao', 'temperatura', 'umidade', 'vento']
+CHAVES_DIARIO = ['estacao', 'region', 'state', 'data']
+
+# Faixa física aceita para cada medida (fora dela é erro de sensor)
+FAIXAS = {
+    'chuva': (0, 150),
+    'pressao': (700, 1100),
+    'radiacao': (0, 6000),
+    'temperatura': (-15, 50),
+    'umidade': (1, 100),
+    'vento': (0, 60),
+}
+
+# Medida interna -> coluna de saída em cada granularidade (e fator de unidade)
+SAIDAS = {
+    'semanal': {
+        'chuva': ('chuva_media_semanal', 1.0),
+        'temperatura': ('temperatura_media', 1.0),
+        'umidade': ('umidade_media', 1.0),
+        'vento': ('vento_medio', 1.0),
+        'pressao': ('pressao_media', 1.0),
+        'radiacao': ('radiacao_media', 1.0),
+    },
+    'mensal': {
+        'chuva': ('chuva_media_acumulada', 1.0),
+        'temperatura': ('temperatura_media', 1.0),
+        'umidade': ('umidade_media', 1.0),
+        'vento': ('vento_medio_kmh', 3.6),  # m/s -> km/h
+        'pressao': ('pressao_media_inHg', 0.0295300),  # mB -> inHg
+        'radiacao': ('radiacao_media', 1.0),
+    },
+}
+SAIDAS['trimestral'] = SAIDAS['mensal']
+
+
+# --- LEITURA DOS ARQUIVOS BRUTOS ---
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode()
+    return texto.strip().upper()
+
+
+def ler_cabecalho(arquivo):
+    """Metadados das 8 primeiras linhas (região, UF, código da estação)."""
+    meta = {}
+    with open(arquivo, encoding='latin-1') as f:
+        for _ in range(8):
+            chave, _, valor = f.readline().partition(';')
+            meta[_normalizar(chave).rstrip(':')] = valor.strip().strip(';')
+    return {
+        'region': meta.get('REGIAO', ''),
+        'state': meta.get('UF', ''),
+        'estacao': meta.get('CODIGO (WMO)', arquivo.stem),
+    }
+
+
+def _renomear(colunas):
+    mapa = {}
+    for col in colunas:
+        nome = _normalizar(col)
+        for prefixo, interno in COLUNAS_INMET.items():
+            if nome.startswith(prefixo) and interno not in mapa.values():
+                mapa[col] = interno
+                break
+    return mapa
+
+
+def _limpar(lote):
+    """Instante (hora de Brasília) + medidas numéricas dentro da faixa física."""
+    data = lote['data'].astype(str).str.replace('/', '-', regex=False)
+    hora = lote['hora'].astype(str).str.replace(':', '', regex=False).str[:2]
+    instante = pd.to_datetime(data + ' ' + hora, format='%Y-%m-%d %H', errors='coerce') + FUSO_BRASILIA
+
+    limpo = pd.DataFrame({'instante': instante})
+    for medida in MEDIDAS:
+        limpo[medida] = pd.to_numeric(lote[medida], errors='coerce') if medida in lote else np.nan
+        minimo, maximo = FAIXAS[medida]  # Também descarta o -9999 (sem leitura)
+        limpo[medida] = limpo[medida].where(limpo[medida].between(minimo, maximo))
+    limpo['radiacao'] = limpo['radiacao'].where(limpo['radiacao'] > 0)  # Só horas de sol
+    return limpo.dropna(subset=['instante'])
+
+
+def ler_em_lotes(arquivo, tamanho_lote=LOTE):
+    """Lotes limpos de um arquivo horário do INMET (memória limitada ao lote)."""
+    leitor = pd.read_csv(arquivo, sep=';', encoding='latin-1', skiprows=8,
+                         dtype=str, chunksize=tamanho_lote)
+    for lote in leitor:
+        lote = lote.rename(columns=_renomear(lote.columns))
+        for medida in MEDIDAS:
+            if medida in lote:
+                lote[medida] = lote[medida].str.replace(',', '.', regex=False)
+        yield _limpar(lote)
+
+
+# --- PARCIAIS DIÁRIOS ---
+
+def parciais_diarios(limpo, meta):
+    """Soma e contagem de cada medida por dia, mais o último instante somado."""
+    dia = limpo['instante'].dt.normalize().rename('data')
+    valores = limpo[MEDIDAS]
+    g = pd.concat([valores.fillna(0).add_suffix('_soma'), valores.notna().add_suffix('_n')], axis=1)
+    parciais = g.groupby(dia).sum()
+    parciais['ultimo'] = limpo['instante'].groupby(dia).max()
+    parciais = parciais.reset_index()
+    for chave in ('estacao', 'region', 'state'):
+        parciais[chave] = meta[chave]
+    return parciais
+
+
+def _combinar(*tabelas):
+    tabela = pd.concat([t for t in tabelas if t is not None and len(t)], ignore_index=True)
+    if tabela.empty:
+        return tabela
+    regras = {c: 'max' if c == 'ultimo' else 'sum' for c in tabela.columns if c not in CHAVES_DIARIO}
+    return tabela.groupby(CHAVES_DIARIO, as_index=False).agg(regras)
+
+
+def _arquivo_diario(ano):
+    return PASTA_INGESTAO / f"diario_{ano}.parquet"
+
+
+def _ler_diario(anos):
+    partes = [pd.read_parquet(_arquivo_diario(a)) for a in sorted(anos) if _arquivo_diario(a).exists()]
+    return pd.concat(partes, ignore_index=True) if partes else None
+
+
+def _gravar_diario(novos):
+    """Soma os parciais novos aos já gravados, reescrevendo só os anos afetados.
+
+    Anos em ordem crescente e cada arquivo trocado de uma vez: se a execução
+    cair no meio, a marca de cada estação (o maior `ultimo` gravado) fica
+    exatamente no fim do que já foi somado.
+    """
+    for ano, bloco in novos.groupby(novos['data'].dt.year):
+        combinado = _combinar(_ler_diario([ano]), bloco)
+        temporario = _arquivo_diario(ano).with_suffix('.tmp')
+        combinado.to_parquet(temporario, index=False)
+        temporario.replace(_arquivo_diario(ano))
+
+
+def _atrasados(relidos):
+    """Dias-estação anteriores à marca com linhas novas ou alteradas no arquivo bruto.
+
+    Compara os parciais relidos com os gravados: mais leituras que no diário
+    (reenvio) ou as mesmas leituras com outra soma (correção). Um dia dividido
+    entre dois arquivos (virada do ano em UTC) tem menos leituras e não conta.
+    """
+    gravado = _ler_diario(relidos['data'].dt.year.unique())
+    if gravado is None:
+        return relidos[['estacao', 'data']]
+    junto = relidos.merge(gravado, on=['estacao', 'data'], how='left', suffixes=('', '_gravado'))
+    n = [f'{m}_n' for m in MEDIDAS]
+    soma = [f'{m}_soma' for m in MEDIDAS]
+    n_gravado = junto[[f'{c}_gravado' for c in n]].fillna(0).to_numpy()
+    mais = (junto[n].to_numpy() > n_gravado).any(axis=1)
+    mesmas = (junto[n].to_numpy() == n_gravado).all(axis=1)
+    outra_soma = ~np.isclose(junto[soma].to_numpy(), junto[[f'{c}_gravado' for c in soma]].to_numpy(),
+                             rtol=1e-6, equal_nan=True).all(axis=1)
+    return junto.loc[mais | (mesmas & outra_soma), ['estacao', 'data']]
+
+
+# --- CONTROLE (MARCA D'ÁGUA) ---
+
+def _marcas():
+    """Último instante já somado ao diário, por estação."""
+    partes = [pd.read_parquet(a, columns=['estacao', 'ultimo'])
+              for a in sorted(PASTA_INGESTAO.glob('diario_*.parquet'))]
+    if not partes:
+        return {}
+    return pd.concat(partes, ignore_index=True).groupby('estacao')['ultimo'].max().to_dict()
+
+
+def _ler_controle():
+    if CONTROLE.exists():
+        return json.loads(CONTROLE.read_text())
+    return {'arquivos': {}, 'pendentes': []}
+
+
+def _gravar_controle(controle):
+    temporario = CONTROLE.with_suffix('.tmp')
+    temporario.write_text(json.dumps(controle, indent=1, sort_keys=True))
+    temporario.replace(CONTROLE)
+
+
+# --- CONSOLIDAÇÃO NOS PERÍODOS ---
+
+def inicio_periodo(datas, granularidade):
+    """Data de início da semana (segunda-feira), do mês ou do trimestre."""
+    datas = pd.DatetimeIndex(datas)
+    if granularidade == 'semanal':
+        return datas.normalize() - pd.to_timedelta(datas.weekday, unit='D')
+    return datas.to_period('M' if granularidade == 'mensal' else 'Q').start_time
+
+
+def consolidar(diario, granularidade):
+    """Parciais diários -> tabela refinada (estado × período) da granularidade."""
+    col_data = dados.TABELAS[granularidade]['data']
+    diario = diario.assign(periodo=inicio_periodo(diario['data'], granularidade))
+    chaves = ['region', 'state', 'estacao', 'periodo']
+    por_estacao = diario.groupby(chaves, as_index=False).sum(numeric_only=True)
+
+    saida = por_estacao[chaves].copy()
+    for medida, (coluna, fator) in SAIDAS[granularidade].items():
+        soma, n = por_estacao[f'{medida}_soma'], por_estacao[f'{medida}_n']
+        valor = soma if medida == 'chuva' else soma / n
+        saida[coluna] = (valor * fator).where(n > 0)
+
+    colunas = [c for c, _ in SAIDAS[granularidade].values()]
+    tabela = saida.groupby(['region', 'state', 'periodo'], as_index=False)[colunas].mean()
+    tabela = tabela.rename(columns={'periodo': col_data})
+    tabela[colunas] = tabela[colunas].astype('float32')
+    return tabela[['region', 'state', col_data] + dados.TABELAS[granularidade]['medidas']]
+
+
+def _atualizar_tabela(granularidade, recalculado, cobertos):
+    """Troca, na tabela refinada, só as linhas (estado, período) recalculadas.
+
+    Uma linha que já existe só é trocada se o período está em `cobertos` (o
+    diário tem o período inteiro). Nos demais o recálculo veria só uma parte
+    dele (ex.: as 3 primeiras horas UTC de janeiro caem em 31/12 na hora de
+    Brasília) e a linha atual, que não tem somas para combinar, é mantida.
+    Retorna quantas linhas foram mantidas assim.
+    """
+    col_data = dados.TABELAS[granularidade]['data']
+    csv = dados.PASTA_TABELAS / dados.TABELAS[granularidade]['arquivo']
+    mantidas = 0
+    if csv.exists():
+        atual = pd.read_csv(csv, parse_dates=[col_data])
+        chave_atual = pd.MultiIndex.from_frame(atual[['state', col_data]])
+        chave_nova = pd.MultiIndex.from_frame(recalculado[['state', col_data]])
+        parcial = chave_nova.isin(chave_atual) & ~chave_nova.isin(pd.MultiIndex.from_frame(cobertos))
+        mantidas = int(parcial.sum())
+        recalculado = recalculado[~parcial]
+        atual = atual[~chave_atual.isin(pd.MultiIndex.from_frame(recalculado[['state', col_data]]))]
+        recalculado = pd.concat([atual, recalculado], ignore_index=True)
+    recalculado = recalculado.sort_values(['region', 'state', col_data])
+    recalculado[col_data] = recalculado[col_data].dt.strftime('%Y-%m-%d')
+    temporario = csv.with_suffix('.tmp')
+    recalculado.to_csv(temporario, index=False)
+    temporario.replace(csv)
+    return mantidas
+
+
+def _primeiros_dias():
+    """Primeiro dia do diário por estado: daí em diante a ingestão cobre os períodos."""
+    partes = [pd.read_parquet(a, columns=['state', 'data'])
+              for a in sorted(PASTA_INGESTAO.glob('diario_*.parquet'))]
+    return pd.concat(partes, ignore_index=True).groupby('state')['data'].min()
+
+
+def _recalcular(dias_afetados):
+    """Recalcula, em cada granularidade, apenas os períodos tocados pelos dias novos."""
+    primeiros = _primeiros_dias()
+    mantidas = 0
+    for granularidade in SAIDAS:
+        col_data = dados.TABELAS[granularidade]['data']
+        periodos = pd.DataFrame({
+            'state': dias_afetados['state'],
+            col_data: inicio_periodo(dias_afetados['data'], granularidade),
+        }).drop_duplicates()
+
+        # Um período pode atravessar a virada do ano (ex.: semana de 29/12)
+        inicio = periodos[col_data].min()
+        anos = range(inicio.year, dias_afetados['data'].max().year + 1)
+        diario = _ler_diario(anos)
+        diario = diario[diario['state'].isin(periodos['state'].unique()) & (diario['data'] >= inicio)]
+
+        recalculado = consolidar(diario, granularidade)
+        chave = pd.MultiIndex.from_frame(recalculado[['state', col_data]])
+        recalculado = recalculado[chave.isin(pd.MultiIndex.from_frame(periodos))]
+        cobertos = periodos[periodos[col_data] >= periodos['state'].map(primeiros)]
+        mantidas += _atualizar_tabela(granularidade, recalculado, cobertos)
+
+    if mantidas:
+        warnings.warn(f"{mantidas} linha(s) das tabelas refinadas mantida(s): o diário cobre só parte "
+                      "do período (começa depois do início dele); rode com --completo para recalculá-las.")
+
+
+# --- ORQUESTRAÇÃO ---
+
+def ingerir(pasta=PASTA_BRUTOS, completo=False, tamanho_lote=LOTE):
+    """Processa os arquivos novos/alterados e atualiza as tabelas refinadas.
+
+    Retorna um resumo com os arquivos lidos, os dias afetados e os
+    dias-estação atrasados (anteriores à marca) que foram ignorados.
+    """
+    if completo and PASTA_INGESTAO.exists():
+        shutil.rmtree(PASTA_INGESTAO)
+    PASTA_INGESTAO.mkdir(parents=True, exist_ok=True)
+    controle = _ler_controle()
+    marcas = _marcas()
+
+    novos, relidos, lidos, assinaturas = [], [], [], {}
+    for arquivo in sorted(pasta.glob('*.[cC][sS][vV]')):
+        info = arquivo.stat()
+        assinatura = {'tamanho': info.st_size, 'mtime': info.st_mtime}
+        if controle['arquivos'].get(arquivo.name) == assinatura:
+            continue  # Arquivo já ingerido e sem alteração
+
+        meta = ler_cabecalho(arquivo)
+        marca = marcas.get(meta['estacao'], pd.Timestamp('1900-01-01'))
+        for lote in ler_em_lotes(arquivo, tamanho_lote):
+            depois = lote['instante'] > marca
+            if depois.any():
+                novos.append(parciais_diarios(lote[depois], meta))
+            if not depois.all():
+                relidos.append(parciais_diarios(lote[~depois], meta))
+        assinaturas[arquivo.name] = assinatura
+        lidos.append(arquivo.name)
+
+    atrasados = _atrasados(_combinar(*relidos)) if relidos else pd.DataFrame(columns=['estacao', 'data'])
+    if len(atrasados):
+        warnings.warn(f"{len(atrasados)} dia(s)-estação anteriores à marca d'água mudaram nos arquivos brutos "
+                      f"(estações {', '.join(sorted(atrasados['estacao'].astype(str).unique()))}) e foram "
+                      "ignorados; rode com --completo para incorporá-los.")
+
+    # Dias pendentes de uma execução interrompida + os novos; o recálculo é idempotente
+    pendentes = pd.DataFrame(controle.get('pendentes', []), columns=['state', 'data'])
+    novos = _combinar(*novos) if novos else None
+    if novos is not None and len(novos):
+        pendentes = pd.concat([pendentes.assign(data=pd.to_datetime(pendentes['data'])),
+                               novos[['state', 'data']]], ignore_index=True).drop_duplicates()
+        controle['pendentes'] = [[s, d.strftime('%Y-%m-%d')] for s, d in pendentes.itertuples(index=False)]
+        _gravar_controle(controle)  # Antes do diário: falha depois dele => recálculo na próxima execução
+        _gravar_diario(novos)
+    if len(pendentes):
+        _recalcular(pendentes.assign(data=pd.to_datetime(pendentes['data'])))
+    controle['pendentes'] = []
+    controle['arquivos'].update(assinaturas)
+    _gravar_controle(controle)
+
+    return {'arquivos': lidos, 'dias': 0 if novos is None else len(novos), 'atrasados': len(atrasados)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pasta', default=str(PASTA_BRUTOS), help="Pasta com os CSVs horários do INMET")
+    parser.add_argument('--completo', action='store_true', help="Reprocessa tudo do zero")
+    args = parser.parse_args()
+    resumo = ingerir(Path(args.pasta), completo=args.completo)
+    print(f"{len(resumo['arquivos'])} arquivo(s) lido(s), {resumo['dias']} dia(s)-estação novos, "
+          f"{resumo['atrasados']} atrasado(s) ignorado(s).")
@@ -0,0 +1,125 @@
+"""Partida a frio: pré-aquecimento em segundo plano e relatório de imports.
+
+O `app.py` importa só o essencial (Streamlit, pandas, instrumentação) e
+dispara `preaquecer()`. Uma thread por processo carrega, enquanto a Home já
+está na tela, as tabelas compartilhadas e o cubo (o que o Dashboard pede
+primeiro) e depois importa as bibliotecas pesadas (scipy, scikit-learn,
+Gemini), que os módulos só importam dentro das funções que as usam.
+
+Cada etapa vira uma medição `inicio.*` no buffer da instrumentação; a página
+de diagnóstico mostra o relatório. Para a quebra completa dos imports, num
+processo limpo:
+    python -m modulos.inicializacao
+"""
+import importlib
+import re
+import subprocess
+import sys
+import threading
+import time
+
+from modulos import instrumentacao
+
+# Bibliotecas pesadas, na ordem em que as páginas costumam precisar delas
+MODULOS_PESADOS = ['plotly.express', 'scipy.stats', 'sklearn.linear_model', 'sklearn.cluster',
+                   'sklearn.ensemble', 'google.generativeai']
+
+_inicio = time.perf_counter()
+_relatorio = {'carregadores': {}, 'imports': {}, 'falhas': {}, 'pronto_ms': None}
+_trava = threading.Lock()
+_thread = None
+
+
+def _carregadores():
+    """(nome, função) de cada cache a aquecer; imports aqui para não pesar no `app.py`."""
+    from modulos import armazem, correlacao, cubo, dados, geo
+    return [
+        ('dados.semanal', lambda: dados.carregar('semanal')),
+        ('dados.mensal', lambda: dados.carregar('mensal')),
+        ('dados.completos', lambda: dados.carregar_completos('semanal')),
+        ('cubo.mensal', lambda: cubo._cubo('mensal')),
+        ('cubo.semanal', lambda: cubo._cubo('semanal')),
+        ('armazem.mensal', lambda: armazem.preparar('mensal')),
+        ('armazem.semanal', lambda: armazem.preparar('semanal')),
+        ('geo.geojson', geo.carregar_geojson),
+        ('correlacao.tensor', correlacao.tensor),
+    ]
+
+
+def _etapa(tipo, nome, func):
+    inicio = time.perf_counter()
+    try:
+        func()
+    except Exception as erro:  # Dependência ausente ou arquivo indisponível: a página trata depois
+        _relatorio['falhas'][nome] = f"{type(erro).__name__}: {erro}"
+    ms = (time.perf_counter() - inicio) * 1000
+    _relatorio[tipo][nome] = ms
+    instrumentacao.registrar(f"inicio.{tipo}", ms, detalhe=nome)
+
+
+def _preaquecer():
+    for nome, func in _carregadores():
+        _etapa('carregadores', nome, func)
+    for nome in MODULOS_PESADOS:
+        _etapa('imports', nome, lambda: importlib.import_module(nome))
+    _relatorio['pronto_ms'] = (time.perf_counter() - _inicio) * 1000
+    instrumentacao.registrar('inicio.pronto', _relatorio['pronto_ms'])
+
+
+def preaquecer():
+    """Dispara a thread de pré-aquecimento (uma vez por processo)."""
+    global _thread
+    with _trava:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=_preaquecer, name='preaquecimento', daemon=True)
+        try:
+            # Contexto da primeira sessão: os caches do Streamlit rodam sem avisos na thread
+            from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+            add_script_run_ctx(_thread, get_script_run_ctx(suppress_warning=True))
+        except Exception:
+            pass
+        _thread.start()
+
+
+def relatorio():
+    """Tempos (ms) de cada carregador e import, falhas e o instante em que tudo ficou pronto."""
+    with _trava:
+        andamento = 'concluído' if _relatorio['pronto_ms'] is not None else (
+            'em andamento' if _thread is not None else 'não iniciado')
+    return {**{k: dict(v) if isinstance(v, dict) else v for k, v in _relatorio.items()}, 'estado': andamento}
+
+
+# --- QUEBRA DOS IMPORTS (PROCESSO LIMPO) ---
+
+_LINHA_IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def tempos_de_import(modulos=None):
+    """Tempo acumulado (ms) por pacote de topo, medido com `python -X importtime`.
+
+    Por padrão mede os imports do `app.py` mais as bibliotecas pesadas das páginas.
+    """
+    modulos = modulos or ['streamlit', 'pandas', 'modulos.instrumentacao', *MODULOS_PESADOS]
+    codigo = "\n".join(f"try:\n    import {m}\nexcept ImportError:\n    pass" for m in modulos)
+    saida = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                           capture_output=True, text=True).stderr
+    pacotes = {}
+    for linha in saida.splitlines():
+        achado = _LINHA_IMPORTTIME.match(linha)
+        if achado and len(achado.group(3)) == 1:  # Só imports de primeiro nível
+            pacote = achado.group(4).split('.')[0]
+            pacotes[pacote] = pacotes.get(pacote, 0) + int(achado.group(2)) / 1000
+    return dict(sorted(pacotes.items(), key=lambda par: -par[1]))
+
+
+if __name__ == "__main__":
+    tempos = tempos_de_import()
+    total = sum(tempos.values())
+    for pacote, ms in tempos.items():
+        if ms >= 1:
+            print(f"{pacote:<28} {ms:>9.1f} ms  {ms / total:>6.1%}")
+    print(f"{'TOTAL':<28} {total:>9.1f} ms")
+
+    critico = sum(tempos_de_import(['streamlit', 'modulos.instrumentacao', 'modulos.inicializacao']).values())
+    print(f"\nAntes da primeira tela (app.py): {critico:.0f} ms; em segundo plano: {total - critico:.0f} ms")
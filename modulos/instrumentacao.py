@@ -0,0 +1,186 @@
+"""Instrumentação dos caminhos quentes (tempo por etapa, cache e payload).
+
+Cada medição vira um registro num buffer circular em memória, compartilhado
+pelo processo (as `CAPACIDADE` medições mais recentes). A página oculta de
+diagnóstico lê o buffer, mostra p50/p95 por etapa e exporta em JSONL.
+
+- `medir(etapa)`: gerenciador de contexto para um trecho qualquer.
+- `cronometrar(etapa)`: o mesmo, como decorador.
+- `em_cache(etapa, cache)`: substitui `@st.cache_resource`/`@st.cache_data`
+  e registra, além do tempo, se a chamada foi acerto ou falta de cache.
+- `instalar()`: chamado uma vez no `app.py`; mede cada `plotly_chart` (tempo
+  e tamanho do JSON enviado ao navegador) e o tempo total de cada página.
+"""
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+CAPACIDADE = 5000  # Medições mantidas no buffer circular
+
+_buffer = deque(maxlen=CAPACIDADE)
+_trava = threading.Lock()
+_local = threading.local()
+
+
+def _sessao():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+        return ctx.session_id[:8] if ctx else None
+    except Exception:
+        return None
+
+
+def registrar(etapa, ms, **extra):
+    registro = {'instante': time.time(), 'etapa': etapa, 'ms': round(ms, 3), 'sessao': _sessao()}
+    registro.update({k: v for k, v in extra.items() if v is not None})
+    with _trava:
+        _buffer.append(registro)
+
+
+@contextmanager
+def medir(etapa, **extra):
+    """Mede o bloco; campos extras podem ser preenchidos no dicionário devolvido."""
+    info = dict(extra)
+    inicio = time.perf_counter()
+    try:
+        yield info
+    finally:
+        registrar(etapa, (time.perf_counter() - inicio) * 1000, **info)
+
+
+def cronometrar(etapa=None):
+    def decorar(func):
+        nome = etapa or f"{func.__module__.split('.')[-1]}.{func.__name__}"
+
+        @functools.wraps(func)
+        def medido(*args, **kwargs):
+            with medir(nome):
+                return func(*args, **kwargs)
+        return medido
+    return decorar
+
+
+def _detalhe(args, kwargs):
+    partes = [str(a) for a in args if isinstance(a, (str, int, float, tuple))]
+    partes += [f"{k}={v}" for k, v in kwargs.items() if isinstance(v, (str, int, float, tuple))]
+    return ", ".join(partes)[:80] or None
+
+
+def em_cache(etapa, cache=st.cache_resource, **opcoes):
+    """Cache do Streamlit + registro de tempo e de acerto/falta por chamada.
+
+    A função original só executa numa falta; um contador por thread (que
+    também funciona com caches aninhados) diz se o corpo rodou.
+    """
+    def decorar(func):
+        @functools.wraps(func)
+        def corpo(*args, **kwargs):
+            _local.execucoes = getattr(_local, 'execucoes', 0) + 1
+            return func(*args, **kwargs)
+
+        cacheado = cache(**opcoes)(corpo)
+
+        @functools.wraps(func)
+        def chamada(*args, **kwargs):
+            antes = getattr(_local, 'execucoes', 0)
+            with medir(etapa, detalhe=_detalhe(args, kwargs)) as info:
+                resultado = cacheado(*args, **kwargs)
+                info['cache'] = 'falta' if getattr(_local, 'execucoes', 0) != antes else 'acerto'
+            return resultado
+
+        chamada.clear = cacheado.clear
+        return chamada
+    return decorar
+
+
+# --- GRÁFICOS E PÁGINAS ---
+
+def _medir_json(to_json):
+    @functools.wraps(to_json)
+    def medido(*args, **kwargs):
+        texto = to_json(*args, **kwargs)
+        if getattr(_local, 'bytes_grafico', None) is not None:
+            _local.bytes_grafico += len(texto)
+        return texto
+    return medido
+
+
+def _medir_grafico(plotly_chart):
+    @functools.wraps(plotly_chart)
+    def medido(*args, **kwargs):
+        _local.bytes_grafico = 0
+        try:
+            with medir('grafico.plotly_chart') as info:
+                resultado = plotly_chart(*args, **kwargs)
+                info['bytes'] = _local.bytes_grafico
+        finally:
+            _local.bytes_grafico = None
+        return resultado
+    medido._instrumentado = True
+    return medido
+
+
+def instalar():
+    """Liga a medição de `plotly_chart` (idempotente)."""
+    import plotly.io
+    from streamlit.delta_generator import DeltaGenerator
+
+    if getattr(DeltaGenerator.plotly_chart, '_instrumentado', False):
+        return
+    plotly.io.to_json = _medir_json(plotly.io.to_json)
+    DeltaGenerator.plotly_chart = _medir_grafico(DeltaGenerator.plotly_chart)
+    st.plotly_chart = _medir_grafico(st.plotly_chart)
+
+
+def executar_pagina(pagina):
+    """Roda a página selecionada no `st.navigation`, medindo o rerun inteiro."""
+    with medir('pagina', detalhe=pagina.title):
+        pagina.run()
+
+
+# --- CONSULTA DO BUFFER ---
+
+def registros():
+    with _trava:
+        return list(_buffer)
+
+
+def limpar():
+    with _trava:
+        _buffer.clear()
+
+
+def resumo():
+    """p50/p95/máximo por etapa, contagem de acertos/faltas de cache e bytes médios."""
+    tabela = pd.DataFrame(registros())
+    if tabela.empty:
+        return tabela
+    for col in ('cache', 'bytes'):
+        if col not in tabela:
+            tabela[col] = np.nan
+    g = tabela.groupby('etapa')
+    saida = pd.DataFrame({
+        'chamadas': g.size(),
+        'p50_ms': g['ms'].median(),
+        'p95_ms': g['ms'].quantile(0.95),
+        'max_ms': g['ms'].max(),
+        'total_ms': g['ms'].sum(),
+        'acertos': g['cache'].apply(lambda s: (s == 'acerto').sum()),
+        'faltas': g['cache'].apply(lambda s: (s == 'falta').sum()),
+        'bytes_medio': g['bytes'].mean(),
+    })
+    consultas = saida['acertos'] + saida['faltas']
+    saida['taxa_acerto'] = (saida['acertos'] / consultas).where(consultas > 0)
+    return saida.sort_values('total_ms', ascending=False).reset_index()
+
+
+def exportar_jsonl():
+    return "\n".join(json.dumps(r, ensure_ascii=False, default=str) for r in registros()) + "\n"
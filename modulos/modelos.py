@@ -0,0 +1,40 @@
+"""Ajustes da página de modelagem, independentes do Streamlit.
+
+A página passa estas funções ao registro de modelos; os benchmarks as
+chamam direto, com as tabelas reais ou escaladas. O scikit-learn só é
+importado dentro dos ajustes (ou ao ler um modelo salvo no registro), nunca
+na importação do módulo.
+"""
+
+PARAMETROS_REGRESSAO = {'test_size': 0.2, 'random_state': 42}
+PARAMETROS_KMEANS = {'random_state': 42, 'n_init': 10}
+
+
+def regressao(df, features, target):
+    """Regressão linear múltipla com divisão treino/teste fixa."""
+    from sklearn.linear_model import LinearRegression
+    from sklearn.metrics import mean_absolute_error, r2_score
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_test, y_train, y_test = train_test_split(df[features], df[target], **PARAMETROS_REGRESSAO)
+    model = LinearRegression()
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+    return {'model': model, 'y_test': y_test.to_numpy(), 'y_pred': y_pred,
+            'r2': r2_score(y_test, y_pred), 'mae': mean_absolute_error(y_test, y_pred)}
+
+
+def medias_por_estado(df, features):
+    """Média histórica de cada estado (entrada do K-Means)."""
+    return df.groupby('state', observed=True)[features].mean().reset_index()
+
+
+def kmeans(df_estado, features, n_clusters):
+    """K-Means sobre as médias por estado, com normalização (crucial para distâncias)."""
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(df_estado[features])
+    model = KMeans(n_clusters=n_clusters, **PARAMETROS_KMEANS)
+    return {'scaler': scaler, 'model': model, 'labels': model.fit_predict(X_scaled)}
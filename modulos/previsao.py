@@ -0,0 +1,145 @@
+"""Motor de previsão em lote (todos os estados × variáveis de uma vez).
+
+O modelo é o mesmo da aba "Previsão": regressão linear com tendência (dia
+ordinal) e sazonalidade (dummies de mês). Como todos os estados compartilham o
+mesmo calendário semanal, a matriz de design é montada uma única vez e todas
+as séries são resolvidas juntas por mínimos quadrados empilhados no NumPy.
+Séries com lacunas são agrupadas pelo padrão de observação, de modo que cada
+grupo ainda é uma única chamada a `lstsq`.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modulos import dados, instrumentacao, registro
+
+HORIZONTE_PADRAO = 52  # Semanas à frente (12 meses)
+QTD_TESTE = 52  # Último ano reservado para validação
+
+
+# --- MATRIZ DE DESIGN ---
+
+def ordinal(datas):
+    """Equivalente vetorizado de `date.toordinal()`."""
+    return np.asarray(datas, dtype='datetime64[D]').astype('int64') + 719163
+
+
+def matriz_design(datas, origem):
+    """Tendência (dias desde `origem`) + 12 dummies de mês.
+
+    O intercepto já está no espaço gerado pelas dummies, então as previsões são
+    idênticas às do LinearRegression com intercepto usado na página.
+    """
+    datas = pd.DatetimeIndex(datas)
+    X = np.zeros((len(datas), 13))  # Sem coluna de intercepto: as 12 dummies somam 1 em toda linha e o absorvem
+    X[:, 0] = ordinal(datas) - origem
+    X[np.arange(len(datas)), datas.month.to_numpy()] = 1.0
+    return X
+
+
+def datas_futuras(ultima_data, horizonte=HORIZONTE_PADRAO):
+    return pd.DatetimeIndex([ultima_data + pd.Timedelta(weeks=h) for h in range(1, horizonte + 1)])
+
+
+# --- SOLUÇÃO EMPILHADA ---
+
+def resolver(X, Y):
+    """Coeficientes (p × k) de todas as colunas de Y, ignorando NaNs por coluna."""
+    observado = ~np.isnan(Y)
+    coef = np.full((X.shape[1], Y.shape[1]), np.nan)
+    padroes, grupo = np.unique(observado.T, axis=0, return_inverse=True)
+    for g, mascara in enumerate(padroes):
+        colunas = np.flatnonzero(grupo.ravel() == g)
+        if mascara.sum() < 2:
+            continue
+        coef[:, colunas] = np.linalg.lstsq(X[mascara], Y[mascara][:, colunas], rcond=None)[0]
+    return coef
+
+
+# --- SÉRIES E RESULTADOS EM LOTE ---
+
+def pivotar(df, variavel):
+    """Matriz semanas × estados de `variavel` (NaN onde o estado não tem dado)."""
+    tabela = df.pivot_table(index='semana_ref', columns='state', values=variavel,
+                            aggfunc='mean', observed=True)
+    tabela.columns = tabela.columns.astype(str)
+    return tabela.sort_index()
+
+
+@instrumentacao.em_cache('previsao.series', st.cache_resource, show_spinner=False)
+def series(variavel):
+    return pivotar(dados.carregar_completos('semanal'), variavel)
+
+
+@instrumentacao.em_cache('previsao.lote', st.cache_resource, show_spinner=False)
+def previsao_lote(variavel, horizonte=HORIZONTE_PADRAO, qtd_teste=QTD_TESTE):
+    """Validação e projeção de todos os estados para uma variável (persistida no registro)."""
+    tabela = series(variavel)
+    return registro.obter_ou_ajustar(
+        'previsao_linear_sazonal', {'horizonte': horizonte, 'qtd_teste': qtd_teste},
+        [variavel], tabela.reset_index(), lambda: _ajustar_lote(tabela, horizonte, qtd_teste)
+    )
+
+
+def _ajustar_lote(tabela, horizonte, qtd_teste):
+    datas = tabela.index
+    Y = tabela.to_numpy(dtype='float64')
+    origem = int(ordinal(datas[:1])[0])
+    X = matriz_design(datas, origem)
+
+    # Validação: treino até um ano antes do fim, teste no último ano
+    treino = np.arange(len(datas)) < len(datas) - qtd_teste
+    Y_treino = np.where(treino[:, None], Y, np.nan)
+    pred_val = X[~treino] @ resolver(X, Y_treino)
+    real_val = Y[~treino]
+    mae = np.nanmean(np.abs(real_val - pred_val), axis=0)
+    n_treino = (~np.isnan(Y_treino)).sum(axis=0)
+    mae[n_treino <= qtd_teste] = np.nan  # Dados insuficientes para validar
+
+    # Projeção: treino com TUDO
+    futuras = datas_futuras(datas.max(), horizonte)
+    pred_fut = matriz_design(futuras, origem) @ resolver(X, Y)
+
+    return {
+        'estados': list(tabela.columns),
+        'datas': datas,
+        'historico': Y,
+        'datas_teste': datas[~treino],
+        'validacao': pred_val,
+        'mae': mae,
+        'datas_futuras': futuras,
+        'previsao': pred_fut,
+    }
+
+
+@instrumentacao.em_cache('previsao.prever', st.cache_data, show_spinner=False)
+def prever(variavel, estado, horizonte=HORIZONTE_PADRAO):
+    """Resultado de um estado (cache por variável, estado e horizonte)."""
+    lote = previsao_lote(variavel, horizonte)
+    j = lote['estados'].index(estado)
+    hist = lote['historico'][:, j]
+    ok = ~np.isnan(hist)
+    teste_ok = ~np.isnan(lote['historico'][-len(lote['datas_teste']):, j])
+    return {
+        'historico': pd.DataFrame({'semana_ref': lote['datas'][ok], variavel: hist[ok]}),
+        'teste': pd.DataFrame({'semana_ref': lote['datas_teste'][teste_ok],
+                               variavel: lote['historico'][-len(lote['datas_teste']):, j][teste_ok],
+                               'previsto': lote['validacao'][teste_ok, j]}),
+        'mae': float(lote['mae'][j]),
+        'futuro': pd.DataFrame({'semana_ref': lote['datas_futuras'],
+                                'previsto': lote['previsao'][:, j]}),
+    }
+
+
+def tabela_nacional(variavel, horizonte=HORIZONTE_PADRAO):
+    """Resumo da projeção de todos os estados (média histórica × prevista)."""
+    lote = previsao_lote(variavel, horizonte)
+    historica = np.nanmean(lote['historico'], axis=0)
+    prevista = lote['previsao'].mean(axis=0)
+    return pd.DataFrame({
+        'state': lote['estados'],
+        'media_historica': historica,
+        'media_prevista': prevista,
+        'variacao': prevista - historica,
+        'mae': lote['mae'],
+    })
@@ -0,0 +1,166 @@
+"""Motor de reamostragem vetorizado: bootstrap em blocos e permutação em blocos.
+
+Os testes clássicos da página de hipóteses assumem observações independentes,
+o que não vale para dados semanais. Aqui as reamostragens respeitam a
+autocorrelação: as observações são sorteadas/permutadas em BLOCOS de semanas
+consecutivas, com o tamanho do bloco escolhido pela própria autocorrelação.
+
+Todas as reamostragens de um lote são geradas como uma única matriz de
+índices do NumPy (sem laço em Python por reamostragem). Para limitar a
+memória, os lotes são processados em pedaços de no máximo `LIMITE_BYTES`.
+"""
+import numpy as np
+
+N_REAMOSTRAS = 2000
+LIMITE_BYTES = 32 * 1024 ** 2  # Memória máxima por pedaço de matriz de índices
+SEMENTE = 42
+
+
+# --- TAMANHO DO BLOCO ---
+
+def autocorrelacao(x, max_lag):
+    """ACF amostral até `max_lag`, via FFT."""
+    x = np.asarray(x, dtype='float64') - np.mean(x)
+    n = len(x)
+    espectro = np.fft.rfft(x, 2 * n)
+    acf = np.fft.irfft(espectro * np.conj(espectro))[:max_lag + 1]
+    return acf / acf[0] if acf[0] > 0 else np.zeros(max_lag + 1)
+
+
+def tamanho_bloco(x):
+    """Primeiro lag em que a autocorrelação deixa de ser significativa (1 = independente)."""
+    n = len(x)
+    if n < 8:
+        return 1
+    max_lag = max(1, n // 4)
+    acf = autocorrelacao(x, max_lag)
+    insignificante = np.flatnonzero(np.abs(acf[1:]) < 1.96 / np.sqrt(n))
+    return int(insignificante[0] + 1) if len(insignificante) else max_lag
+
+
+def _pedacos(total, largura, itemsize=8):
+    """Tamanhos dos pedaços de reamostras que cabem em LIMITE_BYTES."""
+    por_pedaco = max(1, LIMITE_BYTES // max(1, largura * itemsize))
+    inicio = 0
+    while inicio < total:
+        yield min(por_pedaco, total - inicio)
+        inicio += por_pedaco
+
+
+# --- BOOTSTRAP EM BLOCOS ---
+
+def indices_bootstrap_blocos(n, reamostras, bloco, rng):
+    """Matriz (reamostras × n) de índices do bootstrap em blocos circulares."""
+    n_blocos = -(-n // bloco)
+    inicios = rng.integers(0, n, size=(reamostras, n_blocos), dtype=np.int64)
+    idx = (inicios[:, :, None] + np.arange(bloco)) % n
+    return idx.reshape(reamostras, -1)[:, :n].astype(np.int32)
+
+
+def _momentos_bootstrap(x, reamostras, bloco, rng):
+    """Média e variância (ddof=1) de cada reamostra, processadas em pedaços."""
+    x = np.asarray(x, dtype='float64')
+    medias, variancias = [], []
+    for tam in _pedacos(reamostras, len(x) + bloco):
+        amostra = x[indices_bootstrap_blocos(len(x), tam, bloco, rng)]
+        medias.append(amostra.mean(axis=1))
+        variancias.append(amostra.var(axis=1, ddof=1))
+    return np.concatenate(medias), np.concatenate(variancias)
+
+
+def _efeito(medias, variancias, tamanhos):
+    """Tamanho de efeito: g de Hedges (2 grupos) ou eta² (3+ grupos)."""
+    medias, variancias = np.asarray(medias), np.asarray(variancias)
+    n = np.asarray(tamanhos, dtype='float64').reshape((-1,) + (1,) * (medias.ndim - 1))
+    if len(tamanhos) == 2:
+        dp = np.sqrt(((n[0] - 1) * variancias[0] + (n[1] - 1) * variancias[1]) / (n.sum() - 2))
+        correcao = 1 - 3 / (4 * n.sum() - 9)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return correcao * (medias[0] - medias[1]) / dp
+    geral = (n * medias).sum(axis=0) / n.sum()
+    ssb = (n * (medias - geral) ** 2).sum(axis=0)
+    ssw = ((n - 1) * variancias).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ssb / (ssb + ssw)
+
+
+def bootstrap_efeito(grupos, reamostras=N_REAMOSTRAS, nivel=0.95, blocos=None, semente=SEMENTE):
+    """Efeito observado e IC percentil por bootstrap em blocos (cada grupo reamostrado à parte).
+
+    Retorna também a diferença de médias com IC quando há exatamente 2 grupos.
+    """
+    rng = np.random.default_rng(semente)
+    grupos = [np.asarray(g, dtype='float64') for g in grupos]
+    blocos = blocos or [tamanho_bloco(g) for g in grupos]
+    tamanhos = [len(g) for g in grupos]
+
+    momentos = [_momentos_bootstrap(g, reamostras, b, rng) for g, b in zip(grupos, blocos)]
+    medias = np.stack([m for m, _ in momentos])
+    variancias = np.stack([v for _, v in momentos])
+
+    alfa = (1 - nivel) / 2
+    obs_medias = [g.mean() for g in grupos]
+    obs_var = [g.var(ddof=1) for g in grupos]
+    efeitos = _efeito(medias, variancias, tamanhos)
+    resultado = {
+        'efeito': float(_efeito(obs_medias, obs_var, tamanhos)),
+        'efeito_nome': "g de Hedges" if len(grupos) == 2 else "η² (eta quadrado)",
+        'efeito_ic': tuple(np.nanquantile(efeitos, [alfa, 1 - alfa])),
+        'blocos': blocos,
+    }
+    if len(grupos) == 2:
+        diferencas = medias[0] - medias[1]
+        resultado['diferenca'] = obs_medias[0] - obs_medias[1]
+        resultado['diferenca_ic'] = tuple(np.quantile(diferencas, [alfa, 1 - alfa]))
+    return resultado
+
+
+# --- PERMUTAÇÃO EM BLOCOS ---
+
+def _blocos_de(x, bloco):
+    """Soma e tamanho de cada bloco de observações consecutivas."""
+    cortes = np.arange(0, len(x), bloco)
+    return np.add.reduceat(x, cortes), np.diff(np.append(cortes, len(x)))
+
+
+def teste_permutacao_blocos(grupos, reamostras=N_REAMOSTRAS, bloco=None, semente=SEMENTE):
+    """Teste de permutação em blocos para diferença de médias entre grupos.
+
+    Blocos de semanas consecutivas (nunca semanas soltas) trocam de grupo, o
+    que preserva a autocorrelação sob a hipótese nula. Estatística: |Δ média|
+    para 2 grupos, soma de quadrados entre grupos para 3+.
+    """
+    rng = np.random.default_rng(semente)
+    grupos = [np.asarray(g, dtype='float64') for g in grupos]
+    bloco = bloco or int(np.median([tamanho_bloco(g) for g in grupos]))
+
+    partes = [_blocos_de(g, bloco) for g in grupos]
+    somas = np.concatenate([s for s, _ in partes])
+    tamanhos = np.concatenate([t for _, t in partes]).astype('float64')
+    fronteiras = np.cumsum([len(s) for s, _ in partes])
+    geral = somas.sum() / tamanhos.sum()
+
+    def _estatistica(s_grupo, n_grupo):
+        medias = s_grupo / n_grupo
+        if len(grupos) == 2:
+            return np.abs(medias[..., 0] - medias[..., 1])
+        return (n_grupo * (medias - geral) ** 2).sum(axis=-1)
+
+    def _por_grupo(valores):
+        acumulado = np.cumsum(valores, axis=-1)[..., fronteiras - 1]
+        return np.diff(acumulado, axis=-1, prepend=0)
+
+    observado = float(_estatistica(_por_grupo(somas), _por_grupo(tamanhos)))
+
+    extremos = 0
+    for tam in _pedacos(reamostras, len(somas)):
+        perm = np.argsort(rng.random((tam, len(somas))), axis=1)
+        stat = _estatistica(_por_grupo(somas[perm]), _por_grupo(tamanhos[perm]))
+        extremos += int((stat >= observado - 1e-12).sum())
+
+    return {
+        'estatistica': observado,
+        'p_valor': (extremos + 1) / (reamostras + 1),
+        'bloco': bloco,
+        'reamostras': reamostras,
+    }
@@ -0,0 +1,107 @@
+"""Registro de modelos com cache persistente de ajustes.
+
+Cada ajuste é identificado por (algoritmo, hiperparâmetros, lista de features,
+impressão digital dos dados). O resultado (estimador + saídas) fica em memória
+e em disco (`dataframe/cache/modelos/`), sendo reaproveitado entre sessões,
+usuários e reinícios do servidor. O diretório tem tamanho máximo: ao passar do
+limite, os ajustes usados há mais tempo são removidos primeiro (LRU).
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from modulos import dados, instrumentacao
+
+PASTA_MODELOS = dados.PASTA_CACHE / "modelos"
+LIMITE_DISCO_BYTES = 256 * 1024 ** 2  # 256 MB
+LIMITE_MEMORIA = 32  # Ajustes mantidos em memória no processo
+
+_memoria = OrderedDict()
+_trava = threading.Lock()
+
+
+def impressao_digital(dados_entrada):
+    """Hash estável do conteúdo de um DataFrame/Series/array (valores e nomes)."""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(dados_entrada, (pd.DataFrame, pd.Series)):
+        h.update(pd.util.hash_pandas_object(dados_entrada, index=False).to_numpy().tobytes())
+        nomes = dados_entrada.columns if isinstance(dados_entrada, pd.DataFrame) else [dados_entrada.name]
+        h.update(json.dumps([str(n) for n in nomes]).encode())
+    else:
+        arr = np.ascontiguousarray(dados_entrada)
+        h.update(str((arr.shape, arr.dtype)).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def chave(algoritmo, parametros, features, impressao):
+    texto = json.dumps([algoritmo, parametros, list(features), impressao], sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode()).hexdigest()[:32]
+
+
+def _lembrar(k, valor):
+    with _trava:
+        _memoria[k] = valor
+        _memoria.move_to_end(k)
+        while len(_memoria) > LIMITE_MEMORIA:
+            _memoria.popitem(last=False)
+
+
+def _limpar_disco():
+    """Remove os arquivos menos usados recentemente até caber no limite."""
+    arquivos = [(a, a.stat()) for a in PASTA_MODELOS.glob("*.joblib")]
+    total = sum(info.st_size for _, info in arquivos)
+    for arquivo, info in sorted(arquivos, key=lambda x: x[1].st_mtime):
+        if total <= LIMITE_DISCO_BYTES:
+            break
+        try:
+            arquivo.unlink()
+            total -= info.st_size
+        except OSError:
+            pass
+
+
+def obter_ou_ajustar(algoritmo, parametros, features, dados_entrada, ajustar):
+    """Retorna o ajuste registrado ou executa `ajustar()` e registra o resultado.
+
+    `ajustar` não recebe argumentos e devolve qualquer objeto serializável
+    (ex.: dicionário com o estimador e as saídas que a página exibe).
+    """
+    import joblib  # Import tardio: só quem registra ajustes paga por ele
+
+    k = chave(algoritmo, parametros, features, impressao_digital(dados_entrada))
+
+    with _trava:
+        if k in _memoria:
+            _memoria.move_to_end(k)
+            instrumentacao.registrar(f"registro.{algoritmo}", 0.0, cache='acerto', detalhe='memoria')
+            return _memoria[k]
+
+    arquivo = PASTA_MODELOS / f"{k}.joblib"
+    if arquivo.exists():
+        try:
+            with instrumentacao.medir(f"registro.{algoritmo}", cache='acerto', detalhe='disco'):
+                valor = joblib.load(arquivo)
+            os.utime(arquivo)  # Marca como usado recentemente
+            _lembrar(k, valor)
+            return valor
+        except Exception:
+            pass  # Arquivo corrompido ou de versão incompatível: reajusta
+
+    with instrumentacao.medir(f"registro.{algoritmo}", cache='falta', detalhe='ajuste'):
+        valor = ajustar()
+    _lembrar(k, valor)
+    try:
+        PASTA_MODELOS.mkdir(parents=True, exist_ok=True)
+        temporario = arquivo.with_suffix(f".{os.getpid()}.tmp")
+        joblib.dump(valor, temporario)
+        os.replace(temporario, arquivo)  # Escrita atômica entre processos
+        _limpar_disco()
+    except Exception:
+        pass  # Sem disco disponível: fica só em memória
+    return valor
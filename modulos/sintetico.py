@@ -0,0 +1,195 @@
+"""Gerador de tabelas climáticas sintéticas para testes de carga.
+
+O modelo é ajustado nas tabelas reais, estado a estado:
+
+- sazonalidade: média de cada medida como soma de `HARMONICOS` senoides do
+  dia do ano (a chuva é modelada na raiz quadrada, que é assimétrica);
+- persistência: resíduo AR(1) por medida (semanas vizinhas se parecem);
+- correlação entre medidas: as inovações do AR(1) saem de uma normal
+  multivariada com a covariância observada no estado (fator de Cholesky);
+- lacunas: cada medida falta com a mesma frequência do estado real.
+
+Cada estado pode virar várias "estações" (mesma sigla e região, com um
+deslocamento médio próprio que soma zero dentro do estado, então a média do
+estado se mantém). O período é livre (décadas), e a saída tem exatamente as
+colunas dos CSVs refinados, gravada em partes Parquet de até
+`LINHAS_POR_PARTE` linhas, geradas uma a uma (memória limitada à parte).
+
+Para rodar o painel sobre os dados sintéticos:
+    python -m modulos.sintetico --saida /tmp/clima --inicio 1990 --fim 2024 --estacoes 20
+    CLIMA_PASTA_TABELAS=/tmp/clima streamlit run app.py
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from modulos import dados
+
+HARMONICOS = 2  # Senoides anuais (e semestrais) do ciclo sazonal
+DISPERSAO_ESTACOES = 0.3  # Desvio do deslocamento de cada estação, em desvios do resíduo
+LINHAS_POR_PARTE = 500_000
+SEMENTE = 42
+
+FREQUENCIAS = {'semanal': 'W-MON', 'mensal': 'MS', 'trimestral': 'QS'}
+NAO_NEGATIVAS = ('chuva', 'vento', 'pressao', 'radiacao')
+LIMITES = {'umidade_media': (0, 100)}
+
+
+def _harmonicos(datas):
+    """Matriz [1, cos θ, sen θ, cos 2θ, ...] com θ = fração do ano."""
+    theta = 2 * np.pi * pd.DatetimeIndex(datas).dayofyear.to_numpy() / 365.25
+    colunas = [np.ones_like(theta)]
+    for k in range(1, HARMONICOS + 1):
+        colunas += [np.cos(k * theta), np.sin(k * theta)]
+    return np.column_stack(colunas)
+
+
+def _transformar(medida, v):
+    return np.sqrt(np.maximum(v, 0)) if medida.startswith('chuva') else v
+
+
+def _destransformar(medida, v):
+    if medida.startswith('chuva'):
+        v = np.maximum(v, 0) ** 2
+    if medida.startswith(NAO_NEGATIVAS):
+        v = np.maximum(v, 0)
+    if medida in LIMITES:
+        v = np.clip(v, *LIMITES[medida])
+    return v
+
+
+def _cholesky(cov):
+    """Fator de Cholesky após projetar a covariância (pares incompletos) em semidefinida."""
+    cov = np.nan_to_num((cov + cov.T) / 2)
+    autovalores, autovetores = np.linalg.eigh(cov)
+    autovalores = np.maximum(autovalores, 1e-9 * max(autovalores.max(), 1e-12))
+    return np.linalg.cholesky((autovetores * autovalores) @ autovetores.T)
+
+
+# --- AJUSTE ---
+
+def ajustar(df, granularidade):
+    """Parâmetros do gerador a partir de uma tabela de `dados` (real)."""
+    esquema = dados.TABELAS[granularidade]
+    medidas, col_data = esquema["medidas"], esquema["data"]
+    df = df.sort_values(['state', col_data])
+    estados, coef, phi, chol, sd, lacunas, regioes = [], [], [], [], [], [], []
+
+    for estado, g in df.groupby('state', observed=True):
+        X = _harmonicos(g[col_data])
+        Y = np.column_stack([_transformar(m, g[m].to_numpy(dtype='float64')) for m in medidas])
+        R = np.full_like(Y, np.nan)
+        c = np.zeros((len(medidas), X.shape[1]))
+        for j in range(len(medidas)):
+            ok = ~np.isnan(Y[:, j])
+            if ok.sum() > X.shape[1]:
+                c[j] = np.linalg.lstsq(X[ok], Y[ok, j], rcond=None)[0]
+                R[ok, j] = Y[ok, j] - X[ok] @ c[j]
+
+        # AR(1) por medida e covariância das inovações entre medidas
+        atual, anterior = R[1:], R[:-1]
+        with np.errstate(invalid='ignore'):
+            p = np.nansum(atual * anterior, axis=0) / np.nansum(anterior ** 2, axis=0)
+        p = np.clip(np.nan_to_num(p), 0, 0.98)
+        inovacoes = pd.DataFrame(atual - p * anterior)
+
+        estados.append(str(estado))
+        regioes.append(str(g['region'].iloc[0]))
+        coef.append(c)
+        phi.append(p)
+        chol.append(_cholesky(inovacoes.cov().to_numpy()))
+        sd.append(np.nan_to_num(np.nanstd(R, axis=0)))
+        lacunas.append(np.isnan(Y).mean(axis=0))
+
+    return {
+        'granularidade': granularidade, 'medidas': medidas,
+        'estados': np.array(estados), 'regioes': np.array(regioes),
+        'coef': np.array(coef), 'phi': np.array(phi), 'chol': np.array(chol),
+        'sd': np.array(sd), 'lacunas': np.array(lacunas),
+        'inicio': df[col_data].min(), 'fim': df[col_data].max(),
+    }
+
+
+# --- GERAÇÃO ---
+
+def gerar(granularidade, estacoes=1, inicio=None, fim=None, semente=SEMENTE,
+          linhas_por_parte=LINHAS_POR_PARTE, modelo=None):
+    """Gera a tabela sintética em partes (DataFrames), em ordem cronológica."""
+    if modelo is None:
+        modelo = ajustar(dados._ler_tabela(granularidade), granularidade)
+    esquema = dados.TABELAS[granularidade]
+    medidas = modelo['medidas']
+    rng = np.random.default_rng(semente)
+
+    datas = pd.date_range(pd.Timestamp(inicio or modelo['inicio']), pd.Timestamp(fim or modelo['fim']),
+                          freq=FREQUENCIAS[granularidade])
+    E, M = modelo['coef'].shape[:2]
+    de = np.repeat(np.arange(E), estacoes)  # Estado de cada estação
+    S = len(de)
+
+    # Deslocamento de cada estação, centrado dentro do estado
+    desloc = rng.normal(0, DISPERSAO_ESTACOES, (E, estacoes, M)) * modelo['sd'][:, None, :]
+    desloc = (desloc - desloc.mean(axis=1, keepdims=True)).reshape(S, M)
+
+    coef, phi, chol, lacunas = (modelo[k][de] for k in ('coef', 'phi', 'chol', 'lacunas'))
+    # Resíduo inicial já na distribuição estacionária do AR(1)
+    residuo = np.einsum('smk,sk->sm', chol, rng.standard_normal((S, M))) / np.sqrt(1 - phi ** 2)
+
+    passo = max(1, linhas_por_parte // S)
+    for ini in range(0, len(datas), passo):
+        bloco = datas[ini:ini + passo]
+        T = len(bloco)
+        base = np.einsum('th,smh->tsm', _harmonicos(bloco), coef)
+        choques = np.einsum('smk,tsk->tsm', chol, rng.standard_normal((T, S, M)))
+        valores = np.empty((T, S, M))
+        for t in range(T):
+            residuo = phi * residuo + choques[t]
+            valores[t] = base[t] + desloc + residuo
+        valores[rng.random((T, S, M)) < lacunas] = np.nan
+
+        # Linhas em ordem (estação, data), como nos CSVs
+        valores = valores.transpose(1, 0, 2).reshape(S * T, M)
+        parte = pd.DataFrame({
+            'region': np.repeat(modelo['regioes'][de], T),
+            'state': np.repeat(modelo['estados'][de], T),
+            esquema["data"]: np.tile(bloco.to_numpy(), S),
+        })
+        for j, m in enumerate(medidas):
+            parte[m] = _destransformar(m, valores[:, j]).astype('float32')
+        yield parte
+
+
+def gravar(saida, granularidades=('semanal', 'mensal'), **opcoes):
+    """Grava cada granularidade em `saida/<nome do CSV>/parte-NNNNN.parquet`."""
+    saida = Path(saida)
+    linhas = {}
+    for g in granularidades:
+        pasta = saida / Path(dados.TABELAS[g]["arquivo"]).stem
+        pasta.mkdir(parents=True, exist_ok=True)
+        for antiga in pasta.glob('parte-*.parquet'):
+            antiga.unlink()
+        linhas[g] = 0
+        for i, parte in enumerate(gerar(g, **opcoes)):
+            parte.to_parquet(pasta / f"parte-{i:05d}.parquet", index=False)
+            linhas[g] += len(parte)
+    return linhas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera tabelas climáticas sintéticas em Parquet.")
+    parser.add_argument('--saida', required=True, help="Pasta de destino (use em CLIMA_PASTA_TABELAS)")
+    parser.add_argument('--estacoes', type=int, default=1, help="Estações por estado")
+    parser.add_argument('--inicio', help="Primeiro ano ou data (padrão: o dos dados reais)")
+    parser.add_argument('--fim', help="Último ano ou data (padrão: o dos dados reais)")
+    parser.add_argument('--linhas-por-parte', type=int, default=LINHAS_POR_PARTE)
+    parser.add_argument('--semente', type=int, default=SEMENTE)
+    parser.add_argument('--granularidades', nargs='+', default=['semanal', 'mensal'], choices=list(FREQUENCIAS))
+    args = parser.parse_args()
+
+    fim = f"{args.fim}-12-31" if args.fim and args.fim.isdigit() else args.fim
+    total = gravar(args.saida, args.granularidades, estacoes=args.estacoes, inicio=args.inicio, fim=fim,
+                   semente=args.semente, linhas_por_parte=args.linhas_por_parte)
+    for g, n in total.items():
+        print(f"{g}: {n:,} linhas")
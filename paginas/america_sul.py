@@ -0,0 +1,90 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from modulos import america_sul
+
+st.header("🌎 América do Sul")
+st.markdown("Observações das capitais sul-americanas, consolidadas por semana e por mês a partir do feed contínuo.")
+
+# --- 1. CARREGAMENTO (INCREMENTAL) ---
+# O feed só cresce: a cada 5 minutos lemos apenas as linhas novas e somamos aos parciais já guardados
+@st.cache_data(ttl=300, show_spinner=False)
+def carregar_rollups():
+    parciais, novas = america_sul.atualizar()
+    return {g: america_sul.rollup(p, g) for g, p in parciais.items()}, parciais, novas
+
+
+try:
+    rollups, parciais, novas = carregar_rollups()
+except FileNotFoundError:
+    st.error("Arquivo de observações da América do Sul não encontrado.")
+    st.stop()
+
+cols_map = {
+    'temperature_celsius': 'Temperatura (°C)',
+    'feels_like_celsius': 'Sensação Térmica (°C)',
+    'humidity': 'Umidade (%)',
+    'precip_mm': 'Chuva (mm)',
+    'wind_kph': 'Vento (km/h)',
+    'pressure_in': 'Pressão (inHg)',
+    'cloud': 'Nebulosidade (%)',
+    'uv_index': 'Índice UV',
+}
+
+# --- 2. FILTROS ---
+with st.container(border=True):
+    c1, c2, c3 = st.columns([1, 1, 2])
+    with c1:
+        granularidade = st.radio("Agregação:", ['semanal', 'mensal'], format_func=str.capitalize, horizontal=True)
+    with c2:
+        variavel = st.selectbox("Variável:", list(cols_map), format_func=cols_map.get)
+    with c3:
+        tabela = rollups[granularidade]
+        paises = sorted(tabela['country'].unique())
+        selecionados = st.multiselect("Países:", paises, default=paises)
+
+col_periodo, _ = america_sul.ROLLUPS[granularidade]
+tabela = tabela[tabela['country'].isin(selecionados)]
+
+if tabela.empty:
+    st.info("Selecione ao menos um país.")
+    st.stop()
+
+# --- 3. INDICADORES ---
+m1, m2, m3 = st.columns(3)
+m1.metric("Observações", f"{int(tabela['total_registros'].sum()):,}".replace(",", "."))
+m2.metric("Países", tabela['country'].nunique())
+m3.metric("Último Período", tabela[col_periodo].max().strftime('%d/%m/%Y'))
+if novas:
+    st.caption(f"{novas} observação(ões) nova(s) incorporada(s) nesta atualização.")
+
+# --- 4. GRÁFICOS ---
+fig_linha = px.line(tabela, x=col_periodo, y=variavel, color='country', markers=granularidade == 'mensal',
+                    title=f"{cols_map[variavel]} por {'semana' if granularidade == 'semanal' else 'mês'}",
+                    labels={variavel: cols_map[variavel], col_periodo: "Período", 'country': "País"})
+st.plotly_chart(fig_linha, use_container_width=True)
+
+# Média de todo o período por país: soma dos parciais, sem reler observações
+parc = parciais[granularidade]
+parc = parc[parc.index.get_level_values(0).isin(selecionados)].groupby(level=0).sum()
+resumo = pd.DataFrame({
+    'country': parc.index,
+    'latitude': (parc['latitude__soma'] / parc['n']).to_numpy(),
+    'longitude': (parc['longitude__soma'] / parc['n']).to_numpy(),
+    variavel: (parc[f'{variavel}__soma'] / parc['n']).to_numpy(),
+    'total_registros': parc['n'].to_numpy(),
+})
+
+c_mapa, c_tab = st.columns([3, 2])
+with c_mapa:
+    fig_mapa = px.scatter_geo(resumo, lat='latitude', lon='longitude', color=variavel, size='total_registros',
+                              hover_name='country', scope='south america', color_continuous_scale='RdYlBu_r',
+                              labels={variavel: cols_map[variavel]}, title="Média do período completo")
+    fig_mapa.update_layout(height=500, margin=dict(l=0, r=0, t=40, b=0))
+    st.plotly_chart(fig_mapa, use_container_width=True)
+with c_tab:
+    st.dataframe(
+        resumo[['country', variavel, 'total_registros']].sort_values(variavel, ascending=False)
+        .rename(columns={'country': 'País', variavel: cols_map[variavel], 'total_registros': 'Registros'}),
+        hide_index=True, use_container_width=True
+    )
@@ -1,28 +1,20 @@
 import streamlit as st
-import google.generativeai as genai
+from modulos import assistente
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.header("🤖 Assistente Técnico do Projeto")
 st.markdown("""
 Este assistente é o **especialista na metodologia** deste trabalho. 
 Você pode perguntar sobre as escolhas estatísticas, as bibliotecas utilizadas ou como os algoritmos de Machine Learning foram configurados.
+Também responde perguntas diretas sobre os dados (ex: *"Quais os 5 estados mais quentes em 2020?"*, *"Compare a chuva da Bahia com o Sul"*).
 """)
 
 # --- 1. CONFIGURAÇÃO DA API ---
-# Tenta pegar do secrets (nuvem) ou pede na sidebar (local)
-# Se estiver rodando localmente sem secrets, use a input. Se tiver secrets, usa direto.
-
-if "GEMINI_KEY" in st.secrets:
-    api_key = st.secrets["GEMINI_KEY"]
-
-
+# Tenta pegar do secrets (nuvem). Sem chave, usa o modelo local (offline, responde com a documentação abaixo)
 try:
-    genai.configure(api_key=api_key)
-    # Usando o modelo Flash (Rápido e Inteligente)
-    model = genai.GenerativeModel('gemini-2.5-flash') 
-except Exception as e:
-    st.error(f"Erro de Configuração: {e}")
-    st.stop()
+    api_key = st.secrets.get("GEMINI_KEY")
+except Exception:
+    api_key = None
 
 # --- 2. O "CÉREBRO" DO BOT (Documentação Técnica Estática) ---
 # Este contexto é "blindado". Ele só sabe o que está escrito aqui, evitando alucinações.
@@ -73,7 +65,8 @@ AQUI ESTÁ A DOCUMENTAÇÃO TÉCNICA:
 
 DIRETRIZES DE RESPOSTA:
 - Responda apenas sobre a metodologia, ferramentas e conceitos acima.
-- Se perguntarem sobre um dado específico (ex: "Qual a temperatura dia 15?"), diga: "Eu sou focado na metodologia do projeto. Para explorar os dados brutos, por favor utilize a aba 'Dashboard Interativo' ou 'Mapa'."
+- Se perguntarem sobre um dado específico (ex: "Qual a temperatura em SP em 2018?"), use as ferramentas de consulta (valor, ranking, comparar, extremo, semana) e responda só com os números que elas devolverem, citando local e período. Nunca invente valores.
+- Se faltar informação para a consulta (ex: "Qual a temperatura dia 15?" sem local, mês ou ano), peça o complemento. Se a pergunta fugir das consultas disponíveis, indique a aba 'Dashboard Interativo' ou 'Mapa'.
 - Seja formal e acadêmico.
 """
 
@@ -81,15 +74,23 @@ DIRETRIZES DE RESPOSTA:
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
     # Inicia o chat enviando o manual (invisível ao usuário)
-    st.session_state.chat = model.start_chat(history=[
-        {"role": "user", "parts": CONTEXTO_DO_PROJETO},
-        {"role": "model", "parts": "Entendido. Atuarei como o especialista técnico do projeto."}
-    ])
+    try:
+        st.session_state.chat = assistente.iniciar(CONTEXTO_DO_PROJETO, api_key)
+    except Exception as e:
+        st.error(f"Erro de Configuração: {e}")
+        st.stop()
+
+if st.session_state.chat.nome == 'local':
+    st.caption("🔌 Sem chave do Gemini: respostas do modelo local, extraídas da documentação técnica.")
 
 # Exibe histórico visual
 for msg in st.session_state.chat_history:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
+        if msg.get("origem") in ("exato", "semantico"):
+            st.caption("⚡ Resposta reaproveitada do cache")
+        elif msg.get("origem") == "consulta":
+            st.caption("🔎 Consulta direta aos dados agregados")
 
 # Input do usuário
 if prompt := st.chat_input("Dúvidas sobre a metodologia? (Ex: Como funciona o teste de hipótese?)"):
@@ -98,12 +99,23 @@ if prompt := st.chat_input("Dúvidas sobre a metodologia? (Ex: Como funciona o t
         st.markdown(prompt)
     st.session_state.chat_history.append({"role": "user", "content": prompt})
 
-    # Gera resposta
+    # Gera resposta: do cache (mesma pergunta, ou parecida, já respondida em qualquer sessão) ou em streaming
     with st.chat_message("assistant"):
-        with st.spinner("Consultando documentação técnica..."):
-            try:
-                response = st.session_state.chat.send_message(prompt)
-                st.markdown(response.text)
-                st.session_state.chat_history.append({"role": "assistant", "content": response.text})
-            except Exception as e:
-                st.error(f"Erro ao gerar resposta: {e}")
+        try:
+            resposta, origem = assistente.responder(st.session_state.chat, CONTEXTO_DO_PROJETO, prompt)
+            if origem == "modelo":
+                resposta = st.write_stream(resposta)
+            else:
+                st.markdown(resposta)
+                st.caption("🔎 Consulta direta aos dados agregados" if origem == "consulta" else "⚡ Resposta reaproveitada do cache")
+            st.session_state.chat_history.append({"role": "assistant", "content": resposta, "origem": origem})
+        except Exception as e:
+            st.error(f"Erro ao gerar resposta: {e}")
+
+# --- 4. CUSTO DA CONVERSA ---
+if st.session_state.chat.metricas:
+    with st.expander("📊 Tokens e latência por turno"):
+        st.dataframe(st.session_state.chat.metricas, hide_index=True, use_container_width=True)
+        if st.session_state.chat.resumo:
+            st.caption(f"Trocas anteriores às últimas {len(st.session_state.chat.turnos)} resumidas:")
+            st.text(st.session_state.chat.resumo)
@@ -1,6 +1,8 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
 import plotly.express as px
+from modulos import armazem, cubo, graficos
 
 # 1. Configuração da Página
 st.set_page_config(page_title="Análise Descritiva - Clima Brasil", layout="wide")
@@ -14,18 +16,10 @@ config_padrao = {
     ]
 }
 
-# 2. Carregamento de Dados
-@st.cache_data
-def carregar_dados():
-    # Certifique-se que o caminho do arquivo está correto no seu projeto
-    df = pd.read_csv("dataframe/clima_brasil_mensal_refinado_2015.csv")
-    df['mes'] = pd.to_datetime(df['periodo_ref'])
-    df['Data_Dia'] = df['mes'].dt.date
-    # Cria a coluna Ano para o filtro
-    df['Ano'] = df['mes'].dt.year
-    return df
-
-df = carregar_dados()
+# 2. Carregamento de Dados (só os pares região/estado e os anos, consultados no armazém;
+# os gráficos leem o cubo, então a página nunca filtra a tabela mensal inteira)
+pares = armazem.consultar('mensal', ['region', 'state'], distintos=True)
+anos_disponiveis = [int(a) for a in armazem.valores('mensal', 'ano')]
 
 # --- CONFIGURAÇÃO AUTOMÁTICA DE CORES ---
 paletas_estados_matte = {
@@ -44,7 +38,7 @@ paletas_regioes_pastel = {
 # 2. LÓGICA DE APLICAÇÃO
 # ---------------------------------------------------------
 
-unique_regions = df['region'].unique()
+unique_regions = pares['region'].unique()
 
 # --- Configura Cores das REGIÕES ---
 cores_regioes = {}
@@ -55,7 +49,7 @@ for reg in unique_regions:
 cores_estados = {}
 for regiao in unique_regions:
     lista_cores = paletas_estados_matte.get(regiao, [])
-    estados_da_regiao = sorted(df[df['region'] == regiao]['state'].unique())
+    estados_da_regiao = armazem.valores('mensal', 'state', regioes=[regiao])
     for estado, cor in zip(estados_da_regiao, lista_cores):
         cores_estados[estado] = cor
 
@@ -75,11 +69,26 @@ cols_numericas = {
 var_label = st.selectbox("Escolha a Variável:", options=cols_numericas.keys())
 var_coluna = cols_numericas[var_label]
 
+# --- MODO FILTROS NO NAVEGADOR ---
+# Envia a matriz estado × mês da variável UMA vez; região, estado e ano são filtrados em
+# JavaScript, então interagir com os filtros não gera rerun (nem CPU) no servidor
+@st.cache_data(show_spinner=False)
+def painel_navegador(var_coluna, var_label):
+    regiao_por_estado = dict(zip(pares['state'].astype(str), pares['region'].astype(str)))
+    serie = cubo.serie('mensal', 'state', var_coluna, 'mes')
+    pacote = graficos.pacote_cliente(serie, var_coluna, regiao_por_estado)
+    return graficos.painel_cliente(pacote, var_label, cores_regioes, cores_estados, config_padrao)
+
+
+if st.toggle("⚡ Filtros no navegador", help="Filtra regiões, estados e anos direto no navegador, sem recarregar a página."):
+    components.html(painel_navegador(var_coluna, var_label), height=1550, scrolling=True)
+    st.stop()
+
 # --- FILTROS LATERAIS (Região e Tempo) ---
 col_filtros_1, col_filtros_2 = st.columns([2, 1])
 
 with col_filtros_1:
-    regioes_disponiveis = sorted(df['region'].unique().astype(str))
+    regioes_disponiveis = sorted(pares['region'].unique().astype(str))
     regioes_sel = st.multiselect(
         "Filtre as Regiões:", 
         regioes_disponiveis, 
@@ -92,11 +101,11 @@ with col_filtros_2:
     usar_filtro_ano = st.checkbox("Filtrar por Ano?")
     
     # Valores padrão (Todo o dataset)
-    df_filtrado_tempo = df
+    faixa_anos = None
     
     if usar_filtro_ano:
-        min_ano = int(df['Ano'].min())
-        max_ano = int(df['Ano'].max())
+        min_ano = anos_disponiveis[0]
+        max_ano = anos_disponiveis[-1]
         
         if min_ano == max_ano:
             st.info(f"Ano único disponível: {min_ano}")
@@ -109,25 +118,27 @@ with col_filtros_2:
                 value=(min_ano, max_ano)
             )
         
-        # Aplica filtro de tempo
-        df_filtrado_tempo = df[(df['Ano'] >= ano_inicio) & (df['Ano'] <= ano_fim)]
+        # Aplica filtro de tempo (nas consultas ao armazém e ao cubo)
+        faixa_anos = (ano_inicio, ano_fim)
 
 # --- LÓGICA DE DADOS ---
 
 # 1. Lista de Estados ESTÁVEL (Baseada apenas nas Regiões selecionadas, ignora o Tempo)
-if regioes_sel:
-    df_base_regiao = df[df['region'].isin(regioes_sel)]
-else:
-    df_base_regiao = df[df['region'].isin([])]
+estados_disponiveis = armazem.valores('mensal', 'state', regioes=regioes_sel)
 
-# 2. Dados para GRÁFICOS (Baseado em Região + Tempo)
-if regioes_sel:
-    df_regiao = df_filtrado_tempo[df_filtrado_tempo['region'].isin(regioes_sel)]
-else:
-    df_regiao = df_filtrado_tempo[df_filtrado_tempo['region'].isin([])]
+# 2. Regiões/estados com dados nos filtros (Região + Tempo), filtrados dentro do banco
+df_regiao = armazem.consultar('mensal', ['region', 'state'], regioes=regioes_sel, anos=faixa_anos, distintos=True)
 
 st.markdown("---")
 
+
+def resumos_distribuicao(espacial, chaves):
+    """Resumo de box plot (e densidade) de cada chave, a partir dos esboços do cubo."""
+    dist = cubo.distribuicao('mensal', espacial, var_coluna, chaves, faixa_anos)
+    return {k: graficos.resumo_caixa(d['pontos'], d['pesos'], d['min'], d['max'], d['media'], d['desvio'])
+            for k, d in dist.items()}
+
+
 # --- VISUALIZAÇÃO (ABAS) ---
 if df_regiao.empty:
     st.warning("⚠️ Sem dados para os filtros selecionados (Verifique a Região ou o Ano).")
@@ -142,9 +153,8 @@ else:
         ordem_regioes = sorted(df_regiao['region'].unique())
         
         with st.expander("### 📊 Estatísticas Detalhadas por Região", expanded=False):
-            tabela_reg = df_regiao.groupby('region')[var_coluna].agg(
-                ['count', 'mean', 'std', 'min', 'max', 'median']
-            ).reset_index().sort_values(by='region', ascending=True)
+            # Consulta ao cubo de agregados (sem varrer a tabela bruta)
+            tabela_reg = cubo.resumo('mensal', 'region', var_coluna, regioes_sel, faixa_anos)
 
             st.dataframe(
                 tabela_reg,
@@ -154,16 +164,13 @@ else:
             )
 
         # === Boxplot (Região) ===
-        st.markdown("**Distribuição (Boxplot)**")
-        fig_box_reg = px.box(
-            df_regiao, 
-            x="region", 
-            y=var_coluna, 
-            color="region", 
-            points="outliers",
-            color_discrete_map=cores_regioes,
-            category_orders={"region": ordem_regioes}
-        )
+        # Quartis, cercas, outliers e densidade saem do cubo: o navegador recebe só o resumo
+        c_titulo_box, c_formato = st.columns([3, 1])
+        c_titulo_box.markdown("**Distribuição (Boxplot)**")
+        formato_dist = c_formato.radio("Formato:", ["Boxplot", "Violino"], horizontal=True, label_visibility="collapsed")
+        formato_dist = 'violino' if formato_dist == "Violino" else 'box'
+
+        fig_box_reg = graficos.figura_distribuicao(resumos_distribuicao('region', regioes_sel), cores_regioes, formato_dist)
         fig_box_reg.update_layout(
             showlegend=False, 
             xaxis=dict(fixedrange=True, title="Regiões"), 
@@ -173,11 +180,11 @@ else:
             
         # === Linhas (Região) ===
         st.markdown("**Evolução Temporal (Média das Regiões)**")
-        df_line_reg = df_regiao.groupby(['Data_Dia', 'region'])[var_coluna].mean().reset_index()
+        df_line_reg = cubo.serie('mensal', 'region', var_coluna, 'mes', regioes_sel, faixa_anos)
         
         fig_line_reg = px.line(
             df_line_reg, 
-            x="Data_Dia", 
+            x="periodo", 
             y=var_coluna, 
             color="region",
             markers=True,
@@ -197,7 +204,6 @@ else:
         st.subheader(f"Análise Estadual: {var_label}")
 
         # Filtro de Estado
-        estados_disponiveis = sorted(df_base_regiao['state'].unique().astype(str))
         estados_sel = st.multiselect(
             "Filtre os Estados (Opcional):", 
             estados_disponiveis, 
@@ -205,12 +211,14 @@ else:
         )
 
         if estados_sel:
-            df_estado = df_regiao[df_regiao['state'].isin(estados_sel)]
+            df_estado = armazem.consultar('mensal', ['state'], regioes=regioes_sel, estados=estados_sel,
+                                          anos=faixa_anos, distintos=True)
         else:
             df_estado = df_regiao
 
         with st.expander("### 📊 Estatísticas Detalhadas por Estados", expanded=False):
-            tabela_est = df_estado.groupby('state')[var_coluna].agg(['count', 'mean', 'std', 'min', 'max', 'median']).reset_index().sort_values(by='state', ascending=True)
+            estados_tabela = estados_sel if estados_sel else estados_disponiveis
+            tabela_est = cubo.resumo('mensal', 'state', var_coluna, estados_tabela, faixa_anos)
             altura_est = (len(tabela_est) + 1) * 35 + 3
 
             st.dataframe(
@@ -226,17 +234,10 @@ else:
             st.markdown("**Comparativo de Distribuição**")
             ordem_estados = sorted(df_estado['state'].unique())
             
-            fig_box_est = px.box(
-                df_estado, 
-                x="state", 
-                y=var_coluna, 
-                color="state",
-                title=f"Distribuição de {var_label} (por Estado)",
-                color_discrete_map=cores_estados,
-                category_orders={"state": ordem_estados}
-            )
+            fig_box_est = graficos.figura_distribuicao(resumos_distribuicao('state', ordem_estados), cores_estados, formato_dist)
             # CONFIGURAÇÃO DE LAYOUT TRAVADO
             fig_box_est.update_layout(
+                title=f"Distribuição de {var_label} (por Estado)",
                 showlegend=False, 
                 xaxis=dict(fixedrange=True, title="Estados"), 
                 yaxis=dict(fixedrange=True, title=var_label)
@@ -256,14 +257,15 @@ else:
             )
         with col_graph:
             if estado_destaque:
-                df_destaque = df_regiao[df_regiao['state'] == estado_destaque]
+                df_destaque = armazem.consultar('mensal', ['state'], regioes=regioes_sel, estados=[estado_destaque],
+                                                anos=faixa_anos, distintos=True)
                 
                 if not df_destaque.empty:
-                    df_line_dest = df_destaque.groupby('Data_Dia')[var_coluna].mean().reset_index()  
+                    df_line_dest = cubo.serie('mensal', 'state', var_coluna, 'mes', [estado_destaque], faixa_anos)
                     
                     fig_dest = px.line(
                         df_line_dest, 
-                        x="Data_Dia", 
+                        x="periodo", 
                         y=var_coluna, 
                         markers=True,
                         title=f"Evolução Isolada: {estado_destaque}"
@@ -0,0 +1,86 @@
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+from modulos import armazem, assistente, inicializacao, instrumentacao
+
+st.header("⏱️ Diagnóstico de Desempenho")
+st.markdown(f"Tempos por etapa das últimas {instrumentacao.CAPACIDADE} medições deste processo (todas as sessões).")
+
+resumo = instrumentacao.resumo()
+if resumo.empty:
+    st.info("Nenhuma medição ainda. Navegue pelas outras páginas e volte aqui.")
+    st.stop()
+
+# --- 1. INDICADORES ---
+paginas = resumo[resumo['etapa'] == 'pagina']
+graficos = resumo[resumo['etapa'] == 'grafico.plotly_chart']
+m1, m2, m3 = st.columns(3)
+m1.metric("Medições", int(resumo['chamadas'].sum()))
+if not paginas.empty:
+    m2.metric("Rerun p95", f"{paginas['p95_ms'].iloc[0]:.0f} ms")
+if not graficos.empty:
+    m3.metric("Payload Médio por Gráfico", f"{graficos['bytes_medio'].iloc[0] / 1024:.0f} KB")
+
+# --- 2. TABELA POR ETAPA ---
+st.dataframe(
+    resumo.style.format({
+        'p50_ms': '{:.1f}', 'p95_ms': '{:.1f}', 'max_ms': '{:.1f}', 'total_ms': '{:.0f}',
+        'bytes_medio': lambda b: '' if b != b else f'{b / 1024:.1f} KB',
+        'taxa_acerto': lambda t: '' if t != t else f'{t:.0%}',
+    }),
+    hide_index=True, use_container_width=True
+)
+
+fig = px.bar(resumo.head(20).melt(id_vars='etapa', value_vars=['p50_ms', 'p95_ms'], var_name='percentil', value_name='ms'),
+             x='ms', y='etapa', color='percentil', barmode='group', orientation='h',
+             title="p50 × p95 por etapa (20 etapas com maior tempo total)")
+fig.update_layout(height=max(400, 28 * min(len(resumo), 20)), yaxis=dict(autorange='reversed'))
+st.plotly_chart(fig, use_container_width=True)
+
+# --- 3. TEMPO POR PÁGINA ---
+registros = instrumentacao.registros()
+por_pagina = [r for r in registros if r['etapa'] == 'pagina']
+if por_pagina:
+    with st.expander("📄 Reruns por página"):
+        tabela = pd.DataFrame(por_pagina).groupby('detalhe')['ms'].describe(percentiles=[0.5, 0.95])
+        st.dataframe(tabela[['count', '50%', '95%', 'max']], use_container_width=True)
+
+# --- 4. PARTIDA A FRIO ---
+partida = inicializacao.relatorio()
+with st.expander(f"🚀 Pré-aquecimento ({partida['estado']})"):
+    if partida['pronto_ms'] is not None:
+        st.caption(f"Caches e bibliotecas prontos {partida['pronto_ms'] / 1000:.1f} s após o início do processo.")
+    etapas = pd.DataFrame(
+        [('Carregador', nome, ms) for nome, ms in partida['carregadores'].items()]
+        + [('Import', nome, ms) for nome, ms in partida['imports'].items()],
+        columns=['tipo', 'etapa', 'ms'])
+    if not etapas.empty:
+        st.dataframe(etapas.style.format({'ms': '{:.0f}'}), hide_index=True, use_container_width=True)
+    for nome, erro in partida['falhas'].items():
+        st.caption(f"⚠️ {nome}: {erro}")
+
+# --- 5. CACHES DE CONSULTA ---
+with st.expander("🗄️ Armazém analítico"):
+    estado_armazem = armazem.estatisticas()
+    a1, a2, a3 = st.columns(3)
+    a1.metric("Motor", estado_armazem['motor'])
+    a2.metric("Consultas em cache", estado_armazem['consultas_em_cache'])
+    a3.metric("Memória do cache", f"{estado_armazem['mb_em_cache']:.1f} MB")
+
+with st.expander("🤖 Cache de respostas do assistente"):
+    estado_assistente = assistente.estatisticas()
+    perguntas = estado_assistente['exato'] + estado_assistente['semantico'] + estado_assistente['falta']
+    r1, r2, r3, r4 = st.columns(4)
+    r1.metric("Entradas", estado_assistente['entradas'])
+    r2.metric("Acertos exatos", estado_assistente['exato'])
+    r3.metric("Acertos semânticos", estado_assistente['semantico'])
+    r4.metric("Taxa de acerto",
+              f"{(perguntas - estado_assistente['falta']) / perguntas:.0%}" if perguntas else "—")
+
+# --- 6. EXPORTAÇÃO ---
+c1, c2 = st.columns(2)
+c1.download_button("📥 Exportar JSONL", instrumentacao.exportar_jsonl(), file_name="diagnostico.jsonl",
+                   mime="application/jsonl")
+if c2.button("🗑️ Limpar medições"):
+    instrumentacao.limpar()
+    st.rerun()
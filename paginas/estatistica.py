@@ -1,27 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from modulos import correlacao, dados
 
 st.set_page_config(layout="wide", page_title="Análise Climática Brasil")
 
 st.header("📈 Matrizes de Correlção")
 st.markdown("Exploração de correlações climáticas por estado e nível nacional (2015-2021).")
 
-# --- 1. CARREGAMENTO E PREPARAÇÃO DOS DADOS ---
-@st.cache_data
-def carregar_dados_stats():
-    try:
-        df = pd.read_csv("dataframe/clima_brasil_semanal_refinado_2015.csv")
-    except FileNotFoundError:
-        try:
-            df = pd.read_csv("clima_brasil_semanal_refinado_2015.csv")
-        except:
-            st.error("Erro: Base de dados não encontrada.")
-            st.stop()
-    return df
-
-df = carregar_dados_stats()
-
+# --- 1. PREPARAÇÃO (colunas do esquema semanal; as matrizes vêm do tensor em cache) ---
 cols_map = {
     'radiacao_media': 'Radiação',
     'vento_medio': 'Vento',
@@ -31,25 +18,21 @@ cols_map = {
     'temperatura_media': 'Temperatura',
     'umidade_media': 'Umidade'
 }
-cols_validas = {k: v for k, v in cols_map.items() if k in df.columns}
+cols_validas = {k: v for k, v in cols_map.items() if k in dados.TABELAS['semanal']['medidas']}
 colunas_numericas = list(cols_validas.values())
 
 st.markdown("---")
 
 # --- 2. FILTRO E PROCESSAMENTO ---
-if 'state' in df.columns:
-    estados_disponiveis = ["Brasil (Todos)"] + sorted(df['state'].unique().tolist())
-    estado_selecionado = st.selectbox("Selecione o Estado para as Matrizes:", estados_disponiveis)
+# As matrizes de todos os estados são pré-calculadas (tensor em cache): trocar o estado é só uma fatia
+estados_disponiveis = [correlacao.BRASIL] + dados.estados('semanal')
+estado_selecionado = st.selectbox("Selecione o Estado para as Matrizes:", estados_disponiveis)
+
 
-    if estado_selecionado == "Brasil (Todos)":
-        df_corr = df.copy()
-    else:
-        df_corr = df[df['state'] == estado_selecionado].copy()
-else:
-    df_corr = df.copy()
-    estado_selecionado = "Brasil"
+def matriz_renomeada(metodo):
+    corr = correlacao.matriz(estado_selecionado, metodo).rename(index=cols_validas, columns=cols_validas)
+    return corr.loc[colunas_numericas, colunas_numericas]
 
-df_corr_renomeado = df_corr.rename(columns=cols_validas)
 
 # --- 3. CONFIGURAÇÃO DOS GRÁFICOS (HOVER + TELA CHEIA) ---
 config_custom = {
@@ -81,7 +64,7 @@ col_pearson, col_spearman = st.columns(2)
 
 with col_pearson:
     st.markdown("#### 🔵 Pearson (Relação Linear)")
-    corr_p = df_corr_renomeado[colunas_numericas].corr(method='pearson')
+    corr_p = matriz_renomeada('pearson')
     fig_p = px.imshow(
         corr_p,
         text_auto=".2f",
@@ -93,7 +76,7 @@ with col_pearson:
 
 with col_spearman:
     st.markdown("#### 🟢 Spearman (Relação de Posto)")
-    corr_s = df_corr_renomeado[colunas_numericas].corr(method='spearman')
+    corr_s = matriz_renomeada('spearman')
     fig_s = px.imshow(
         corr_s,
         text_auto=".2f",
@@ -104,3 +87,38 @@ with col_spearman:
     st.plotly_chart(aplicar_estilo_matriz(fig_s), use_container_width=True, config=config_custom)
 
 st.markdown("---")
+
+# --- 5. EXPLORAÇÃO DE UM PAR DE VARIÁVEIS ---
+st.markdown("#### 🔎 Evolução de um Par de Variáveis")
+nomes_para_colunas = {v: k for k, v in cols_validas.items()}
+c_par1, c_par2 = st.columns(2)
+with c_par1:
+    var_a = st.selectbox("Variável A:", colunas_numericas, index=colunas_numericas.index('Temperatura'))
+with c_par2:
+    var_b = st.selectbox("Variável B:", colunas_numericas, index=colunas_numericas.index('Umidade'))
+col_a, col_b = nomes_para_colunas[var_a], nomes_para_colunas[var_b]
+
+tab_ano, tab_movel, tab_defasagem = st.tabs(["📅 Ano a Ano", "〰️ Janela Móvel", "⏱️ Defasagem"])
+
+with tab_ano:
+    evolucao = correlacao.evolucao_anual(estado_selecionado, col_a, col_b).dropna()
+    fig_ano = px.line(evolucao, x='ano', y=['Pearson', 'Spearman'], markers=True,
+                      title=f"Correlação {var_a} × {var_b} por ano ({estado_selecionado})")
+    fig_ano.update_layout(yaxis=dict(range=[-1, 1], title="Correlação"), legend_title="Método")
+    st.plotly_chart(fig_ano, use_container_width=True)
+
+with tab_movel:
+    janela = st.slider("Janela (semanas):", 12, 104, correlacao.JANELA_MOVEL, step=4)
+    movel = correlacao.movel(estado_selecionado, col_a, col_b, janela)
+    fig_movel = px.line(movel, x='semana_ref', y='correlacao',
+                        title=f"Correlação de Pearson em janela móvel de {janela} semanas")
+    fig_movel.update_layout(yaxis=dict(range=[-1, 1], title="Correlação"), xaxis_title="Semana")
+    st.plotly_chart(fig_movel, use_container_width=True)
+
+with tab_defasagem:
+    st.caption(f"Correlação entre {var_a} na semana t e {var_b} na semana t + k (k negativo: {var_b} vem antes).")
+    defasagem = correlacao.defasada(estado_selecionado, col_a, col_b)
+    fig_def = px.bar(defasagem, x='defasagem', y='correlacao', color='correlacao',
+                     color_continuous_scale="RdBu_r", range_color=[-1, 1])
+    fig_def.update_layout(xaxis_title="Defasagem k (semanas)", yaxis=dict(range=[-1, 1], title="Correlação"))
+    st.plotly_chart(fig_def, use_container_width=True)
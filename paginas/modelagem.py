@@ -3,13 +3,7 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
-from sklearn.linear_model import LinearRegression
-from sklearn.cluster import KMeans
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from modulos import anomalias, backtest, dados, geo, modelos, previsao, registro
 
 # 1. Configuração da Página
 st.set_page_config(page_title="IA & Modelagem Climática", layout="wide")
@@ -27,24 +21,14 @@ st.header("🧠 Inteligência Artificial e Modelagem")
 st.markdown("Uma suíte completa de algoritmos para entender o passado, detectar padrões ocultos e prever o futuro.")
 
 # --- 1. CARREGAMENTO DE DADOS ---
-@st.cache_data
+@st.cache_resource(show_spinner=False)
 def carregar_dados_ml():
-    try:
-        df = pd.read_csv("dataframe/clima_brasil_semanal_refinado_2015.csv")
-    except:
-        df = pd.read_csv("clima_brasil_semanal_refinado_2015.csv")
-        
-    if 'semana_ref' in df.columns:
-        df['semana_ref'] = pd.to_datetime(df['semana_ref'])
-        df['ano'] = df['semana_ref'].dt.year
-        df['mes'] = df['semana_ref'].dt.month
-        # Cria uma coluna numérica para o tempo (necessário para regressão temporal)
-        df['tempo_ordinal'] = df['semana_ref'].apply(lambda x: x.toordinal())
-    
-    # Remove linhas com NaNs para não quebrar os modelos
-    cols_numericas_raw = ['chuva_media_semanal', 'temperatura_media', 'umidade_media', 
-                       'vento_medio', 'pressao_media', 'radiacao_media']
-    
+    # Base sem lacunas: linhas com NaN em qualquer medida quebrariam os modelos
+    df = dados.carregar_completos('semanal')
+    # Cria uma coluna numérica para o tempo (necessário para regressão temporal)
+    # 719163 = date(1970, 1, 1).toordinal(), equivalente vetorizado de toordinal()
+    df['tempo_ordinal'] = df['semana_ref'].values.astype('datetime64[D]').astype('int64') + 719163
+
     # --- NOMES DAS VARIÁVEIS ---
     mapa = {
         'chuva_media_semanal': 'Chuva Média (mm)',
@@ -55,22 +39,13 @@ def carregar_dados_ml():
         'radiacao_media': 'Radiação Média (Kj/m²)'
     }
     
-    df = df.dropna(subset=cols_numericas_raw)
     return df, mapa
 
-# Carrega GeoJSON para o mapa de clusters
-@st.cache_data
-def carregar_geojson_ml():
-    url = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            return response.json()
-    except:
-        return None
-
 df, mapa_nomes = carregar_dados_ml()
-geojson = carregar_geojson_ml()
+try:
+    geojson = geo.carregar_geojson()  # Mapa de clusters (ativo local compartilhado)
+except Exception:
+    geojson = None  # Sem o mapa, as abas mostram só as tabelas
 
 # --- DEFINIÇÃO DAS ABAS ---
 tab1, tab2, tab3, tab4 = st.tabs([
@@ -96,18 +71,18 @@ with tab1:
 
     if features:
         # Preparação
-        X = df[features]
         y = df[target]
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
-        # Modelo
-        model = LinearRegression()
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
+        # Modelo (registro de modelos: reaproveita o ajuste se já foi feito antes)
+        ajuste = registro.obter_ou_ajustar(
+            'LinearRegression', modelos.PARAMETROS_REGRESSAO,
+            features + [target], df[features + [target]], lambda: modelos.regressao(df, features, target)
+        )
+        model, y_test, y_pred = ajuste['model'], ajuste['y_test'], ajuste['y_pred']
         
         # Métricas
-        r2 = r2_score(y_test, y_pred)
-        mae = mean_absolute_error(y_test, y_pred)
+        r2 = ajuste['r2']
+        mae = ajuste['mae']
         
         c1, c2 = st.columns(2)
         c1.metric("R² (Capacidade de Explicação)", f"{r2:.2%}", help="Quanto da variação do Y é explicado pelo X.")
@@ -155,15 +130,14 @@ with tab2:
         
     if features_cluster:
         # Agrupamento da média histórica por estado
-        df_estado = df.groupby('state')[features_cluster].mean().reset_index()
+        df_estado = modelos.medias_por_estado(df, features_cluster)
         
-        # Normalização (Crucial para K-Means)
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(df_estado[features_cluster])
-        
-        # Modelo
-        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        df_estado['Cluster'] = kmeans.fit_predict(X_scaled).astype(str)
+        ajuste = registro.obter_ou_ajustar(
+            'KMeans', {'n_clusters': n_clusters, **modelos.PARAMETROS_KMEANS, 'scaler': 'StandardScaler'},
+            features_cluster, df_estado[['state'] + features_cluster],
+            lambda: modelos.kmeans(df_estado, features_cluster, n_clusters)
+        )
+        df_estado['Cluster'] = ajuste['labels'].astype(str)
         
         with col2:
             if geojson:
@@ -209,40 +183,81 @@ with tab3:
     
     c_iso1, c_iso2 = st.columns(2)
     contamination = c_iso1.slider("Sensibilidade (% de Anomalias):", 1, 10, 2) / 100
-    estado_anomalia = c_iso2.selectbox("Filtrar Estado:", sorted(df['state'].unique()), key='iso_state')
+    estado_anomalia = c_iso2.selectbox("Filtrar Estado:", dados.estados('semanal'), key='iso_state')
     
-    if st.button("Detectar Anomalias"):
-        df_iso = df[df['state'] == estado_anomalia].copy()
-        features_iso = ['temperatura_media', 'chuva_media_semanal', 'umidade_media', 'vento_medio']
-        
-        # Modelo
-        iso = IsolationForest(contamination=contamination, random_state=42)
-        df_iso['anomalia'] = iso.fit_predict(df_iso[features_iso])
-        
-        anomalias = df_iso[df_iso['anomalia'] == -1]
-        st.metric("Semanas Anômalas Encontradas", len(anomalias))
-        
-        # Gráfico
-        fig_iso = px.scatter(
-            df_iso, x='semana_ref', y='temperatura_media', 
-            color=df_iso['anomalia'].astype(str),
-            color_discrete_map={'-1': '#EF5350', '1': '#BDBDBD'}, # Vermelho (Anomalia) e Cinza (Normal)
-            title=f"Linha do Tempo: Vermelho = Anomalia",
-            hover_data=features_iso,
-            labels={'semana_ref': 'Data', 'temperatura_media': 'Temperatura Média (C)'}
-        )
-        
-        # Configuração Travada
-        fig_iso.update_layout(
-            xaxis=dict(fixedrange=True, title="Data"), 
-            yaxis=dict(fixedrange=True, title="Temperatura Média (C)"),
-            showlegend=False
+    # Pontuações pré-calculadas para todos os estados: a sensibilidade só move o limiar (sem reajuste)
+    features_iso = anomalias.FEATURES
+    df_marcado = anomalias.marcar(contamination)
+    
+    # Só as semanas do estado: fatias contíguas da tabela e das pontuações (sem varredura nem cópia)
+    df_iso = dados.fatia('semanal', estado=estado_anomalia, completos=True)[['semana_ref'] + features_iso].merge(
+        anomalias.marcar(contamination, [estado_anomalia])[['semana_ref', 'pontuacao', 'anomalia']],
+        on='semana_ref'
+    )
+    
+    df_anomalas = df_iso[df_iso['anomalia'] == -1]
+    st.metric("Semanas Anômalas Encontradas", len(df_anomalas))
+    
+    # Gráfico
+    fig_iso = px.scatter(
+        df_iso, x='semana_ref', y='temperatura_media', 
+        color=df_iso['anomalia'].astype(str),
+        color_discrete_map={'-1': '#EF5350', '1': '#BDBDBD'}, # Vermelho (Anomalia) e Cinza (Normal)
+        title=f"Linha do Tempo: Vermelho = Anomalia",
+        hover_data=features_iso + ['pontuacao'],
+        labels={'semana_ref': 'Data', 'temperatura_media': 'Temperatura Média (C)', 'pontuacao': 'Pontuação'}
+    )
+    
+    # Configuração Travada
+    fig_iso.update_layout(
+        xaxis=dict(fixedrange=True, title="Data"), 
+        yaxis=dict(fixedrange=True, title="Temperatura Média (C)"),
+        showlegend=False
+    )
+    st.plotly_chart(fig_iso, use_container_width=True, config=config_padrao)
+    
+    st.markdown("**Dados das Anomalias:**")
+    anomalias_view = df_anomalas[['semana_ref', 'pontuacao'] + features_iso].sort_values('semana_ref').rename(columns=mapa_nomes)
+    st.dataframe(anomalias_view, use_container_width=True)
+    
+    # --- VISÃO NACIONAL: ANOMALIAS DA SEMANA ---
+    st.markdown("#### 🇧🇷 Anomalias da Semana (Todos os Estados)")
+    semanas = sorted(df_marcado['semana_ref'].unique())
+    semana_sel = st.select_slider(
+        "Semana:", options=semanas, value=semanas[-1],
+        format_func=lambda d: pd.Timestamp(d).strftime('%d/%m/%Y'), key='iso_semana'
+    )
+    df_semana = df_marcado[df_marcado['semana_ref'] == semana_sel].copy()
+    df_semana['Situação'] = np.where(df_semana['anomalia'] == -1, 'Anômala', 'Normal')
+    
+    col_m1, col_m2 = st.columns([3, 2])
+    with col_m1:
+        if geojson:
+            fig_sem = px.choropleth_mapbox(
+                df_semana,
+                geojson=geojson,
+                locations='state',
+                featureidkey="properties.sigla",
+                color='Situação',
+                color_discrete_map={'Anômala': '#EF5350', 'Normal': '#BDBDBD'},
+                hover_data={'pontuacao': ':.3f'},
+                mapbox_style="carto-positron",
+                zoom=3.0,
+                center={"lat": -15.0, "lon": -54.0},
+                opacity=0.9
+            )
+            fig_sem.update_layout(margin={"r":0,"t":0,"l":0,"b":0}, legend_title_text="")
+            st.plotly_chart(fig_sem, use_container_width=True, config=config_padrao)
+        else:
+            st.warning("Mapa não carregou (GeoJSON offline).")
+    with col_m2:
+        st.metric("Estados com Semana Anômala", int((df_semana['anomalia'] == -1).sum()))
+        st.dataframe(
+            df_semana.sort_values('pontuacao', ascending=False)[['state', 'pontuacao', 'Situação']],
+            use_container_width=True,
+            hide_index=True,
+            column_config={"state": "Estado", "pontuacao": st.column_config.NumberColumn("Pontuação", format="%.3f")}
         )
-        st.plotly_chart(fig_iso, use_container_width=True, config=config_padrao)
-        
-        st.markdown("**Dados das Anomalias:**")
-        anomalias_view = anomalias[['semana_ref'] + features_iso].sort_values('semana_ref').rename(columns=mapa_nomes)
-        st.dataframe(anomalias_view, use_container_width=True)
 
 # ==============================================================================
 # TAB 4: PREVISÃO TEMPORAL (Séries Temporais com Validação)
@@ -252,41 +267,25 @@ with tab4:
     st.markdown("O modelo aprende Tendência (Anos) e Sazonalidade (Meses).")
     
     var_time = st.selectbox("O que prever?", list(mapa_nomes.keys()), format_func=lambda x: mapa_nomes[x], key='time_var')
-    estado_filtro = st.selectbox("Filtrar por Estado:", sorted(df['state'].unique()), key='time_state_filter')
-    
-    # Preparação
-    df_time = df[df['state'] == estado_filtro].copy()
-    df_grouped = df_time.groupby('semana_ref')[var_time].mean().reset_index().sort_values('semana_ref')
+    estado_filtro = st.selectbox("Filtrar por Estado:", dados.estados('semanal'), key='time_state_filter')
     
-    # Feature Engineering
-    df_grouped['dia_ordinal'] = df_grouped['semana_ref'].apply(lambda x: x.toordinal())
-    df_grouped['mes'] = df_grouped['semana_ref'].dt.month
-    
-    # Dummies para Sazonalidade
-    meses_dummies = pd.get_dummies(df_grouped['mes'], prefix='mes').astype(int)
-    for i in range(1, 13):
-        if f'mes_{i}' not in meses_dummies.columns: meses_dummies[f'mes_{i}'] = 0
-    meses_dummies = meses_dummies[sorted(meses_dummies.columns)]
-    
-    df_ml = pd.concat([df_grouped, meses_dummies], axis=1)
-    features_time = ['dia_ordinal'] + list(meses_dummies.columns)
+    # Resultado do motor em lote (todos os estados ajustados juntos, cache por variável/estado/horizonte)
+    resultado = previsao.prever(var_time, estado_filtro)
+    df_grouped = resultado['historico']
     
     # Cor padrão (Azul Plotly)
     cor_padrao = '#1f77b4'
 
     # --- VALIDAÇÃO (BACKTESTING) ---
     st.markdown("### 1️⃣ Validação: Teste no Passado")
-    qtd_teste = 52 # Último ano
+    qtd_teste = previsao.QTD_TESTE # Último ano
     
-    if len(df_ml) > qtd_teste * 2:
-        train = df_ml.iloc[:-qtd_teste]
-        test = df_ml.iloc[-qtd_teste:]
-        
-        model_val = LinearRegression()
-        model_val.fit(train[features_time], train[var_time])
-        pred_val = model_val.predict(test[features_time])
+    if not np.isnan(resultado['mae']):
+        test = resultado['teste']
+        train = df_grouped[df_grouped['semana_ref'] < test['semana_ref'].min()]
+        pred_val = test['previsto']
         
-        mae_val = mean_absolute_error(test[var_time], pred_val)
+        mae_val = resultado['mae']
         erro_perc = (mae_val / test[var_time].mean()) * 100
         
         c_v1, c_v2, c_v3 = st.columns(3)
@@ -315,34 +314,28 @@ with tab4:
 
     # --- PREVISÃO FUTURA ---
     st.markdown("### 2️⃣ Projeção Futura (12 Meses)")
+    nivel_intervalo = st.slider("Nível do Intervalo de Previsão (%):", 50, 95, 80, step=5, key='time_nivel') / 100
     
-    # Treino com TUDO
-    model_full = LinearRegression()
-    model_full.fit(df_ml[features_time], df_ml[var_time])
-    
-    # Datas futuras
-    ultima_data = df_grouped['semana_ref'].max()
-    datas_futuras = [ultima_data + pd.Timedelta(days=x) for x in range(7, 365, 7)]
-    df_fut = pd.DataFrame({'semana_ref': datas_futuras})
-    df_fut['dia_ordinal'] = df_fut['semana_ref'].apply(lambda x: x.toordinal())
-    df_fut['mes'] = df_fut['semana_ref'].dt.month
-    
-    # Dummies futuro
-    dum_fut = pd.get_dummies(df_fut['mes'], prefix='mes').astype(int)
-    for col in meses_dummies.columns:
-        if col not in dum_fut.columns: dum_fut[col] = 0
-    dum_fut = dum_fut[sorted(meses_dummies.columns)]
-    
-    X_fut = pd.concat([df_fut[['dia_ordinal']], dum_fut], axis=1)
-    y_fut = model_full.predict(X_fut)
+    # Treino com TUDO (já feito no lote)
+    df_fut = resultado['futuro']
+    y_fut = df_fut['previsto'].to_numpy()
     
     # Plot Final
     fig_fut = go.Figure()
     fig_fut.add_trace(go.Scatter(x=df_grouped['semana_ref'], y=df_grouped[var_time], name='Histórico', line=dict(color=cor_padrao)))
     fig_fut.add_trace(go.Scatter(x=df_fut['semana_ref'], y=y_fut, name='Previsão Futura', line=dict(color='#66BB6A', width=3)))
     
-    # Intervalo de Confiança (Sombra)
-    if 'mae_val' in locals():
+    # Intervalo de Previsão Empírico (Sombra): quantis dos erros do backtesting com origem móvel
+    df_int = backtest.intervalos(var_time, estado_filtro, nivel_intervalo)
+    if df_int['n_origens'].min() > 0:
+        fig_fut.add_trace(go.Scatter(
+            x=list(df_fut['semana_ref']) + list(df_fut['semana_ref'])[::-1],
+            y=list(y_fut + df_int['superior']) + list(y_fut + df_int['inferior'])[::-1],
+            fill='toself', fillcolor='rgba(102, 187, 106, 0.2)', # Verde suave transparente
+            line=dict(color='rgba(255,255,255,0)'), name=f'Intervalo {nivel_intervalo:.0%}'
+        ))
+        st.caption(f"Intervalo empírico a partir de {int(df_int['n_origens'].max())} origens de backtesting (treino até cada origem, teste nas 52 semanas seguintes).")
+    elif 'mae_val' in locals():
         fig_fut.add_trace(go.Scatter(
             x=list(df_fut['semana_ref']) + list(df_fut['semana_ref'])[::-1],
             y=list(y_fut + mae_val) + list(y_fut - mae_val)[::-1],
@@ -356,4 +349,54 @@ with tab4:
         xaxis=dict(fixedrange=True, title="Data"), 
         yaxis=dict(fixedrange=True, title=mapa_nomes[var_time])
     )
-    st.plotly_chart(fig_fut, use_container_width=True, config=config_padrao)
\ No newline at end of file
+    st.plotly_chart(fig_fut, use_container_width=True, config=config_padrao)
+
+    with st.expander("📐 Erro por Horizonte (Backtesting com Origem Móvel)"):
+        fig_h = px.line(
+            df_int, x='horizonte', y=['mae', 'inferior', 'superior'],
+            labels={'horizonte': 'Semanas à Frente', 'value': 'Erro', 'variable': ''},
+            color_discrete_sequence=[cor_padrao, '#BDBDBD', '#BDBDBD']
+        )
+        fig_h.update_layout(height=300, xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True))
+        st.plotly_chart(fig_h, use_container_width=True, config=config_padrao)
+
+    # --- VISÃO NACIONAL ---
+    st.markdown("### 3️⃣ Visão Nacional (Todos os Estados)")
+    st.caption("Todos os estados são ajustados de uma só vez; a tabela e o mapa saem do mesmo cálculo em lote.")
+    
+    df_nacional = previsao.tabela_nacional(var_time)
+    
+    col_tab, col_mapa = st.columns([2, 3])
+    with col_tab:
+        st.dataframe(
+            df_nacional,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "state": "Estado",
+                "media_historica": st.column_config.NumberColumn("Média Histórica", format="%.2f"),
+                "media_prevista": st.column_config.NumberColumn("Média Prevista (12m)", format="%.2f"),
+                "variacao": st.column_config.NumberColumn("Variação", format="%+.2f"),
+                "mae": st.column_config.NumberColumn("MAE (Validação)", format="%.2f"),
+            }
+        )
+    with col_mapa:
+        if geojson:
+            fig_nac = px.choropleth_mapbox(
+                df_nacional,
+                geojson=geojson,
+                locations='state',
+                featureidkey="properties.sigla",
+                color='variacao',
+                color_continuous_scale="RdBu_r",
+                color_continuous_midpoint=0,
+                mapbox_style="carto-positron",
+                zoom=3.0,
+                center={"lat": -15.0, "lon": -54.0},
+                opacity=0.9,
+                title="Variação Prevista vs Média Histórica"
+            )
+            fig_nac.update_layout(margin={"r":0,"t":40,"l":0,"b":0}, coloraxis_colorbar=dict(title="Variação"))
+            st.plotly_chart(fig_nac, use_container_width=True, config=config_padrao)
+        else:
+            st.warning("Mapa não carregou (GeoJSON offline).")
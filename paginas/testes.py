@@ -4,34 +4,11 @@ import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from scipy import stats
+from modulos import armazem, comparacoes, graficos, reamostragem
 
 # --- 1. CARREGAMENTO E TRATAMENTO ---
-@st.cache_data
-def carregar_dados_stats():
-    try:
-        df = pd.read_csv("dataframe/clima_brasil_semanal_refinado_2015.csv")
-    except:
-        try:
-            df = pd.read_csv("clima_brasil_semanal_refinado_2015.csv")
-        except:
-            st.error("Erro: CSV não encontrado.")
-            st.stop()
-            
-    if 'semana_ref' in df.columns:
-        df['semana_ref'] = pd.to_datetime(df['semana_ref'])
-        df['ano'] = df['semana_ref'].dt.year
-        df['mes'] = df['semana_ref'].dt.month
-        
-        def get_estacao(m):
-            if m in [12, 1, 2]: return "Verão"
-            elif m in [3, 4, 5]: return "Outono"
-            elif m in [6, 7, 8]: return "Inverno"
-            else: return "Primavera"
-        df['estacao'] = df['mes'].apply(get_estacao)
-        
-    return df
-
-df = carregar_dados_stats()
+# Armazém semanal (já com o calendário sazonal, coluna 'estacao'): só as colunas de cada teste
+colunas_tabela = armazem.colunas('semanal')
 
 cols_map = {
     'radiacao_media': 'Radiação',
@@ -41,9 +18,24 @@ cols_map = {
     'temperatura_media': 'Temperatura',
     'umidade_media': 'Umidade'
 }
-cols_validas = {k: v for k, v in cols_map.items() if k in df.columns}
+cols_validas = {k: v for k, v in cols_map.items() if k in colunas_tabela}
 colunas_numericas = list(cols_validas.values())
 
+
+@st.cache_data(show_spinner=False)
+def amostras_por_grupo(coluna, chave, anual):
+    """Amostra de cada grupo (semanas ou médias anuais), calculada uma vez por combinação."""
+    # Região, estado e semana garantem a ordem temporal usada pela reamostragem em blocos
+    base = armazem.consultar('semanal', list(dict.fromkeys([chave, 'region', 'state', 'semana_ref', 'ano', coluna])))
+    return comparacoes.amostras_por_grupo(base, coluna, chave, anual)
+
+
+@st.cache_data(show_spinner=False)
+def reamostrar(amostras, reamostras):
+    """Permutação e bootstrap em blocos (cache por amostras e nº de reamostras)."""
+    return (reamostragem.teste_permutacao_blocos(amostras, reamostras),
+            reamostragem.bootstrap_efeito(amostras, reamostras))
+
 # --- 2. INTERFACE ---
 st.header("🧪 Teste de Hipóteses (Com Validação de Suposições)")
 st.markdown("""
@@ -57,10 +49,10 @@ with st.container(border=True):
         col_orig = [k for k, v in cols_validas.items() if v == var_analise][0]
     with c2:
         labels = {'region': 'Região', 'state': 'Estado', 'estacao': 'Estação'} # Tiramos 'ano' daqui pois ele será usado na agregação
-        opts = [op for op in labels.keys() if op in df.columns]
+        opts = [op for op in labels.keys() if op in colunas_tabela]
         grupo_key = st.selectbox("2️⃣ Comparar:", opts, format_func=lambda x: labels.get(x, x))
     with c3:
-        vals = sorted(df[grupo_key].unique().astype(str))
+        vals = armazem.valores('semanal', grupo_key)
         grupos = st.multiselect("3️⃣ Grupos:", vals, default=vals[:2] if len(vals)>=2 else vals)
 
 st.markdown("---")
@@ -82,24 +74,12 @@ else:
 if len(grupos) < 2:
     st.info("Selecione os grupos acima.")
 else:
-    df_base = df[df[grupo_key].astype(str).isin(grupos)].copy()
-    
-    dados_grupos = []
-    nomes_grupos = []
-    
-    for g in grupos:
-        df_g = df_base[df_base[grupo_key].astype(str) == g]
-        
-        if modo_agregacao == "Médias Anuais (Recomendado - Independente)":
-            # AGREGAÇÃO: Transforma 300 semanas em 7 anos
-            d = df_g.groupby('ano')[col_orig].mean().dropna()
-        else:
-            # BRUTO: Usa as 300 semanas
-            d = df_g[col_orig].dropna()
-            
-        if len(d) > 1: # Precisa de pelo menos 2 pontos
-            dados_grupos.append(d)
-            nomes_grupos.append(g)
+    anual = modo_agregacao == "Médias Anuais (Recomendado - Independente)"
+    todos_nomes, todas_amostras, preparado = amostras_por_grupo(col_orig, grupo_key, anual)
+    indice_grupo = {g: i for i, g in enumerate(todos_nomes)}
+
+    nomes_grupos = [g for g in grupos if g in indice_grupo]
+    dados_grupos = [todas_amostras[indice_grupo[g]] for g in nomes_grupos]
 
     if len(dados_grupos) < 2:
         st.error("Dados insuficientes após o agrupamento. Tente usar 'Dados Semanais' se houver poucos anos.")
@@ -180,16 +160,90 @@ else:
             st.info(f"**Por que?** {motivo}")
             st.caption(f"Amostras usadas: {len(dados_grupos[0])} pontos por grupo.")
 
-        # --- 6. VISUALIZAÇÃO ---
+        # --- 6. REAMOSTRAGEM (ROBUSTA À AUTOCORRELAÇÃO) ---
+        st.divider()
+        st.subheader("🔁 Reamostragem em Blocos")
+        st.markdown("""
+Confirmação sem depender de fórmulas: a **permutação em blocos** troca blocos de semanas consecutivas entre os grupos
+(preservando a autocorrelação) e o **bootstrap em blocos** gera o intervalo de confiança do tamanho de efeito.
+O tamanho do bloco é escolhido pela própria autocorrelação da série (1 = observações independentes).
+""")
+        n_reamostras = st.select_slider("Número de reamostras:", [1000, 2000, 5000, 10000],
+                                        value=reamostragem.N_REAMOSTRAS)
+        with st.spinner("Reamostrando..."):
+            perm, boot = reamostrar(tuple(d.to_numpy(dtype='float64') for d in dados_grupos), n_reamostras)
+
+        c_boot1, c_boot2, c_boot3 = st.columns(3)
+        c_boot1.metric("P-Valor (Permutação)", f"{perm['p_valor']:.4f}",
+                       help=f"Menor p-valor possível com {n_reamostras} reamostras: {1 / (n_reamostras + 1):.1e}")
+        ic_ef = boot['efeito_ic']
+        c_boot2.metric(boot['efeito_nome'], f"{boot['efeito']:.3f}", help="Tamanho de efeito observado")
+        c_boot2.caption(f"IC 95%: [{ic_ef[0]:.3f}, {ic_ef[1]:.3f}]")
+        if 'diferenca' in boot:
+            ic_dif = boot['diferenca_ic']
+            c_boot3.metric(f"Diferença de Médias ({nomes_grupos[0]} - {nomes_grupos[1]})", f"{boot['diferenca']:.3f}")
+            c_boot3.caption(f"IC 95%: [{ic_dif[0]:.3f}, {ic_dif[1]:.3f}]")
+        st.caption(f"Bloco da permutação: {perm['bloco']} · Blocos do bootstrap: "
+                   + ", ".join(f"{n}={b}" for n, b in zip(nomes_grupos, boot['blocos'])))
+
+        # --- 7. COMPARAÇÕES PAR A PAR (POST-HOC) ---
+        st.divider()
+        st.subheader("🧩 Comparações Par a Par (Post-hoc)")
+        c_ph1, c_ph2, c_ph3 = st.columns(3)
+        with c_ph1:
+            metodo_ph = st.selectbox("Teste:", list(comparacoes.METODOS), format_func=comparacoes.METODOS.get)
+        with c_ph2:
+            correcao_ph = st.selectbox("Correção:", list(comparacoes.CORRECOES), format_func=comparacoes.CORRECOES.get,
+                                       disabled=metodo_ph == 'tukey',
+                                       help="Tukey HSD já controla o erro da família de comparações.")
+        with c_ph3:
+            usar_todos = st.toggle(f"Todos os grupos ({len(todos_nomes)})", value=False)
+
+        nomes_ph = todos_nomes if usar_todos else nomes_grupos
+        if len(nomes_ph) < 3:
+            st.info("Selecione 3 ou mais grupos (ou ative 'Todos os grupos') para a matriz de comparações.")
+        else:
+            suf = comparacoes.suficientes(preparado, [indice_grupo[g] for g in nomes_ph])
+            res_ph = comparacoes.todos_os_pares(suf, metodo_ph, correcao_ph)
+            n_sig = int((res_ph['p_par'] < 0.05).sum())
+            st.caption(f"{len(res_ph['p_par'])} pares comparados · {n_sig} com diferença significativa (p < 0.05)")
+
+            fig_ph = go.Figure(go.Heatmap(
+                z=res_ph['p'], x=nomes_ph, y=nomes_ph, zmin=0, zmax=0.1,
+                colorscale='RdBu', colorbar=dict(title="p ajustado"),
+                text=np.round(res_ph['p'], 3) if len(nomes_ph) <= 12 else None,
+                texttemplate="%{text}" if len(nomes_ph) <= 12 else None,
+                hovertemplate="%{y} × %{x}<br>p = %{z:.4f}<extra></extra>"
+            ))
+            fig_ph.update_layout(title=f"P-valores: {comparacoes.METODOS[metodo_ph]}", height=max(400, 22 * len(nomes_ph)),
+                                 yaxis=dict(autorange='reversed'))
+            st.plotly_chart(fig_ph, use_container_width=True)
+
+            with st.expander("📋 Tabela de pares"):
+                medias = suf['media']
+                tabela_ph = pd.DataFrame({
+                    'Grupo A': np.array(nomes_ph)[res_ph['i']],
+                    'Grupo B': np.array(nomes_ph)[res_ph['j']],
+                    'Diferença de Médias': medias[res_ph['i']] - medias[res_ph['j']],
+                    'Estatística': res_ph['estatistica'],
+                    'P-Valor': res_ph['p_par'],
+                }).sort_values('P-Valor')
+                st.dataframe(tabela_ph, hide_index=True, use_container_width=True)
+
+        # --- 8. VISUALIZAÇÃO ---
         fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.3, 0.7], vertical_spacing=0.05)
         cores = ['#3366CC', '#DC3912', '#FF9900', '#109618', '#990099']
         
+        # Quartis, cercas e densidade calculados aqui: o gráfico recebe um resumo por grupo, não os dados brutos
         for i, (d, nome) in enumerate(zip(dados_grupos, nomes_grupos)):
             cor = cores[i % len(cores)]
-            fig.add_trace(go.Box(x=d, name=nome, marker_color=cor, showlegend=False), row=1, col=1)
-            # No modo "Médias Anuais", o histograma fica ruim (poucos dados), então usamos Rug Plot ou só Box
-            if len(d) > 10:
-                fig.add_trace(go.Histogram(x=d, name=nome, marker_color=cor, opacity=0.6, histnorm='probability density'), row=2, col=1)
+            resumo = graficos.resumo_caixa(d, kde=len(d) > 10)
+            for traco in graficos.tracos_caixa({nome: resumo}, {nome: cor}, horizontal=True):
+                fig.add_trace(traco, row=1, col=1)
+            # No modo "Médias Anuais", a densidade fica ruim (poucos dados), então mostramos os pontos
+            if 'densidade' in resumo:
+                fig.add_trace(go.Scatter(x=resumo['grade'].round(4), y=resumo['densidade'].round(6), name=nome, mode='lines',
+                                         line=dict(color=cor), fill='tozeroy', opacity=0.6), row=2, col=1)
             else:
                 # Se tiver poucos dados, usamos um Scatter simples para ver os pontos
                 fig.add_trace(go.Scatter(x=d, y=[0]*len(d), mode='markers', name=nome, marker=dict(color=cor, size=10)), row=2, col=1)
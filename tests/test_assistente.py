@@ -0,0 +1,92 @@
+"""Cache semântico de respostas do assistente (backend local, sem rede)."""
+import numpy as np
+import pytest
+
+from modulos import assistente
+
+CONTEXTO = ("Documentação do projeto.\n"
+            "1. Previsão: regressão linear com tendência e dummies de mês, validada no último ano.\n"
+            "2. Clustering: K-Means sobre as médias padronizadas de cada estado.\n")
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio(monkeypatch):
+    monkeypatch.setattr(assistente, '_respostas', type(assistente._respostas)())
+    monkeypatch.setattr(assistente, '_contagem', {'exato': 0, 'semantico': 0, 'falta': 0})
+    monkeypatch.setattr(assistente, 'ATRASO_LOCAL_S', 0)
+
+
+def _unitario(cosseno):
+    """Vetor unitário com o cosseno pedido em relação a (1, 0)."""
+    return np.array([cosseno, np.sqrt(1 - cosseno ** 2)], dtype='float32')
+
+
+def _perguntar(conversa, pergunta):
+    resposta, origem = assistente.responder(conversa, CONTEXTO, pergunta)
+    return (resposta if isinstance(resposta, str) else ''.join(resposta)), origem
+
+
+def test_resposta_do_modelo_volta_do_cache():
+    conversa = assistente.iniciar(CONTEXTO)
+    assert isinstance(conversa, assistente.ConversaLocal)
+    resposta, origem = _perguntar(conversa, "Como funciona o modelo de previsão?")
+    assert origem == 'modelo' and 'Previsão' in resposta
+
+    # Mesma pergunta normalizada (caixa, acentos, pontuação): acerto exato
+    assert _perguntar(conversa, "como funciona o modelo de previsao") == (resposta, 'exato')
+    # Variação pequena (cosseno 0,93 nos trigramas): acerto semântico
+    assert _perguntar(conversa, "Como funciona o modelo da previsão?") == (resposta, 'semantico')
+    # Abaixo do limiar (0,88): vai ao modelo
+    assert _perguntar(conversa, "Como funciona o modelo de previsão do projeto?")[1] == 'modelo'
+    assert assistente.estatisticas() == {'entradas': 2, 'exato': 1, 'semantico': 1, 'falta': 2}
+
+
+def test_perguntas_curtas_nao_usam_o_cache():
+    conversa = assistente.iniciar(CONTEXTO)
+    for _ in range(2):
+        assert _perguntar(conversa, "e clustering?")[1] == 'modelo'
+    assert assistente.estatisticas()['entradas'] == 0
+
+
+def test_limiar_de_similaridade():
+    assistente.guardar('ctx', "pergunta guardada", "resposta", _unitario(1.0), 'local')
+    acima, abaixo = _unitario(assistente.LIMIAR_SIMILARIDADE + 0.01), _unitario(assistente.LIMIAR_SIMILARIDADE - 0.01)
+    assert assistente.buscar('ctx', "outra pergunta", acima, 'local') == ("resposta", 'semantico')
+    assert assistente.buscar('ctx', "outra pergunta", abaixo, 'local') == (None, 'falta')
+    # Vetores de outro espaço de embedding não se comparam
+    assert assistente.buscar('ctx', "outra pergunta", acima, 'gemini') == (None, 'falta')
+
+
+def test_chave_inclui_a_impressao_do_contexto():
+    chave_a = assistente.impressao('local', CONTEXTO)
+    chave_b = assistente.impressao('local', CONTEXTO + "3. Novo capítulo.\n")
+    assert chave_a != chave_b and chave_a != assistente.impressao('gemini', CONTEXTO)
+
+    vetor = _unitario(1.0)
+    assistente.guardar(chave_a, "como funciona a previsao", "resposta A", vetor, 'local')
+    assert assistente.buscar(chave_a, "Como funciona a previsão?") == ("resposta A", 'exato')
+    assert assistente.buscar(chave_b, "Como funciona a previsão?", vetor, 'local') == (None, 'falta')
+
+
+def test_entradas_expiram(monkeypatch):
+    agora = 1_000_000.0
+    monkeypatch.setattr(assistente.time, 'time', lambda: agora)
+    assistente.guardar('ctx', "pergunta antiga", "resposta")
+
+    agora += assistente.VALIDADE_S
+    assert assistente.buscar('ctx', "pergunta antiga") == ("resposta", 'exato')
+    agora += 1
+    assert assistente.buscar('ctx', "pergunta antiga") == (None, 'falta')
+    assert assistente.estatisticas()['entradas'] == 0
+
+
+def test_despejo_lru(monkeypatch):
+    monkeypatch.setattr(assistente, 'LIMITE_ENTRADAS', 3)
+    for i in range(3):
+        assistente.guardar('ctx', f"pergunta {i}", f"resposta {i}")
+    assistente.buscar('ctx', "pergunta 0")  # Usada agora: a menos recente passa a ser a 1
+    assistente.guardar('ctx', "pergunta 3", "resposta 3")
+
+    assert assistente.buscar('ctx', "pergunta 1") == (None, 'falta')
+    for i in (0, 2, 3):
+        assert assistente.buscar('ctx', f"pergunta {i}") == (f"resposta {i}", 'exato')
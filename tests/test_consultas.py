@@ -0,0 +1,65 @@
+"""Roteador por regras do assistente: perguntas sobre os dados x perguntas de metodologia."""
+import pytest
+
+from modulos import consultas
+
+
+@pytest.mark.parametrize('pergunta, consulta, argumentos', [
+    ("Qual a temperatura média em SP em 2019?", 'valor',
+     {'variavel': 'temperatura', 'local': 'SP', 'ano_inicio': 2019, 'ano_fim': 2019}),
+    ("Quanto chove no Nordeste em janeiro?", 'valor', {'variavel': 'chuva', 'local': 'região NE', 'mes': 1}),
+    ("Qual a umidade no Brasil?", 'valor', {'variavel': 'umidade', 'local': None}),
+    ("Quais os 3 estados mais quentes?", 'ranking',
+     {'variavel': 'temperatura', 'nivel': 'estado', 'ordem': 'maior', 'n': 3}),
+    ("Quais as regiões mais secas em 2020?", 'ranking',
+     {'variavel': 'chuva', 'nivel': 'regiao', 'ordem': 'menor', 'ano_inicio': 2020}),
+    ("Compare a chuva da Bahia e de Pernambuco", 'comparar',
+     {'variavel': 'chuva', 'local_a': 'BA', 'local_b': 'PE'}),
+    ("Qual a temperatura no Rio Grande do Sul e em SE?", 'comparar',
+     {'variavel': 'temperatura', 'local_a': 'RS', 'local_b': 'SE'}),
+    ("Qual o mês mais chuvoso em Minas Gerais?", 'extremo', {'variavel': 'chuva', 'local': 'MG', 'ordem': 'maior'}),
+    ("Qual a temperatura em SP no dia 15/03/2019?", 'semana',
+     {'variavel': 'temperatura', 'local': 'SP', 'data': '2019-03-15'}),
+])
+def test_perguntas_sobre_os_dados(pergunta, consulta, argumentos):
+    nome, recebidos = consultas.interpretar(pergunta)
+    assert nome == consulta
+    assert {k: recebidos.get(k) for k in argumentos} == argumentos
+
+
+@pytest.mark.parametrize('pergunta', [
+    # Metodologia, mesmo citando variável, local ou período
+    "Por que a temperatura tem maior correlação com a umidade?",
+    "A regressão captura o calor de janeiro?",
+    "Qual a correlação entre chuva e temperatura em 2019?",
+    "O teste de Shapiro rejeita a normalidade da temperatura em SP?",
+    "Como o modelo trata a chuva de 2019?",
+    "Quais estados o clustering junta pela umidade?",
+    # Sem forma explícita de pergunta ou sem local/período
+    "Fale sobre a chuva em SP",
+    "SP é quente em janeiro?",
+    "Qual variável mais influencia a chuva?",
+    "Qual a temperatura dia 15?",
+    "Quem criou o projeto?",
+])
+def test_perguntas_que_ficam_com_o_modelo(pergunta):
+    assert consultas.interpretar(pergunta) is None
+
+
+def test_texto_do_extremo_sem_unidade_repetida():
+    texto = consultas.executar('extremo', {'variavel': 'chuva', 'local': 'MG'})['texto']
+    assert texto.startswith("Maior chuva acumulada no mês em Minas Gerais (MG)")
+    assert 'mês mensal' not in texto
+
+
+@pytest.mark.parametrize('nome, argumentos', [
+    ('ranking', {'variavel': 'chuva', 'n': 'cinco'}),
+    ('valor', {'variavel': 'temperatura', 'ano_inicio': '2019a'}),
+    ('valor', {'variavel': 'neve'}),
+    ('inexistente', {}),
+])
+def test_argumentos_invalidos_viram_erro(nome, argumentos):
+    saida = consultas.executar(nome, argumentos)
+    assert saida['consulta'] == nome
+    assert saida['erro']
+    assert 'resultado' not in saida
@@ -0,0 +1,50 @@
+"""Ativo de geometria dos estados: conteúdo versionado e codificação/decodificação."""
+import json
+
+import numpy as np
+import pytest
+
+from modulos import geo
+
+SIGLAS = ['AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MT', 'MS', 'MG', 'PA',
+          'PB', 'PR', 'PE', 'PI', 'RJ', 'RN', 'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO']
+
+
+@pytest.mark.skipif(not geo.ARQUIVO_ATIVO.exists(),
+                    reason="ativo ausente: gere com 'python -m modulos.geo' (precisa de rede)")
+@pytest.mark.parametrize('nivel', list(geo.NIVEIS))
+def test_ativo_versionado_tem_os_27_estados(nivel):
+    with open(geo.ARQUIVO_ATIVO, encoding='utf-8') as arquivo:
+        geojson = geo.decodificar(json.load(arquivo), nivel)
+    features = geojson['features']
+    assert len(features) == 27
+    assert sorted(f['properties']['sigla'] for f in features) == sorted(SIGLAS)
+    assert all(f['geometry']['coordinates'] for f in features)
+
+
+def _quadrado(x, y, lado=1.0, passos=40):
+    """Anel fechado com pontos intermediários em cada lado (para a simplificação remover)."""
+    t = np.linspace(0, lado, passos, endpoint=False)
+    borda = np.concatenate([np.c_[x + t, np.full_like(t, y)],
+                            np.c_[np.full_like(t, x + lado), y + t],
+                            np.c_[x + lado - t, np.full_like(t, y + lado)],
+                            np.c_[np.full_like(t, x), y + lado - t]])
+    return np.vstack([borda, borda[:1]]).tolist()
+
+
+def test_ativo_ida_e_volta():
+    origem = {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'sigla': s, 'name': f'Estado {s}'},
+         'geometry': {'type': 'Polygon', 'coordinates': [_quadrado(-70 + 1.5 * i, -30 + (i % 3))]}}
+        for i, s in enumerate(SIGLAS)]}
+
+    ativo = json.loads(json.dumps(geo.construir_ativo(origem)))
+    for nivel in geo.NIVEIS:
+        features = geo.decodificar(ativo, nivel)['features']
+        assert [f['properties']['sigla'] for f in features] == SIGLAS
+        for f, original in zip(features, origem['features']):
+            anel = np.asarray(f['geometry']['coordinates'][0][0])
+            # Lados retos: sobram só os cantos, na posição original (a menos da quantização)
+            assert len(anel) == 5
+            cantos = np.asarray(original['geometry']['coordinates'][0])[::40]
+            assert np.allclose(anel, cantos, atol=1e-3)
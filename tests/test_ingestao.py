@@ -0,0 +1,70 @@
+"""Ingestão incremental: períodos que atravessam a virada do arquivo bruto."""
+import warnings
+
+import pandas as pd
+import pytest
+
+from modulos import dados, ingestao
+
+COLUNAS = ("Data;Hora UTC;PRECIPITAÇÃO TOTAL, HORÁRIO (mm);"
+           "PRESSAO ATMOSFERICA AO NIVEL DA ESTACAO, HORARIA (mB);RADIACAO GLOBAL (Kj/m²);"
+           "TEMPERATURA DO AR - BULBO SECO, HORARIA (°C);UMIDADE RELATIVA DO AR, HORARIA (%);"
+           "VENTO, VELOCIDADE HORARIA (m/s)")
+
+
+@pytest.fixture
+def pastas(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestao, 'PASTA_INGESTAO', tmp_path / 'ingestao')
+    monkeypatch.setattr(ingestao, 'CONTROLE', tmp_path / 'ingestao' / 'controle.json')
+    monkeypatch.setattr(dados, 'PASTA_TABELAS', tmp_path / 'tabelas')
+    dados.PASTA_TABELAS.mkdir()
+    brutos = tmp_path / 'inmet'
+    brutos.mkdir()
+    return brutos
+
+
+def _arquivo_inmet(pasta, nome, inicio_utc, horas, temperatura):
+    cabecalho = ("REGIAO:;SE\nUF:;SP\nESTACAO:;SAO PAULO\nCODIGO (WMO):;A701\n"
+                 "LATITUDE:;-23,5\nLONGITUDE:;-46,6\nALTITUDE:;792\nDATA DE FUNDACAO:;2000-01-01\n")
+    linhas = [COLUNAS] + [f"{t:%Y/%m/%d};{t:%H}00 UTC;0,5;925;0;{temperatura};70;2"
+                          for t in pd.date_range(inicio_utc, periods=horas, freq='h')]
+    (pasta / nome).write_text(cabecalho + "\n".join(linhas) + "\n", encoding='latin-1')
+
+
+def _mensal():
+    csv = dados.PASTA_TABELAS / dados.TABELAS['mensal']['arquivo']
+    return pd.read_csv(csv).set_index(['state', 'periodo_ref'])
+
+
+def test_arquivo_de_janeiro_nao_sobrescreve_dezembro_de_fora(pastas):
+    # Dezembro completo já na tabela refinada, de antes da ingestão incremental
+    csv = dados.PASTA_TABELAS / dados.TABELAS['mensal']['arquivo']
+    dezembro = {'region': 'SE', 'state': 'SP', 'periodo_ref': '2021-12-01'}
+    dezembro.update({coluna: 10.0 for coluna in dados.TABELAS['mensal']['medidas']})
+    pd.DataFrame([dezembro]).to_csv(csv, index=False)
+
+    # 00-02h UTC de 01/01/2022 caem em 31/12/2021 na hora de Brasília
+    _arquivo_inmet(pastas, 'A701_2022.csv', '2022-01-01 00:00', 24 * 5, temperatura=30)
+    with pytest.warns(UserWarning, match='mantida'):
+        ingestao.ingerir(pastas)
+
+    mensal = _mensal()
+    assert mensal.loc[('SP', '2021-12-01'), 'temperatura_media'] == 10.0
+    assert mensal.loc[('SP', '2022-01-01'), 'temperatura_media'] == 30.0
+
+
+def test_periodo_coberto_pelo_diario_soma_as_horas_da_virada(pastas):
+    # 4º trimestre ingerido desde 00h de 01/10 em Brasília (03h UTC) até o fim do arquivo UTC de 2021
+    _arquivo_inmet(pastas, 'A701_2021.csv', '2021-10-01 03:00', 24 * 92 - 3, temperatura=20)
+    ingestao.ingerir(pastas)
+    assert _mensal().loc[('SP', '2021-12-01'), 'temperatura_media'] == 20.0
+
+    # As 3 horas de 31/12 que vêm no arquivo de 2022 somam às de dezembro já gravadas (sem aviso)
+    _arquivo_inmet(pastas, 'A701_2022.csv', '2022-01-01 00:00', 24 * 5, temperatura=30)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        ingestao.ingerir(pastas)
+    mensal = _mensal()
+    esperado = ((24 * 31 - 3) * 20 + 3 * 30) / (24 * 31)
+    assert mensal.loc[('SP', '2021-12-01'), 'temperatura_media'] == pytest.approx(esperado, rel=1e-6)
+    assert mensal.loc[('SP', '2022-01-01'), 'temperatura_media'] == 30.0